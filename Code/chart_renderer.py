@@ -0,0 +1,177 @@
+# chart_renderer.py
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import StrMethodFormatter
+
+UP_COLOR = "#d24f45" # 상승 봉 (빨강)
+DOWN_COLOR = "#1261c4" # 하락 봉 (파랑)
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+class CandleChartRenderer:
+    def __init__(self, width: float = 10, height: float = 6, dpi: int = 100, max_xticks: int = 8):
+        """
+        캔들 차트 렌더러 (pyplot 없이 Agg 캔버스에 직접 그림)
+        Figure/축/캔들 도형을 한 번만 만들어 두고, 매번 좌표와 색만 바꿔 PNG로 저장합니다.
+        같은 경로에 같은 캔들로 그린 적이 있으면 (.hash 파일 비교) 다시 그리지 않습니다.
+        """
+        self.dpi = dpi
+        self.max_xticks = max_xticks
+        self.figure = Figure(figsize=(width, height), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax_price, self.ax_volume = self.figure.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [3, 1]})
+        self.figure.subplots_adjust(left=0.12, right=0.97, top=0.93, bottom=0.12, hspace=0.05)
+
+        self.wicks = LineCollection([], linewidths=0.8)
+        self.bodies = PolyCollection([], linewidths=0.5)
+        self.volumes = PolyCollection([], linewidths=0)
+        self.ax_price.add_collection(self.wicks)
+        self.ax_price.add_collection(self.bodies)
+        self.ax_volume.add_collection(self.volumes)
+
+        self.title = self.ax_price.set_title("")
+        self.ax_price.set_ylabel("Price (KRW)")
+        self.ax_price.yaxis.set_major_formatter(StrMethodFormatter("{x:,.0f}")) # 1e7 같은 지수 표기 대신 원 단위로 표시
+        self.ax_volume.set_ylabel("Volume")
+        for ax in (self.ax_price, self.ax_volume):
+            ax.grid(linestyle="--", linewidth=0.5, alpha=0.7)
+
+    def render(self, df, path: str, title: str = "") -> bool:
+        """OHLCV DataFrame을 캔들 차트로 저장합니다. 캔들이 그대로라 건너뛰었으면 False"""
+        ts, ohlcv = to_arrays(df)
+        return self.render_arrays(ts, ohlcv, path, title)
+
+    def render_arrays(self, ts: np.ndarray, ohlcv: np.ndarray, path: str, title: str = "") -> bool:
+        digest = chart_digest(ts, ohlcv, title, self.figure.get_size_inches(), self.dpi)
+        if is_up_to_date(path, digest):
+            return False
+
+        o, h, l, c, v = ohlcv.T
+        n = len(ts)
+        x = np.arange(n, dtype=float)
+        colors = np.where(c >= o, UP_COLOR, DOWN_COLOR)
+
+        # 꼬리: (x, 저가) ~ (x, 고가) 선분
+        self.wicks.set_segments(np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1))
+        self.wicks.set_color(colors)
+
+        # 몸통: 시가~종가 사각형 (도지는 보이도록 최소 높이 부여)
+        min_height = (np.nanmax(h) - np.nanmin(l)) * 0.002 if n else 0.0
+        bottom = np.minimum(o, c)
+        top = np.maximum(np.maximum(o, c), bottom + min_height)
+        self.bodies.set_verts(_bars(x, bottom, top))
+        self.bodies.set_facecolor(colors)
+        self.bodies.set_edgecolor(colors)
+
+        self.volumes.set_verts(_bars(x, np.zeros(n), v))
+        self.volumes.set_facecolor(colors)
+
+        if n:
+            pad = (np.nanmax(h) - np.nanmin(l)) * 0.05 or np.nanmax(h) * 0.01 or 1.0
+            self.ax_price.set_xlim(-1, n)
+            self.ax_price.set_ylim(np.nanmin(l) - pad, np.nanmax(h) + pad)
+            self.ax_volume.set_ylim(0, (np.nanmax(v) or 1.0) * 1.1)
+            ticks = np.unique(np.linspace(0, n - 1, min(self.max_xticks, n)).astype(int))
+            labels = [label[5:16].replace("T", " ") for label in np.datetime_as_string(ts[ticks].astype("datetime64[ns]"), unit="m")]
+            self.ax_volume.set_xticks(ticks)
+            self.ax_volume.set_xticklabels(labels, rotation=30, ha="right")
+        self.title.set_text(title)
+
+        path_dir = os.path.dirname(path)
+        if path_dir:
+            os.makedirs(path_dir, exist_ok=True)
+        self.figure.savefig(path, dpi=self.dpi)
+        with open(path + ".hash", "w", encoding="utf-8") as f:
+            f.write(digest)
+        return True
+
+class ChartBatchRenderer:
+    def __init__(self, max_workers: int = None, **renderer_kwargs):
+        """
+        여러 종목/봉 차트를 워커 프로세스들에서 나눠 그리는 렌더러
+        워커마다 CandleChartRenderer를 하나씩 만들어 계속 재사용하고, 캔들이 바뀌지 않은 차트는 워커로 보내지도 않습니다.
+        renderer_kwargs: CandleChartRenderer 옵션 (width, height, dpi ...)
+        """
+        self.renderer_kwargs = renderer_kwargs
+        self.local = CandleChartRenderer(**renderer_kwargs) # 워커를 띄울 필요가 없는 소량 작업용
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(renderer_kwargs,))
+
+    def render_all(self, jobs: list) -> dict:
+        """
+        jobs: [(df, path, title), ...]
+        반환: {path: True(새로 그림) / False(변경 없음) / None(실패)}
+        """
+        results = {}
+        pending = []
+        for df, path, title in jobs:
+            if df is None or df.empty:
+                results[path] = None
+                continue
+            ts, ohlcv = to_arrays(df)
+            digest = chart_digest(ts, ohlcv, title, self.local.figure.get_size_inches(), self.local.dpi)
+            if is_up_to_date(path, digest):
+                results[path] = False
+            else:
+                pending.append((ts, ohlcv, path, title))
+
+        if len(pending) == 1:
+            ts, ohlcv, path, title = pending[0]
+            results[path] = self.local.render_arrays(ts, ohlcv, path, title)
+        elif pending:
+            futures = {self.executor.submit(_render_in_worker, *job): job[2] for job in pending}
+            for future, path in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] 차트 렌더링 실패 ({path}): {e}")
+                    results[path] = None
+
+        rendered = sum(1 for value in results.values() if value)
+        print(f"[INFO] 차트 {len(jobs)}개 중 {rendered}개 새로 그림, {sum(1 for value in results.values() if value is False)}개 변경 없음")
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+def to_arrays(df):
+    """DataFrame → (시각 ns int64 배열, [open, high, low, close, volume] float 배열)"""
+    ts = df.index.values.astype("datetime64[ns]").astype(np.int64)
+    ohlcv = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+    return ts, ohlcv
+
+def chart_digest(ts: np.ndarray, ohlcv: np.ndarray, title: str, size, dpi: int) -> str:
+    """차트 내용을 결정하는 값(캔들, 제목, 크기)의 해시"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(ts).tobytes())
+    h.update(np.ascontiguousarray(ohlcv).tobytes())
+    h.update(f"{title}|{tuple(size)}|{dpi}".encode("utf-8"))
+    return h.hexdigest()
+
+def is_up_to_date(path: str, digest: str) -> bool:
+    if not os.path.exists(path) or not os.path.exists(path + ".hash"):
+        return False
+    with open(path + ".hash", encoding="utf-8") as f:
+        return f.read().strip() == digest
+
+def _bars(x: np.ndarray, bottom: np.ndarray, top: np.ndarray, width: float = 0.6) -> np.ndarray:
+    """x 중심, bottom~top 높이의 사각형 꼭짓점 배열 (n, 4, 2)"""
+    left, right = x - width / 2, x + width / 2
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+
+_worker_renderer = None
+
+def _init_worker(renderer_kwargs: dict):
+    global _worker_renderer
+    _worker_renderer = CandleChartRenderer(**renderer_kwargs)
+
+def _render_in_worker(ts, ohlcv, path, title):
+    return _worker_renderer.render_arrays(ts, ohlcv, path, title)
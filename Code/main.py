@@ -1,19 +1,19 @@
 import os
 import time
-import re
 import json
 import datetime
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+from concurrent.futures import ThreadPoolExecutor
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import google.generativeai as genai
 from PIL import Image
 import python_bithumb
+import bithumb_transport
+bithumb_transport.install() # 빗썸 요청은 모두 공용 연결 풀/요청 한도를 거침
+from news_crawler import NewsCrawler
+from news_store import NewsStore
+from chart_renderer import CandleChartRenderer, ChartBatchRenderer
 
 class Coin_Bot:
     def __init__(self, slack_token: str, google_api_key: str, channel_name: str="#money"):
@@ -22,6 +22,8 @@ class Coin_Bot:
         self.channel_name = channel_name
         self.news_folder = "NEWS"
         os.makedirs(self.news_folder, exist_ok=True)
+        self.chart_renderer = CandleChartRenderer()
+        self.batch_renderer = None # 여러 종목 차트용 워커 프로세스 (처음 쓸 때 생성)
 
     # Slack 메시지 전송
     def send_message(self, message: str):
@@ -42,7 +44,7 @@ class Coin_Bot:
         df = python_bithumb.get_ohlcv(ticker, interval=interval, count=count)
         if df is None or df.empty:
             print(f"[WARNING] {ticker} {interval} 데이터가 비어 있습니다. 작업을 중단합니다.")
-            return
+            return None
         
         csv_filename = "csv/" + csv_filename + ".csv"
 
@@ -55,34 +57,41 @@ class Coin_Bot:
         print(f"[INFO] 데이터 {count}개를 '{csv_filename}'에 저장했습니다.")
 
         img_filename = "img/" + img_filename + ".png"
-        # 이미지 저장
-        img_dir = os.path.dirname(img_filename)
-        if img_dir and not os.path.exists(img_dir):
-            os.makedirs(img_dir, exist_ok=True)
-
-        plt.figure(figsize=(10, 6))
-        plt.plot(df.index, df['open'], label='Open Price', color='blue')
-
-        # 그래프 꾸미기
-        plt.title(f"{ticker} Open Price ({interval})")
-        plt.xlabel("DateTime")
-        plt.ylabel("Price (KRW)")
-        plt.legend()
-
-        # x축 눈금 설정
-        ax = plt.gca()
-        ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
-        ax.xaxis.set_minor_locator(mdates.MinuteLocator(interval=1))
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-        plt.xticks(rotation=45)
-
-        # Grid 설정
-        plt.grid(which='both', linestyle='--', linewidth=0.5, alpha=0.7)
-        plt.minorticks_on()
-
-        plt.savefig(img_filename, dpi=150, bbox_inches='tight')
-        plt.close()
-        print(f"[INFO] 그래프를 '{img_filename}'에 저장했습니다.")
+        # 이미지 저장 (캔들이 그대로면 다시 그리지 않음)
+        if self.chart_renderer.render(df, img_filename, title=f"{ticker} ({interval})"):
+            print(f"[INFO] 그래프를 '{img_filename}'에 저장했습니다.")
+        else:
+            print(f"[INFO] 캔들 변경이 없어 '{img_filename}'을 그대로 사용합니다.")
+        return img_filename
+
+    def save_watchlist_charts(self, tickers: list, interval: str = "minute5", count: int = 100, img_folder: str = "img") -> dict:
+        """
+        여러 종목의 캔들 차트를 한 번에 저장합니다. (멀티모달 프롬프트 입력용)
+        OHLCV는 스레드로 동시에 받아오고, 차트는 워커 프로세스들이 나눠 그립니다.
+        반환: {종목: 이미지 경로} (데이터를 못 받았거나 그리기에 실패한 종목은 제외)
+        """
+        with ThreadPoolExecutor(max_workers=min(8, len(tickers)) or 1) as executor:
+            frames = dict(zip(tickers, executor.map(lambda t: self._fetch_ohlcv(t, interval, count), tickers)))
+
+        if self.batch_renderer is None:
+            self.batch_renderer = ChartBatchRenderer()
+        paths = {ticker: os.path.join(img_folder, f"{ticker}_{interval}.png") for ticker in tickers}
+        results = self.batch_renderer.render_all([(frames[ticker], paths[ticker], f"{ticker} ({interval})") for ticker in tickers])
+        return {ticker: path for ticker, path in paths.items() if results.get(path) is not None}
+
+    def _fetch_ohlcv(self, ticker: str, interval: str, count: int):
+        """한 종목의 OHLCV (실패하면 None → 그 종목만 건너뜀)"""
+        try:
+            return python_bithumb.get_ohlcv(ticker, interval=interval, count=count)
+        except Exception as e:
+            print(f"[WARNING] {ticker} {interval} 데이터를 받지 못해 건너뜁니다: {e}")
+            return None
+
+    def close(self):
+        """차트 워커 프로세스 종료"""
+        if self.batch_renderer is not None:
+            self.batch_renderer.close()
+            self.batch_renderer = None
 
     # Google Generative AI를 사용한 분석
     def analyze_with_google_ai(self, prompt: str) -> str:
@@ -94,133 +103,54 @@ class Coin_Bot:
             print(f"[ERROR] Google Generative AI 오류: {e}")
             return ""
 
-    def run_autoupdate(self, interval=300, channel_name: str = "#money"):
-        news_folder = "NEWS"
-        os.makedirs(news_folder, exist_ok=True)
-        csv_path = os.path.join(news_folder, "my_news.csv")
-        print(f"[INFO] 자동 업데이트 시작 ({int(interval / 60)}분 간격)")
-        last_date = datetime.date.today()
+    def run_autoupdate(self, interval=300, channel_name: str = "#money", crawler: NewsCrawler = None, store: NewsStore = None):
+        """
+        interval: 뉴스 확인 주기(초). 브라우저를 계속 띄워두고 새로고침만 하므로 수십 초 단위로 줄여도 됩니다.
+        crawler: 뉴스 수집기 (기본값: 헤드리스 크롬으로 코인니스를 수집)
+        store: 뉴스 저장소 (기본값: NEWS 폴더의 날짜별 CSV + 해시 인덱스)
+        """
+        crawler = crawler or NewsCrawler()
+        store = store or NewsStore(self.news_folder)
+        print(f"[INFO] 자동 업데이트 시작 ({interval}초 간격)")
 
         try:
             while True:
+                started = time.time()
                 now = datetime.datetime.now()
-                today_date = now.date()
 
-                # (A) 날짜가 바뀌었으면 CSV 초기화
-                if today_date != last_date:
-                    if os.path.exists(csv_path):
-                        os.remove(csv_path)
-                        print(f"[INFO] 날짜 변경으로 CSV({csv_path})를 초기화했습니다.")
-                    last_date = today_date
+                # (A) 날짜가 바뀌었으면 새 날짜 파일로 전환
+                store.roll(now.date())
 
                 print(f"\n[INFO] 뉴스 확인 중... ({now.strftime('%Y-%m-%d %H:%M:%S')})")
 
-                # (B) 뉴스 크롤링
-                driver = webdriver.Chrome()
-                try:
-                    driver.get("https://coinness.com/article")
-                    time.sleep(5)  # JS 로딩 대기
-
-                    css = "#root > div > div.Wrap-sc-v065lx-0.hwmGSB > div > main > div.ContentContainer-sc-91rcal-0.jJHYjq > div.ArticleListContainer-sc-cj3rkv-0.fkxjqP"
-                    container = driver.find_element(By.CSS_SELECTOR, css)
-                    raw_text = container.text
-                except Exception as e:
-                    print(f"[ERROR] 크롤링 실패: {e}")
-                    raw_text = ""
-                finally:
-                    driver.quit()
-
-                if not raw_text:
-                    print("[WARNING] 크롤링 결과가 비어 있습니다.")
-                    time.sleep(interval)
-                    continue
+                # (B) 뉴스 수집 (브라우저 세션 재사용, 실패 시에만 재시작)
+                articles = crawler.fetch_articles()
+                print(f"[INFO] 뉴스 수집 {crawler.last_elapsed:.2f}초 소요")
 
-                # (C) 뉴스 텍스트 파싱
-                lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
-                time_pattern = re.compile(r"^\d{2}:\d{2}$")
-
-                articles = []
-                current_time, current_date, current_title = None, None, None
-                content_lines = []
-
-                def save_article():
-                    if current_time and current_date and current_title:
-                        articles.append(
-                            {
-                                "time": current_time,
-                                "date": current_date,
-                                "title": current_title,
-                                "content": "\n".join(content_lines).strip(),
-                            }
-                        )
-
-                state = "idle"
-                for line in lines:
-                    if time_pattern.match(line):  # 시간 감지
-                        save_article()
-                        current_time = line
-                        current_date, current_title = None, None
-                        content_lines = []
-                        state = "got_time"
-                        continue
-
-                    if state == "got_time":
-                        current_date = line
-                        state = "got_date"
-                        continue
-
-                    if state == "got_date":
-                        current_title = line
-                        state = "got_title"
-                        continue
-
-                    content_lines.append(line)
-                    state = "collecting_content"
-
-                save_article()
-                new_df = pd.DataFrame(articles, columns=["time", "date", "title", "content"])
-                if new_df.empty:
-                    print("[INFO] 새로 추출된 기사가 없습니다.")
-                    time.sleep(interval)
+                if not articles:
+                    print("[WARNING] 새로 추출된 기사가 없습니다.")
+                    time.sleep(max(0.0, interval - (time.time() - started)))
                     continue
 
-                # (D) CSV 저장 및 Slack 메시지 전송
-                if os.path.exists(csv_path):
-                    try:
-                        existing_df = pd.read_csv(csv_path)
-                    except pd.errors.EmptyDataError:
-                        existing_df = pd.DataFrame(columns=["time", "date", "title", "content"])
-                else:
-                    existing_df = pd.DataFrame(columns=["time", "date", "title", "content"])
-
-                existing_signatures = {
-                    (row["time"], row["date"], row["title"], row["content"])
-                    for _, row in existing_df.iterrows()
-                }
-
-                new_articles = []
-                for _, row in new_df.iterrows():
-                    sig = (row["time"], row["date"], row["title"], row["content"])
-                    if sig not in existing_signatures:
-                        new_articles.append(row)
-                        existing_signatures.add(sig)
-
+                # (C) 새 기사만 저장 및 Slack 메시지 전송
+                new_articles = store.add(articles)
                 if new_articles:
                     message_parts = []
                     for row in new_articles:
                         part = f"[{row['time']}][{row['date']}]\n{row['title']}\n{row['content']}\n"
                         message_parts.append(part)
                     self.send_message("\n".join(message_parts))
+                print(f"[INFO] 새 기사 {len(new_articles)}건 / 수집 {len(articles)}건")
 
-                new_articles_df = pd.DataFrame(new_articles, columns=["time", "date", "title", "content"])
-                final_df = pd.concat([existing_df, new_articles_df], ignore_index=True).drop_duplicates()
-                final_df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-
-                print(f"[INFO] {int(interval / 60)}분 뒤 다음 업데이트 진행...")
-                time.sleep(interval)
+                print(f"[INFO] {interval}초 뒤 다음 업데이트 진행...")
+                time.sleep(max(0.0, interval - (time.time() - started)))
 
         except KeyboardInterrupt:
             print("[INFO] 자동 업데이트 종료 (KeyboardInterrupt).")
+        finally:
+            crawler.close()
+            self.close()
+            store.close()
 
     # 이미지를 포함한 프롬프트 생성
     def create_openai_prompt(self, role_description: str, tasks: str, image_file_paths: list) -> str:
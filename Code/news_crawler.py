@@ -0,0 +1,157 @@
+# news_crawler.py
+import re
+import time
+import requests
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+COINNESS_URL = "https://coinness.com/article"
+ARTICLE_CONTAINER_CSS = "#root > div > div.Wrap-sc-v065lx-0.hwmGSB > div > main > div.ContentContainer-sc-91rcal-0.jJHYjq > div.ArticleListContainer-sc-cj3rkv-0.fkxjqP"
+NEWS_COLUMNS = ["time", "date", "title", "content"]
+
+TIME_PATTERN = re.compile(r"^\d{2}:\d{2}$")
+
+class NewsCrawler:
+    def __init__(self,
+    url: str = COINNESS_URL,
+    container_css: str = ARTICLE_CONTAINER_CSS,
+    headless: bool = True,
+    load_timeout: float = 15.0,
+    feed_url: str = None,
+    feed_parser=None,
+    feed_timeout: float = 5.0
+    ):
+        """
+        코인니스 뉴스 수집기
+        - 헤드리스 크롬 하나를 계속 띄워두고 매 주기마다 새로고침만 합니다. (브라우저 실행 비용은 처음 한 번만)
+        - 고정 sleep 대신 기사 목록 요소가 나타나 내용이 채워질 때까지만 기다립니다. (최대 load_timeout초)
+        - 오류가 나면 그때만 드라이버를 닫고 다음 수집 때 새로 띄웁니다.
+        feed_url/feed_parser: 기사 목록 JSON 주소를 알고 있으면 브라우저 없이 HTTP로 바로 받아옵니다.
+            feed_parser(json) -> [{"time", "date", "title", "content"}, ...], 실패하면 브라우저로 대신 수집
+        """
+        self.url = url
+        self.container_css = container_css
+        self.headless = headless
+        self.load_timeout = load_timeout
+        self.feed_url = feed_url
+        self.feed_parser = feed_parser
+        self.feed_timeout = feed_timeout
+        self.session = requests.Session() if feed_url and feed_parser else None
+        self.driver = None
+        self.restarts = 0
+        self.last_elapsed = None # 마지막 수집에 걸린 초
+
+    def fetch_articles(self) -> list:
+        """현재 기사 목록을 [{"time", "date", "title", "content"}, ...]로 반환합니다. (실패하면 빈 리스트)"""
+        started = time.time()
+        try:
+            if self.session is not None:
+                articles = self._fetch_feed()
+                if articles is not None:
+                    return articles
+            return parse_articles(self.fetch_text())
+        finally:
+            self.last_elapsed = time.time() - started
+
+    def fetch_text(self) -> str:
+        """브라우저로 기사 목록 영역의 텍스트를 가져옵니다."""
+        try:
+            if self.driver is None:
+                self._start_driver()
+                self.driver.get(self.url)
+            else:
+                self.driver.refresh()
+            return WebDriverWait(self.driver, self.load_timeout).until(self._container_text)
+        except Exception as e:
+            print(f"[ERROR] 크롤링 실패, 브라우저를 다시 띄웁니다: {e}")
+            self._quit_driver()
+            return ""
+
+    def close(self):
+        self._quit_driver()
+        if self.session is not None:
+            self.session.close()
+
+    def _fetch_feed(self):
+        try:
+            response = self.session.get(self.feed_url, timeout=self.feed_timeout)
+            response.raise_for_status()
+            return self.feed_parser(response.json())
+        except Exception as e:
+            print(f"[WARNING] 뉴스 피드 조회 실패, 브라우저로 수집합니다: {e}")
+            return None
+
+    def _container_text(self, driver):
+        # 기사 목록 요소가 생기고 내용이 채워졌을 때만 텍스트를 반환 (그 전에는 False → 계속 대기)
+        elements = driver.find_elements(By.CSS_SELECTOR, self.container_css)
+        if not elements:
+            return False
+        return elements[0].text.strip() or False
+
+    def _start_driver(self):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--blink-settings=imagesEnabled=false") # 이미지는 필요 없으므로 받지 않음
+        self.driver = webdriver.Chrome(options=options)
+        self.driver.set_page_load_timeout(self.load_timeout * 2)
+        self.restarts += 1
+        print(f"[INFO] 뉴스 수집용 브라우저를 시작했습니다. (누적 {self.restarts}회)")
+
+    def _quit_driver(self):
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+
+def parse_articles(raw_text: str) -> list:
+    """기사 목록 텍스트(시간 / 날짜 / 제목 / 본문... 반복)를 기사 dict 리스트로 나눕니다."""
+    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
+
+    articles = []
+    current_time, current_date, current_title = None, None, None
+    content_lines = []
+
+    def save_article():
+        if current_time and current_date and current_title:
+            articles.append(
+                {
+                    "time": current_time,
+                    "date": current_date,
+                    "title": current_title,
+                    "content": "\n".join(content_lines).strip(),
+                }
+            )
+
+    state = "idle"
+    for line in lines:
+        if TIME_PATTERN.match(line):  # 시간 감지
+            save_article()
+            current_time = line
+            current_date, current_title = None, None
+            content_lines = []
+            state = "got_time"
+            continue
+
+        if state == "got_time":
+            current_date = line
+            state = "got_date"
+            continue
+
+        if state == "got_date":
+            current_title = line
+            state = "got_title"
+            continue
+
+        content_lines.append(line)
+        state = "collecting_content"
+
+    save_article()
+    return articles
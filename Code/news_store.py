@@ -0,0 +1,96 @@
+# news_store.py
+import csv
+import datetime
+import hashlib
+import os
+from news_crawler import NEWS_COLUMNS
+
+class NewsStore:
+    def __init__(self, folder: str = "NEWS", prefix: str = "my_news"):
+        """
+        날짜별 뉴스 저장소 (NEWS/my_news_YYYY-MM-DD.csv + 같은 이름의 .idx)
+        - .idx에는 기사 시그니처(time, date, title, content)의 해시를 한 줄에 하나씩 이어 씁니다.
+        - 시작할 때 .idx만 읽어 해시 set을 만들고, 이후 중복 확인은 set 조회(O(1))로 끝납니다.
+        - 새 기사만 CSV 끝에 덧붙이므로 매 주기 작업량은 그날 쌓인 기사 수가 아니라 새 기사 수에 비례합니다.
+        - 날짜가 바뀌면 파일을 지우지 않고 새 날짜 파일로 넘어갑니다.
+          (자정 직후 페이지에 남아 있는 전날 기사가 다시 전송되지 않도록 전날 인덱스도 함께 확인)
+        """
+        self.folder = folder
+        self.prefix = prefix
+        os.makedirs(folder, exist_ok=True)
+        self.day = None
+        self.signatures = set()
+        self.previous = set()
+        self.csv_file = None
+        self.idx_file = None
+        self.roll()
+
+    def path(self, day: datetime.date, ext: str = "csv") -> str:
+        return os.path.join(self.folder, f"{self.prefix}_{day.isoformat()}.{ext}")
+
+    def roll(self, day: datetime.date = None) -> bool:
+        """day(기본값: 오늘) 파일로 넘어갑니다. 날짜가 바뀌었으면 True"""
+        day = day or datetime.date.today()
+        if day == self.day:
+            return False
+        self.close()
+        self.previous = self._load_index(day - datetime.timedelta(days=1))
+        self.signatures = self._load_index(day)
+        self.day = day
+
+        csv_path = self.path(day)
+        if not os.path.exists(csv_path):
+            with open(csv_path, "w", newline="", encoding="utf-8-sig") as f: # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+                csv.writer(f).writerow(NEWS_COLUMNS)
+        self.csv_file = open(csv_path, "a", newline="", encoding="utf-8")
+        self.csv_writer = csv.writer(self.csv_file)
+        self.idx_file = open(self.path(day, "idx"), "a", encoding="utf-8")
+        print(f"[INFO] 뉴스 저장 파일: {csv_path} (기존 기사 {len(self.signatures)}건)")
+        return True
+
+    def add(self, articles: list) -> list:
+        """처음 보는 기사만 저장하고 그 기사들을 반환합니다. articles: [{"time", "date", "title", "content"}, ...]"""
+        new_articles, new_keys = [], []
+        for article in articles:
+            key = signature(article)
+            if key in self.signatures or key in self.previous:
+                continue
+            self.signatures.add(key)
+            new_articles.append(article)
+            new_keys.append(key)
+
+        if new_articles:
+            # CSV를 먼저 기록 → 도중에 멈춰도 기사가 빠지지는 않음 (최악의 경우 다음 실행에서 한 번 더 저장)
+            self.csv_writer.writerows([[article.get(col, "") for col in NEWS_COLUMNS] for article in new_articles])
+            self.csv_file.flush()
+            self.idx_file.write("".join(f"{key}\n" for key in new_keys))
+            self.idx_file.flush()
+        return new_articles
+
+    def close(self):
+        for f in (self.csv_file, self.idx_file):
+            if f is not None:
+                f.close()
+        self.csv_file = None
+        self.idx_file = None
+
+    def _load_index(self, day: datetime.date) -> set:
+        idx_path = self.path(day, "idx")
+        if os.path.exists(idx_path):
+            with open(idx_path, encoding="utf-8") as f:
+                return {line.strip() for line in f if line.strip()}
+
+        # 인덱스가 없으면 CSV에서 한 번 다시 만듦
+        csv_path = self.path(day)
+        if not os.path.exists(csv_path):
+            return set()
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            keys = {signature(row) for row in csv.DictReader(f)}
+        with open(idx_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key in keys))
+        return keys
+
+def signature(article: dict) -> str:
+    """기사 (time, date, title, content)의 해시 (실행할 때마다 달라지는 hash() 대신 고정된 blake2b 사용)"""
+    text = "\x1f".join(str(article.get(col) or "") for col in NEWS_COLUMNS)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
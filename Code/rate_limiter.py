@@ -0,0 +1,33 @@
+# rate_limiter.py
+# Ver.2/rate_limiter.py와 같은 내용의 사본 (Code/와 Ver.2/는 모듈을 공유하지 않음) - 고칠 때는 두 파일을 같이 고칠 것
+import threading
+import time
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        """초당 rate회로 요청을 제한하는 토큰 버킷 (rate <= 0 이면 제한 없음)"""
+        self.rate = rate
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """토큰 하나를 소비합니다. timeout 안에 얻지 못하면 False를 반환합니다."""
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_seconds = (1 - self.tokens) / self.rate
+
+            if deadline is not None and time.monotonic() + wait_seconds > deadline:
+                return False
+            time.sleep(wait_seconds)
@@ -0,0 +1,102 @@
+# account_state.py
+import threading
+import time
+from typing import NamedTuple
+
+class Balance(NamedTuple):
+    currency: str
+    balance: float # 주문 가능 수량
+    locked: float # 주문에 묶인 수량
+    avg_buy_price: float
+
+    @property
+    def total(self) -> float:
+        return self.balance + self.locked
+
+class AccountState:
+    def __init__(self, api, max_inflight_seconds: float = 60.0):
+        """
+        계좌 잔고 스냅샷
+        - refresh()가 get_balances() 한 번으로 전체 잔고를 받아오고, 모든 조회는 메모리에서 답합니다.
+        - 우리 주문은 접수 시 잔고를 묶고(on_submit), 체결되면 실제 체결 수량/금액으로 바로 반영합니다(on_done).
+        - 체결을 기다리는 우리 주문이 있는 동안에는 새로 받아오지 않고 로컬 반영분을 그대로 씁니다.
+          (거래소 스냅샷과 로컬 반영이 겹쳐 두 번 계산되는 것을 막기 위함, max_inflight_seconds가 지나면 그냥 새로 받음)
+        api: python_bithumb.Bithumb 또는 같은 메서드를 가진 객체
+        """
+        self.api = api
+        self.max_inflight_seconds = max_inflight_seconds
+        self.lock = threading.Lock()
+        self.balances = {}
+        self.inflight = {} # client_id -> 접수 시각 (아직 끝나지 않은 우리 주문)
+        self.refreshed_at = None
+        self.refresh_count = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """전체 잔고를 한 번에 다시 받아옵니다. 체결 대기 중인 주문 때문에 건너뛰었으면 False"""
+        with self.lock:
+            if self.inflight and not force and time.time() - min(self.inflight.values()) < self.max_inflight_seconds:
+                print(f"[계좌] 체결 대기 중인 주문 {len(self.inflight)}건이 있어 로컬 잔고를 그대로 사용합니다.")
+                return False
+            raw = self.api.get_balances()
+            self.balances = {bal["currency"]: _to_balance(bal) for bal in raw}
+            self.inflight.clear()
+            self.refreshed_at = time.time()
+            self.refresh_count += 1
+            return True
+
+    def get(self, currency: str) -> Balance:
+        with self.lock:
+            return self.balances.get(currency) or Balance(currency, 0.0, 0.0, 0.0)
+
+    def available(self, currency: str) -> float:
+        """주문 가능 수량 (기존 get_balance와 같은 값)"""
+        return self.get(currency).balance
+
+    def snapshot(self) -> dict:
+        """{화폐: Balance} 전체 복사본"""
+        with self.lock:
+            return dict(self.balances)
+
+    def age(self) -> float or None:
+        """마지막으로 받아온 뒤 지난 초"""
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    # --- 우리 주문 반영 (OrderExecutor의 on_submit / on_done으로 연결) ---
+    def on_submit(self, ticket):
+        """주문을 내는 순간 해당 금액/수량을 묶어 둡니다. (다음 주문이 같은 잔고를 다시 쓰지 않도록)"""
+        with self.lock:
+            self.inflight[ticket.client_id] = time.time()
+            currency = "KRW" if ticket.side == "buy" else ticket.ticker.split('-')[1]
+            self._adjust(currency, -ticket.amount, ticket.amount)
+
+    def on_done(self, ticket):
+        """주문이 끝나면 묶어 둔 잔고를 풀고 실제 체결 결과를 반영합니다."""
+        with self.lock:
+            if self.inflight.pop(ticket.client_id, None) is None:
+                return # 그 사이 잔고를 새로 받아왔으면 이미 거래소 값에 들어 있음
+            if ticket.state == "unknown":
+                return # 체결 여부를 모르면 묶어 둔 채로 두고 다음 refresh에서 거래소 값으로 맞춤
+            coin = ticket.ticker.split('-')[1]
+            filled = ticket.state == "filled"
+            if ticket.side == "buy":
+                spent = (ticket.funds + ticket.paid_fee) if filled else 0.0
+                self._adjust("KRW", ticket.amount - spent, -ticket.amount)
+                if filled:
+                    self._adjust(coin, ticket.filled_volume, 0.0)
+            else:
+                sold = ticket.filled_volume if filled else 0.0
+                self._adjust(coin, ticket.amount - sold, -ticket.amount)
+                if filled:
+                    self._adjust("KRW", ticket.funds - ticket.paid_fee, 0.0)
+
+    def _adjust(self, currency: str, balance_delta: float, locked_delta: float):
+        old = self.balances.get(currency) or Balance(currency, 0.0, 0.0, 0.0)
+        self.balances[currency] = old._replace(balance=max(0.0, old.balance + balance_delta), locked=max(0.0, old.locked + locked_delta))
+
+def _to_balance(raw: dict) -> Balance:
+    return Balance(
+        currency=raw["currency"],
+        balance=float(raw.get("balance") or 0.0),
+        locked=float(raw.get("locked") or 0.0),
+        avg_buy_price=float(raw.get("avg_buy_price") or 0.0),
+    )
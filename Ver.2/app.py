@@ -1,13 +1,18 @@
 # app.py (Thread 분리 최종 버전)
 import os
 import pandas as pd
-from datetime import datetime, time
+from datetime import datetime
 from flask import Flask, request
 from slack_bolt import App
 from slack_bolt.adapter.flask import SlackRequestHandler
 from dotenv import load_dotenv
 import python_bithumb
+import bithumb_transport
+bithumb_transport.install() # 빗썸 요청은 모두 공용 연결 풀/요청 한도를 거침
 from threading import Thread # Thread 라이브러리 추가
+from trade_log_store import TradeLogStore, LOG_COLUMNS
+from live_metrics import LiveMetrics
+from account_state import AccountState
 
 # --- 초기화 ---
 load_dotenv()
@@ -27,41 +32,47 @@ except Exception as e:
     print(f"Bithumb API 초기화 실패: {e}")
     bithumb_api = None
 
+# 계좌 잔고 스냅샷 (get_balances 한 번으로 전체 화폐를 받아옴)
+account = AccountState(bithumb_api) if bithumb_api else None
+
+# 봇이 기록하는 거래 로그 DB (읽기 전용으로 사용, 예전 CSV만 있으면 처음 한 번 옮겨옴)
+trade_log = TradeLogStore(os.path.join("logs", "trade_log.db"), legacy_csv=os.path.join("logs", "trade_log_all.csv"))
+
+def fetch_balances() -> dict:
+    """보고서에 표시할 잔고 조회 (LiveMetrics가 주기적으로만 호출, 화폐마다 따로 묻지 않고 한 번에 조회)"""
+    account.refresh()
+    return {"KRW": account.available("KRW"), "BTC": account.available("BTC")}
+
+# 새 거래만 누적 반영하는 지표 집계기 (잔고는 1분마다 갱신해 캐시)
+metrics = LiveMetrics(trade_log, balance_fn=fetch_balances if account else None, last_n=5)
+metrics.start()
+
 # --- 시간이 오래 걸리는 실제 작업 함수 ---
 def process_report(say):
     """백그라운드에서 실행될 보고서 생성 및 전송 함수"""
     try:
-        # 1. 최근 5개 거래 기록 조회
-        log_path = os.path.join("logs", "trade_log_all.csv")
-        if os.path.exists(log_path):
-            df = pd.read_csv(log_path)
-            trade_df = df[df['판단'].isin(['buy', 'sell'])]
-            last_5_trades = trade_df.tail(5).to_markdown(index=False)
+        state = metrics.snapshot() # 네트워크/디스크 접근 없이 집계된 상태만 사용
+
+        # 1. 최근 5개 거래 기록
+        if state["last_trades"]:
+            last_5_trades = pd.DataFrame(state["last_trades"], columns=LOG_COLUMNS).to_markdown(index=False)
         else:
             last_5_trades = "아직 거래 기록이 없습니다."
 
-        # 2. 현재 잔액 조회
-        if bithumb_api:
-            krw_balance = bithumb_api.get_balance("KRW")
-            btc_balance = bithumb_api.get_balance("BTC")
+        # 2. 현재 잔액 (주기적으로 갱신된 캐시)
+        if state["balance"] is not None:
             balance_text = (
-                f"∙ *KRW 잔고:* `{krw_balance:,.0f}` 원\n"
-                f"∙ *BTC 잔고:* `{btc_balance}` BTC"
+                f"∙ *KRW 잔고:* `{state['balance']['KRW']:,.0f}` 원\n"
+                f"∙ *BTC 잔고:* `{state['balance']['BTC']}` BTC\n"
+                f"_({state['balance_updated'].strftime('%H:%M:%S')} 기준)_"
             )
         else:
             balance_text = "API 키 문제로 잔액을 조회할 수 없습니다."
 
-        # 3. 오전 8시 기준 실현 손익 계산
-        if os.path.exists(log_path):
-            df = pd.read_csv(log_path)
-            df['시간'] = pd.to_datetime(df['시간'])
-            today_8am = datetime.combine(datetime.today(), time(8, 0))
-            today_trades = df[df['시간'] >= today_8am]
-            today_pnl = today_trades['실현손익'].sum()
-            pnl_icon = "📈" if today_pnl >= 0 else "📉"
-            pnl_text = f"{pnl_icon} `{today_pnl:,.2f}` KRW"
-        else:
-            pnl_text = "거래 기록이 없어 계산할 수 없습니다."
+        # 3. 오전 8시 기준 실현 손익
+        today_pnl = state["today_pnl"]
+        pnl_icon = "📈" if today_pnl >= 0 else "📉"
+        pnl_text = f"{pnl_icon} `{today_pnl:,.2f}` KRW"
 
         # 4. 슬랙 메시지 전송
         say(
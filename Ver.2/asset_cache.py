@@ -0,0 +1,160 @@
+# asset_cache.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class AssetCache:
+    def __init__(self, fetch_fn, path: str = os.path.join("cache", "asset_status.json"), ttl_seconds: float = 6 * 3600, max_entries: int = 512):
+        """
+        출금 수수료와 입출금 상태를 디스크에 보관하는 LRU 캐시
+        fetch_fn(symbol)은 python_bithumb.get_asset_status와 같은 형태의 dict를 반환해야 합니다.
+        """
+        self.fetch_fn = fetch_fn
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # symbol -> 항목 (가장 최근에 쓴 항목이 뒤쪽)
+        self.lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+        self.load()
+
+    def load(self):
+        """디스크에 저장된 캐시를 읽어옵니다."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[캐시 경고] 자산 캐시를 읽지 못했습니다: {e}")
+            return
+        with self.lock:
+            for symbol, entry in sorted(stored.items(), key=lambda item: item[1].get("used_at", 0)):
+                self.entries[symbol] = entry
+            self._evict()
+
+    def save(self):
+        """캐시를 디스크에 저장합니다. (임시 파일에 쓴 뒤 교체)"""
+        with self.lock:
+            snapshot = dict(self.entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, entry: dict, now: float = None) -> bool:
+        """항목이 TTL 안에 있는지 확인"""
+        now = time.time() if now is None else now
+        return now - entry.get("updated_at", 0) < self.ttl_seconds
+
+    def get(self, symbol: str, refresh: bool = True) -> dict or None:
+        """심볼의 자산 정보를 반환합니다. 만료되었으면 refresh=True일 때 새로 조회합니다."""
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if entry is not None:
+                self.entries.move_to_end(symbol)
+                entry["used_at"] = time.time()
+        if entry is not None and (self.is_fresh(entry) or not refresh):
+            return entry
+        return self.refresh(symbol) if refresh else None
+
+    def refresh(self, symbol: str) -> dict or None:
+        """API로 자산 정보를 다시 조회해 캐시에 넣습니다. 실패하면 기존(만료된) 항목을 반환합니다."""
+        try:
+            asset_info = self.fetch_fn(symbol)
+        except Exception as e:
+            print(f"[캐시 경고] {symbol} 자산 정보 조회 실패: {e}")
+            asset_info = None
+
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if not asset_info:
+                return entry
+            now = time.time()
+            entry = dict(entry or {})
+            entry.update({
+                "withdrawal_fee": float(asset_info.get("withdrawal_fee", 0) or 0),
+                "deposit_status": asset_info.get("deposit_status"),
+                "withdrawal_status": asset_info.get("withdrawal_status"),
+                "updated_at": now,
+                "used_at": now,
+            })
+            self.entries[symbol] = entry
+            self.entries.move_to_end(symbol)
+            self._evict()
+            return entry
+
+    def ensure(self, symbols: list):
+        """목록 중 캐시에 없거나 만료된 심볼만 조회하고, 바뀐 내용이 있으면 저장합니다."""
+        with self.lock:
+            stale = [s for s in symbols if s not in self.entries or not self.is_fresh(self.entries[s])]
+        for symbol in stale:
+            self.refresh(symbol)
+        if stale:
+            self.save()
+
+    def update_prices(self, prices: dict):
+        """원화 환산에 사용한 가격을 {심볼: 가격} 형태로 기록합니다."""
+        now = time.time()
+        with self.lock:
+            for symbol, price in prices.items():
+                entry = self.entries.get(symbol)
+                if entry is not None and price:
+                    entry["price"] = float(price)
+                    entry["price_at"] = now
+
+    def withdrawal_fees_krw(self, symbols: list, prices=None) -> np.ndarray:
+        """
+        심볼별 출금 수수료의 원화 가치를 배열로 반환합니다. (네트워크 요청 없음)
+        prices를 주지 않으면 마지막으로 기록된 가격을 사용하고, 모르는 값은 NaN입니다.
+        """
+        fees = np.full(len(symbols), np.nan)
+        cached_prices = np.full(len(symbols), np.nan)
+        with self.lock:
+            for i, symbol in enumerate(symbols):
+                entry = self.entries.get(symbol)
+                if entry is not None:
+                    fees[i] = entry.get("withdrawal_fee", np.nan)
+                    cached_prices[i] = entry.get("price") or np.nan
+        prices = cached_prices if prices is None else np.asarray(prices, dtype=float)
+        return fees * prices
+
+    def start_background_refresh(self, interval_seconds: float = 600):
+        """만료가 가까운 항목을 주기적으로 갱신하는 백그라운드 스레드를 시작합니다."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(interval_seconds,), daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        """백그라운드 갱신을 멈춥니다."""
+        self._stop_event.set()
+
+    def _refresh_loop(self, interval_seconds: float):
+        while not self._stop_event.wait(interval_seconds):
+            now = time.time()
+            with self.lock:
+                # TTL의 80%가 지난 항목을 미리 갱신
+                expiring = [s for s, e in self.entries.items() if now - e.get("updated_at", 0) > self.ttl_seconds * 0.8]
+            for symbol in expiring:
+                if self._stop_event.is_set():
+                    break
+                self.refresh(symbol)
+            if expiring:
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"[캐시 경고] 자산 캐시 저장 실패: {e}")
+
+    def _evict(self):
+        """최대 개수를 넘으면 가장 오래 쓰지 않은 항목부터 제거"""
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,206 @@
+# backtester.py
+import numpy as np
+import pandas as pd
+from candlestick_trader import evaluate_arrays, SR_WINDOW, PROXIMITY
+from candle_store import from_frame
+from trade_manager import is_stop_loss_hit
+
+FEE_RATE = 0.0025 # 빗썸 거래 수수료 (0.25%)
+MIN_ORDER_KRW = 5000 # 최소 주문 금액
+DEFAULT_CAPITAL_ALLOC = {"primary": 0.7, "secondary": 0.3} # main.py와 같은 자금 배분
+SCAN_MINUTE_OF_DAY = 9 * 60 + 5 # 매일 종목을 새로 선정하는 시각 (09:05)
+
+class BacktestResult:
+    def __init__(self, trades: pd.DataFrame, equity: pd.Series, initial_krw: float):
+        """백테스트 결과 (거래 내역, 자산 곡선)"""
+        self.trades = trades
+        self.equity = equity
+        self.initial_krw = initial_krw
+
+    def summary(self) -> dict:
+        """총 수익률, 최대 낙폭, 거래 횟수, 승률 요약"""
+        final_equity = self.equity.iloc[-1] if len(self.equity) else self.initial_krw
+        if len(self.equity):
+            running_max = np.maximum.accumulate(self.equity.to_numpy())
+            max_drawdown = float(((self.equity.to_numpy() - running_max) / running_max).min() * 100)
+        else:
+            max_drawdown = 0.0
+        closed = self.trades[self.trades['exit_time'].notna()] if len(self.trades) else self.trades
+        win_rate = float((closed['pnl'] > 0).mean() * 100) if len(closed) else 0.0
+        return {
+            "final_equity": float(final_equity),
+            "total_return_percent": float((final_equity / self.initial_krw - 1) * 100),
+            "max_drawdown_percent": max_drawdown,
+            "total_trades": int(len(closed)),
+            "win_rate": win_rate,
+            "stop_loss_count": int((closed['reason'] == "stop_loss").sum()) if len(closed) else 0,
+        }
+
+class Backtester:
+    def __init__(self, candles: dict, tickers: dict = None, capital_alloc: dict = None, initial_krw: float = 1_000_000,
+                 stop_loss_percent: float = 1.5, fee_rate: float = FEE_RATE, min_order_krw: float = MIN_ORDER_KRW,
+                 window: int = SR_WINDOW, proximity: float = PROXIMITY, selections: dict = None):
+        """
+        저장된 캔들을 main.py 매매 루프와 같은 규칙으로 재생하는 이벤트 기반 백테스터
+        candles: {종목: 캔들 DataFrame 또는 구조화 배열}
+        tickers: {포지션 이름: 종목} (예: {"primary": "KRW-XRP", "secondary": "KRW-ETH"})
+        selections: {날짜: {포지션 이름: 종목}} - 주면 main.py처럼 매일 09:05에 종목을 교체합니다.
+        """
+        self.candles = {ticker: data if isinstance(data, np.ndarray) else from_frame(data) for ticker, data in candles.items()}
+        self.tickers = tickers or {}
+        self.capital_alloc = capital_alloc or DEFAULT_CAPITAL_ALLOC
+        self.initial_krw = initial_krw
+        self.stop_loss_percent = stop_loss_percent
+        self.fee_rate = fee_rate
+        self.min_order_krw = min_order_krw
+        self.window = window
+        self.proximity = proximity
+        self.selections = None
+        if selections is not None:
+            self.selections = {np.datetime64(pd.Timestamp(day), "D"): chosen for day, chosen in selections.items()}
+
+    @classmethod
+    def from_store(cls, store, tickers: dict, interval: str = "minute15", **kwargs):
+        """캔들 저장소에 쌓인 데이터로 백테스터를 만듭니다. (네트워크 요청 없음)"""
+        candles = {ticker: store.read_array(ticker, interval) for ticker in set(tickers.values()) if ticker}
+        return cls(candles, tickers, **kwargs)
+
+    def run(self) -> BacktestResult:
+        """모든 캔들을 시간순으로 재생하고 거래 내역과 자산 곡선을 반환합니다."""
+        series = self._prepare_series()
+        if not series:
+            return BacktestResult(self._trades_frame([]), pd.Series(dtype=float), self.initial_krw)
+
+        timeline = np.unique(np.concatenate([s["ts"] for s in series.values()]))
+        for s in series.values():
+            # 타임라인의 각 시점에 해당하는 캔들 위치 (캔들이 없으면 -1)
+            rows = np.minimum(np.searchsorted(s["ts"], timeline), len(s["ts"]) - 1)
+            s["rows"] = np.where(s["ts"][rows] == timeline, rows, -1)
+
+        times = timeline.astype("datetime64[ns]")
+        days = times.astype("datetime64[D]")
+        minutes_of_day = (times - days).astype("timedelta64[m]").astype(int)
+        selection_day = None
+
+        slot_names = list(self.capital_alloc) if self.selections is not None else list(self.tickers)
+        slots = [{
+            "name": name, "ticker": self.tickers.get(name), "alloc": self.capital_alloc.get(name, 0.0),
+            "in_position": False, "purchase_price": 0.0, "volume": 0.0, "invested": 0.0,
+            "entry_time": None, "last_price": 0.0,
+        } for name in slot_names]
+
+        cash = float(self.initial_krw)
+        equity = np.empty(len(timeline))
+        trades = []
+
+        for k in range(len(timeline)):
+            # --- 매일 오전 9시 5분, 주/부종목 교체 ---
+            if self.selections is not None and days[k] != selection_day and minutes_of_day[k] >= SCAN_MINUTE_OF_DAY:
+                selection_day = days[k]
+                chosen = self.selections.get(selection_day, {})
+                for slot in slots:
+                    new_ticker = chosen.get(slot["name"])
+                    if slot["in_position"] and new_ticker != slot["ticker"]:
+                        # 실거래 루프는 보유 코인을 지갑에 남겨두지만, 백테스트에서는 교체 시점 가격으로 정리
+                        cash += self._close_position(slot, timeline[k], slot["last_price"], "rotation", trades)
+                    slot["ticker"] = new_ticker
+
+            for slot in slots:
+                s = series.get(slot["ticker"])
+                if s is None:
+                    continue
+                i = s["rows"][k]
+                if i < 0:
+                    continue
+                current_price = s["close"][i]
+                slot["last_price"] = current_price
+
+                if slot["in_position"]:
+                    # 손절매가 전략 매도보다 우선
+                    if is_stop_loss_hit(current_price, slot["purchase_price"], self.stop_loss_percent):
+                        cash += self._close_position(slot, timeline[k], current_price, "stop_loss", trades)
+                    elif s["decision"][i] == -1:
+                        cash += self._close_position(slot, timeline[k], current_price, "sell", trades)
+                elif s["decision"][i] == 1:
+                    investment_amount = cash * slot["alloc"] # 할당된 자금 비율만큼만 투자
+                    if investment_amount > self.min_order_krw:
+                        cash -= investment_amount
+                        slot.update({
+                            "in_position": True,
+                            "purchase_price": current_price,
+                            "volume": investment_amount * (1 - self.fee_rate) / current_price,
+                            "invested": investment_amount,
+                            "entry_time": timeline[k],
+                        })
+
+            equity[k] = cash + sum(slot["volume"] * slot["last_price"] for slot in slots if slot["in_position"])
+
+        # 끝까지 보유 중인 포지션은 청산하지 않고 미실현 상태로 기록
+        for slot in slots:
+            if slot["in_position"]:
+                trades.append(self._trade_record(slot, None, slot["last_price"], "open"))
+
+        index = pd.DatetimeIndex(times)
+        return BacktestResult(self._trades_frame(trades), pd.Series(equity, index=index, name="equity"), self.initial_krw)
+
+    def _prepare_series(self) -> dict:
+        """사용되는 종목마다 캔들 배열과 전체 구간의 매매 신호를 미리 계산합니다."""
+        used = set(self.tickers.values())
+        if self.selections is not None:
+            used |= {ticker for chosen in self.selections.values() for ticker in chosen.values()}
+
+        series = {}
+        for ticker in used:
+            arr = self.candles.get(ticker) if ticker else None
+            if arr is None or len(arr) < 3:
+                continue
+            series[ticker] = {
+                "ts": np.asarray(arr["ts"]),
+                "close": np.asarray(arr["close"], dtype=float),
+                "decision": evaluate_arrays(arr["open"], arr["high"], arr["low"], arr["close"], self.window, self.proximity)["decision"],
+            }
+        return series
+
+    def _close_position(self, slot: dict, ts, price: float, reason: str, trades: list) -> float:
+        """포지션을 전량 매도하고 수수료를 뺀 매도 대금을 반환합니다."""
+        proceeds = slot["volume"] * price * (1 - self.fee_rate)
+        trades.append(self._trade_record(slot, ts, price, reason, proceeds))
+        slot.update({"in_position": False, "purchase_price": 0.0, "volume": 0.0, "invested": 0.0, "entry_time": None})
+        return proceeds
+
+    def _trade_record(self, slot: dict, exit_ts, exit_price: float, reason: str, proceeds: float = None) -> dict:
+        if proceeds is None:
+            proceeds = slot["volume"] * exit_price * (1 - self.fee_rate)
+        pnl = proceeds - slot["invested"]
+        return {
+            "position": slot["name"],
+            "ticker": slot["ticker"],
+            "entry_time": pd.Timestamp(int(slot["entry_time"])),
+            "exit_time": pd.Timestamp(int(exit_ts)) if exit_ts is not None else pd.NaT,
+            "entry_price": slot["purchase_price"],
+            "exit_price": exit_price,
+            "volume": slot["volume"],
+            "invested": slot["invested"],
+            "pnl": pnl,
+            "pnl_percent": pnl / slot["invested"] * 100 if slot["invested"] else 0.0,
+            "reason": reason,
+        }
+
+    def _trades_frame(self, trades: list) -> pd.DataFrame:
+        columns = ["position", "ticker", "entry_time", "exit_time", "entry_price", "exit_price",
+                   "volume", "invested", "pnl", "pnl_percent", "reason"]
+        return pd.DataFrame(trades, columns=columns)
+
+if __name__ == "__main__":
+    import bithumb_transport
+    from candle_store import shared_store
+    bithumb_transport.install()
+
+    # 저장소에 쌓인 15분봉으로 주/부종목 전략을 재생
+    tickers = {"primary": "KRW-BTC", "secondary": "KRW-ETH"}
+    for ticker in tickers.values():
+        shared_store.backfill(ticker, "minute15", count=2000)
+
+    result = Backtester.from_store(shared_store, tickers, interval="minute15").run()
+    print(result.trades.tail(10).to_string())
+    print(result.summary())
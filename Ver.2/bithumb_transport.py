@@ -0,0 +1,174 @@
+# bithumb_transport.py
+# Code/bithumb_transport.py에 사본이 있음 (차단기 없음, timeout 10초) - 공통 부분을 고치면 Code 쪽도 같이 고칠 것
+import threading
+import time
+from contextlib import nullcontext
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import RateLimiter
+from circuit_breaker import breakers, CircuitOpenError
+
+# 빗썸 API 요청 한도 (초당): Public 150회, Private 140회
+PUBLIC_LIMIT = 150
+PRIVATE_LIMIT = 140
+# 엔드포인트별 동시 요청 수 상한 (/v1/ 다음 첫 경로 기준, 없으면 DEFAULT_CONCURRENCY)
+ENDPOINT_CONCURRENCY = {
+    "/v1/orders": 4, # 주문 접수/목록
+    "/v1/order": 8, # 개별 주문 조회/취소
+    "/v1/accounts": 4,
+    "/v1/candles": 16,
+}
+DEFAULT_CONCURRENCY = 32
+# 차단기가 열려 있어도 보내는 요청 (손절 매도 같은 청산 주문은 빠르게 실패시키지 않고 끝까지 시도)
+# 주문 접수/취소뿐 아니라, 응답을 잃은 주문의 접수 여부 확인(GET /v1/orders)과 체결 확인(GET /v1/order)도 포함
+# (확인이 막히면 주문이 unknown으로 끝나거나 체결을 영영 모르게 됨)
+ALWAYS_SEND = {("POST", "/v1/orders"), ("DELETE", "/v1/order"), ("GET", "/v1/orders"), ("GET", "/v1/order")}
+
+class BithumbTransport:
+    def __init__(self, public_limit: float = PUBLIC_LIMIT, private_limit: float = PRIVATE_LIMIT, headroom: float = 0.9,
+                 pool_size: int = 32, timeout: float = 5.0, max_throttle_retries: int = 2, endpoint_limits: dict = None):
+        """
+        빗썸 HTTP 요청을 모두 거치게 하는 공용 전송 계층
+        - requests.Session 하나로 연결을 재사용합니다. (요청마다 TLS 연결을 새로 맺지 않음)
+        - Public/Private 요청은 각자 토큰 버킷으로 한도 안에서 보냅니다.
+          초당 limit×headroom개를 채우고 버스트는 나머지 몫만 허용해, 어떤 1초 구간에서도 한도를 넘지 않습니다.
+        - 엔드포인트별로 동시에 나가는 요청 수를 제한합니다. (주문 API에 요청이 몰리지 않게)
+        - 그래도 429를 받으면 Retry-After(없으면 짧은 대기)만큼 쉬고 max_throttle_retries번까지 다시 보냅니다.
+        - 요청마다 timeout초까지만 기다리고, 연결 오류/시간 초과/5xx/계속되는 429는 bithumb_public/bithumb_private 차단기에 기록합니다.
+          차단기가 열리면 주문 접수/취소/확인(ALWAYS_SEND)을 뺀 요청은 보내지 않고 바로 CircuitOpenError를 냅니다.
+        """
+        self.timeout = timeout
+        self.max_throttle_retries = max_throttle_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiters = {
+            "public": RateLimiter(public_limit * headroom, burst=max(1, int(public_limit * (1 - headroom)))),
+            "private": RateLimiter(private_limit * headroom, burst=max(1, int(private_limit * (1 - headroom)))),
+        }
+        self.endpoint_limits = dict(ENDPOINT_CONCURRENCY if endpoint_limits is None else endpoint_limits)
+        self.semaphores = {}
+        self.lock = threading.Lock()
+        self.counts = {"public": 0, "private": 0, "throttled": 0, "errors": 0}
+
+    # --- requests 모듈과 같은 형태 (python_bithumb이 그대로 호출) ---
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kind = "private" if "Authorization" in (kwargs.get("headers") or {}) else "public"
+        endpoint = endpoint_key(url)
+        breaker = breakers[f"bithumb_{kind}"]
+        if (method.upper(), endpoint) not in ALWAYS_SEND and not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+        kwargs.setdefault("timeout", self.timeout)
+        with self._semaphore(endpoint):
+            for attempt in range(self.max_throttle_retries + 1):
+                self.limiters[kind].acquire()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except Exception:
+                    self._count("errors")
+                    breaker.record_failure()
+                    raise
+                self._count(kind)
+                if response.status_code != 429 or attempt == self.max_throttle_retries:
+                    if response.status_code >= 500 or response.status_code == 429:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success() # 4xx(잔고 부족 등)는 거래소가 정상 응답한 것
+                    return response
+                self._count("throttled")
+                wait = _retry_after(response, default=0.2 * (attempt + 1))
+                print(f"[전송 경고] 빗썸 요청 한도 초과(429), {wait:.1f}초 뒤 다시 보냅니다: {method} {urlparse(url).path}")
+                time.sleep(wait)
+        return response
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url: str, data=None, **kwargs) -> requests.Response:
+        return self.request("POST", url, data=data, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> dict:
+        """지금까지 보낸 요청 수 {"public", "private", "throttled", "errors"}"""
+        with self.lock:
+            return dict(self.counts)
+
+    def close(self):
+        self.session.close()
+
+    def _semaphore(self, endpoint: str):
+        limit = self.endpoint_limits.get(endpoint, DEFAULT_CONCURRENCY)
+        if limit <= 0:
+            return nullcontext()
+        with self.lock:
+            if endpoint not in self.semaphores:
+                self.semaphores[endpoint] = threading.BoundedSemaphore(limit)
+            return self.semaphores[endpoint]
+
+    def _count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+class _RequestsShim:
+    """python_bithumb 모듈 안의 requests 자리에 넣는 객체 (get/request/delete만 전송 계층으로, 나머지는 원래 requests)"""
+    def __init__(self, transport: BithumbTransport):
+        self.transport = transport
+
+    def get(self, url, params=None, **kwargs):
+        return self.transport.get(url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.transport.post(url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.transport.delete(url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        return self.transport.request(method, url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+def endpoint_key(url: str) -> str:
+    """URL에서 동시성 제한에 쓰는 엔드포인트 이름 ("/v1/candles/minutes/15" → "/v1/candles")"""
+    parts = urlparse(url).path.split("/")
+    return "/".join(parts[:3])
+
+def _retry_after(response, default: float) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
+
+shared_transport = BithumbTransport()
+_install_lock = threading.Lock()
+
+def install(transport: BithumbTransport = None) -> BithumbTransport:
+    """
+    python_bithumb의 모든 HTTP 호출(공개 시세, Bithumb 클래스의 주문/잔고)이 transport를 거치게 합니다.
+    여러 번 불러도 되며, 라이브러리 함수 호출부는 그대로 둡니다.
+    실행 파일(main.py, app.py 등)에서만 부릅니다. 라이브러리 모듈은 import만으로 HTTP 경로를 바꾸지 않도록
+    부르지 말고, 전송 계층이 필요하면 shared_transport를 직접 씁니다. (universe_snapshot.py처럼)
+    """
+    transport = transport or shared_transport
+    try:
+        from python_bithumb import public_api, private_api
+    except ImportError as e:
+        print(f"[전송 경고] python_bithumb 구조가 달라 공용 전송 계층을 적용하지 못했습니다: {e}")
+        return transport
+    with _install_lock:
+        public_api.requests = _RequestsShim(transport)
+        private_api.requests = _RequestsShim(transport)
+    return transport
+
+if __name__ == "__main__":
+    import python_bithumb
+    install()
+    started = time.monotonic()
+    for _ in range(20):
+        python_bithumb.get_current_price("KRW-BTC")
+    print(f"현재가 20회 조회: {time.monotonic() - started:.2f}초 (연결 재사용), 요청 수: {shared_transport.stats()}")
@@ -0,0 +1,102 @@
+# candle_scheduler.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from candle_store import candle_start, next_candle_boundary
+
+class CandleScheduler:
+    def __init__(self, interval: str = "minute15", settle_seconds: float = 3.0, max_workers: int = 4, history: int = 96):
+        """
+        캔들 마감 시각에 맞춰 매매 사이클을 깨우는 스케줄러
+        마감 시각 + settle_seconds(거래소 집계 대기)에 깨어나 포지션별 작업을 동시에 실행하고,
+        캔들 마감부터 판단 완료까지 걸린 시간(지연)을 기록합니다.
+        """
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.last_boundary = None
+        self.lags = deque(maxlen=history) # (캔들 마감 시각, 작업 이름, 지연 초)
+        self.closed = {} # 캔들 마감 시각 -> 마감 이벤트를 받은 종목
+        self.condition = threading.Condition()
+
+    def wait_for_next_close(self, expected=()) -> datetime:
+        """
+        아직 처리하지 않은 가장 최근 캔들 마감 시각(+대기 시간)까지 잠든 뒤 그 마감 시각을 반환합니다.
+        첫 호출은 직전에 마감된 캔들을 바로 처리하고, 사이클이 길어져 마감을 놓쳤다면 밀린 캔들은 건너뜁니다.
+        expected 종목의 마감 이벤트(notify_closed)가 모두 오면 대기 시간이 끝나기 전에 바로 깨어납니다.
+        """
+        now = datetime.now()
+        boundary = candle_start(self.interval, now)
+        settle = timedelta(seconds=self.settle_seconds)
+        if self.last_boundary is not None and boundary <= self.last_boundary:
+            boundary = next_candle_boundary(self.interval, now)
+        time.sleep(max(0.0, (boundary - datetime.now()).total_seconds()))
+
+        expected = {ticker for ticker in expected if ticker}
+        with self.condition:
+            self.condition.wait_for(
+                lambda: expected and expected <= self.closed.get(boundary, set()),
+                timeout=max(0.0, (boundary + settle - datetime.now()).total_seconds()),
+            )
+            for old in [b for b in self.closed if b <= boundary]:
+                del self.closed[old]
+        self.last_boundary = boundary
+        return boundary
+
+    def notify_closed(self, ticker: str, boundary: datetime):
+        """스트림에서 ticker의 캔들이 boundary에 마감됐음을 알립니다."""
+        with self.condition:
+            self.closed.setdefault(boundary, set()).add(ticker)
+            self.condition.notify_all()
+
+    def run_concurrently(self, jobs: dict, boundary: datetime, timeout: float = None) -> dict:
+        """
+        {작업 이름: 인자 없는 함수}를 동시에 실행하고 {작업 이름: 결과}를 반환합니다.
+        실패한 작업은 오류를 출력하고 결과를 None으로 둡니다.
+        timeout초가 지나도 끝나지 않은 작업은 기다리지 않고 None으로 둡니다. (작업은 뒤에서 마저 실행됨)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        futures = {name: self.executor.submit(self._timed, name, fn, boundary) for name, fn in jobs.items()}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                print(f"[스케줄러 경고] {name} 작업이 {timeout:.1f}초 안에 끝나지 않아 기다리지 않고 넘어갑니다.")
+                results[name] = None
+            except Exception as e:
+                print(f"[스케줄러 오류] {name} 작업 실패: {e}")
+                results[name] = None
+        return results
+
+    def lag_stats(self) -> dict:
+        """최근 기록된 캔들 마감 → 판단 완료 지연(초) 통계"""
+        if not self.lags:
+            return {"count": 0, "last": None, "mean": None, "p95": None, "max": None}
+        lags = np.array([lag for _, _, lag in self.lags])
+        return {
+            "count": len(lags),
+            "last": float(lags[-1]),
+            "mean": float(lags.mean()),
+            "p95": float(np.percentile(lags, 95)),
+            "max": float(lags.max()),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _timed(self, name: str, fn, boundary: datetime):
+        try:
+            return fn()
+        finally:
+            self.lags.append((boundary, name, (datetime.now() - boundary).total_seconds()))
+
+def closed_candles(df: pd.DataFrame, boundary: datetime) -> pd.DataFrame or None:
+    """boundary 이전에 마감된 캔들만 남깁니다. (마지막 진행 중 캔들 제외)"""
+    if df is None:
+        return None
+    return df[df.index < pd.Timestamp(boundary)]
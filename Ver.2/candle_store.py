@@ -0,0 +1,248 @@
+# candle_store.py
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import python_bithumb
+
+# 캔들 하나의 길이(초). 월봉처럼 길이가 일정하지 않으면 None
+INTERVAL_SECONDS = {
+    "minute1": 60, "minute3": 180, "minute5": 300, "minute10": 600,
+    "minute15": 900, "minute30": 1800, "minute60": 3600, "hour": 3600,
+    "minute240": 14400, "day": 86400, "week": 604800, "month": None,
+}
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+CANDLE_DTYPE = np.dtype([("ts", "i8")] + [(col, "f8") for col in OHLCV_COLUMNS])
+
+class CandleStore:
+    def __init__(self, root: str = os.path.join("data", "candles"), fetch_fn=None, max_gap_fetch: int = 5000):
+        """
+        (종목, 캔들 간격)별 OHLCV를 .npy 구조화 배열로 디스크에 쌓아두는 캔들 저장소
+        마지막으로 저장된 캔들 이후의 데이터만 새로 받아오고, 원하는 개수만큼 잘라서 돌려줍니다.
+        """
+        self.root = root
+        self.fetch_fn = fetch_fn or python_bithumb.get_ohlcv
+        self.max_gap_fetch = max_gap_fetch # 한 번에 메울 최대 공백 캔들 수
+        self.arrays = {} # (ticker, interval) -> 메모리에 올라온 배열
+        self.locks = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200) -> pd.DataFrame or None:
+        """python_bithumb.get_ohlcv와 같은 형태의 DataFrame을 반환하되, 새 캔들만 네트워크로 받아옵니다."""
+        key = (ticker, interval)
+        with self._lock_for(key):
+            arr = self._load(key)
+            new, is_contiguous = self._fetch_new(ticker, interval, count, arr)
+            if new is not None and len(new) > 0:
+                arr = merge_candles(arr, new) if is_contiguous else new
+                self._save(key, arr)
+            if len(arr) == 0:
+                return None
+            return to_frame(arr[-count:])
+
+    def get_resampled(self, ticker: str, intervals, count: int = 200, source: str = "minute5") -> dict:
+        """
+        source 캔들만 한 번 받아와 intervals의 각 간격 캔들을 로컬에서 묶어 반환합니다. {간격: DataFrame}
+        저장된 이력이 부족해 count개를 채우지 못한 간격은 결과에서 빠지므로, 호출하는 쪽에서 직접 요청해야 합니다.
+        """
+        source_seconds = INTERVAL_SECONDS[source]
+        ratios = {}
+        for interval in intervals:
+            seconds = INTERVAL_SECONDS.get(interval)
+            if not seconds or seconds > 86400 or seconds % source_seconds:
+                raise ValueError(f"{source} 캔들로 {interval} 캔들을 만들 수 없습니다.")
+            ratios[interval] = seconds // source_seconds
+
+        # 가장 긴 간격 기준으로 필요한 source 캔들 수 (첫 구간이 잘릴 수 있어 한 구간 더)
+        needed = (count + 1) * max(ratios.values(), default=1)
+        if len(self.read_array(ticker, source)) < needed:
+            self.backfill(ticker, source, needed)
+        base = self.get_ohlcv(ticker, source, count=needed)
+        if base is None:
+            return {}
+        base = from_frame(base)
+
+        frames = {}
+        for interval in intervals:
+            arr = base if ratios[interval] == 1 else resample_candles(base, interval)
+            if len(arr) >= count:
+                frames[interval] = to_frame(arr[-count:])
+        return frames
+
+    def ingest(self, ticker: str, interval: str, candles: np.ndarray) -> bool:
+        """
+        스트림 등 외부에서 만든 마감 캔들을 저장소에 합칩니다. (네트워크 요청 없음)
+        저장된 마지막 캔들과 이어지지 않으면 합치지 않고 False를 반환합니다. (다음 get_ohlcv가 공백을 메움)
+        """
+        if len(candles) == 0:
+            return False
+        key = (ticker, interval)
+        seconds = INTERVAL_SECONDS.get(interval)
+        with self._lock_for(key):
+            arr = self._load(key)
+            if len(arr) == 0 or not seconds or arr["ts"][-1] < candles["ts"][0] - seconds * 1_000_000_000:
+                return False
+            self._save(key, merge_candles(arr, candles))
+            return True
+
+    def backfill(self, ticker: str, interval: str, count: int, chunk: int = 200) -> int:
+        """
+        저장된 가장 오래된 캔들 이전 구간을 거슬러 올라가며 count개가 될 때까지 채웁니다. (백테스트용)
+        저장된 캔들 개수를 반환합니다.
+        """
+        key = (ticker, interval)
+        with self._lock_for(key):
+            arr = self._load(key)
+            if len(arr) == 0:
+                arr = from_frame(self.fetch_fn(ticker, interval=interval, count=chunk))
+                if arr is None:
+                    return 0
+            while len(arr) < count:
+                oldest = pd.Timestamp(int(arr["ts"][0]))
+                older = from_frame(self.fetch_fn(ticker, interval=interval, count=chunk, to=oldest.strftime("%Y-%m-%d %H:%M:%S")))
+                if older is None:
+                    break
+                older = older[older["ts"] < arr["ts"][0]]
+                if len(older) == 0:
+                    break # 더 이상 과거 데이터가 없음
+                arr = np.concatenate([older[np.unique(older["ts"], return_index=True)[1]], arr])
+                print(f"[캔들 저장소] {ticker} {interval}: {len(arr)}개 확보 ({pd.Timestamp(int(arr['ts'][0]))} 부터)")
+            if len(arr) > 0:
+                self._save(key, arr)
+            return len(arr)
+
+    def read(self, ticker: str, interval: str, count: int = None) -> pd.DataFrame or None:
+        """네트워크 요청 없이 저장된 캔들만 반환합니다."""
+        arr = self.read_array(ticker, interval, count)
+        return to_frame(arr) if len(arr) > 0 else None
+
+    def read_array(self, ticker: str, interval: str, count: int = None) -> np.ndarray:
+        """저장된 캔들을 구조화 배열 그대로 반환합니다. (백테스트 등 대량 처리용)"""
+        key = (ticker, interval)
+        with self._lock_for(key):
+            arr = self._load(key)
+        return arr if count is None else arr[-count:]
+
+    def _fetch_new(self, ticker: str, interval: str, count: int, arr: np.ndarray) -> (np.ndarray or None, bool):
+        """
+        저장된 마지막 캔들 이후 데이터만 받아옵니다. (마지막 캔들은 진행 중일 수 있어 다시 받음)
+        (새 캔들 배열, 기존 배열과 이어지는지 여부)를 반환합니다.
+        """
+        if len(arr) < count:
+            return from_frame(self.fetch_fn(ticker, interval=interval, count=count)), True
+
+        last_ts = arr["ts"][-1]
+        seconds = INTERVAL_SECONDS.get(interval)
+        if seconds:
+            elapsed = (pd.Timestamp.now().value - last_ts) / 1e9
+            n = max(2, int(elapsed // seconds) + 2)
+        else:
+            n = 2
+
+        # 받아온 구간이 저장된 마지막 캔들과 이어지지 않으면 더 넓게 다시 요청
+        while True:
+            new = from_frame(self.fetch_fn(ticker, interval=interval, count=n))
+            if new is None or len(new) == 0 or new["ts"][0] <= last_ts or len(new) < n:
+                return new, True
+            if n >= self.max_gap_fetch:
+                print(f"[캔들 저장소] {ticker} {interval}: 공백이 너무 커서 저장된 캔들을 새로 받은 캔들로 교체합니다.")
+                return new, False
+            n = min(n * 4, self.max_gap_fetch)
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._locks_guard:
+            return self.locks[key]
+
+    def _path(self, key) -> str:
+        ticker, interval = key
+        return os.path.join(self.root, f"{ticker}_{interval}.npy")
+
+    def _load(self, key) -> np.ndarray:
+        arr = self.arrays.get(key)
+        if arr is not None:
+            return arr
+        path = self._path(key)
+        if os.path.exists(path):
+            arr = np.load(path, mmap_mode="r")
+        else:
+            arr = np.empty(0, dtype=CANDLE_DTYPE)
+        self.arrays[key] = arr
+        return arr
+
+    def _save(self, key, arr: np.ndarray):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, arr)
+        os.replace(tmp_path, path)
+        self.arrays[key] = arr
+
+def candle_start(interval: str, now: datetime = None) -> datetime:
+    """now가 속한 캔들의 시작 시각 (빗썸 캔들처럼 현지 자정 기준으로 정렬, 일봉 이상은 하루 단위)"""
+    now = now or datetime.now()
+    seconds = min(INTERVAL_SECONDS.get(interval) or 86400, 86400)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (now - midnight).total_seconds()
+    return midnight + timedelta(seconds=elapsed // seconds * seconds)
+
+def next_candle_boundary(interval: str, now: datetime = None) -> datetime:
+    """now 이후 처음으로 새 캔들이 시작되는 시각"""
+    seconds = min(INTERVAL_SECONDS.get(interval) or 86400, 86400)
+    return candle_start(interval, now) + timedelta(seconds=seconds)
+
+def from_frame(df: pd.DataFrame) -> np.ndarray or None:
+    """get_ohlcv DataFrame을 시간순으로 정렬된 구조화 배열로 변환합니다."""
+    if df is None:
+        return None
+    arr = np.empty(len(df), dtype=CANDLE_DTYPE)
+    arr["ts"] = pd.DatetimeIndex(df.index).values.astype("datetime64[ns]").astype("i8")
+    for col in OHLCV_COLUMNS:
+        arr[col] = df[col].to_numpy(dtype=float) if col in df else np.nan
+    arr.sort(order="ts")
+    return arr
+
+def to_frame(arr: np.ndarray) -> pd.DataFrame:
+    """구조화 배열을 get_ohlcv와 같은 모양의 DataFrame으로 변환합니다. (항상 복사본)"""
+    index = pd.DatetimeIndex(np.asarray(arr["ts"]).astype("datetime64[ns]"))
+    return pd.DataFrame({col: np.array(arr[col]) for col in OHLCV_COLUMNS}, index=index)
+
+def resample_candles(arr: np.ndarray, interval: str) -> np.ndarray:
+    """
+    더 짧은 간격의 캔들 배열을 interval 캔들로 묶습니다.
+    시가=첫 캔들 시가, 고가=최대, 저가=최소, 종가=마지막 캔들 종가, 거래량/거래대금=합계
+    첫 구간은 캔들 시작 시각부터 데이터가 있을 때만 남깁니다. (앞부분이 잘린 불완전한 캔들 제외)
+    """
+    seconds = INTERVAL_SECONDS.get(interval)
+    if not seconds or seconds > 86400:
+        raise ValueError(f"{interval} 캔들로는 묶을 수 없습니다.")
+    if len(arr) == 0:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+
+    step = seconds * 1_000_000_000
+    ts = np.asarray(arr["ts"])
+    buckets = ts // step * step # 현지 자정 기준으로 정렬된 캔들 시작 시각
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    out = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    out["ts"] = buckets[starts]
+    out["open"] = arr["open"][starts]
+    out["high"] = np.maximum.reduceat(arr["high"], starts)
+    out["low"] = np.minimum.reduceat(arr["low"], starts)
+    out["close"] = arr["close"][ends]
+    out["volume"] = np.add.reduceat(arr["volume"], starts)
+    out["value"] = np.add.reduceat(arr["value"], starts)
+    return out if ts[0] == buckets[0] else out[1:]
+
+def merge_candles(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """새 캔들 구간으로 기존 배열의 겹치는 부분을 덮어쓰고 중복을 제거합니다."""
+    new = new[np.unique(new["ts"], return_index=True)[1]]
+    if len(old) == 0:
+        return new
+    kept = old[old["ts"] < new["ts"][0]]
+    return np.concatenate([kept, new])
+
+# 모든 전략 모듈이 함께 쓰는 기본 저장소
+shared_store = CandleStore()
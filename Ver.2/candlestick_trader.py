@@ -1,81 +1,182 @@
 # candlestick_trader.py
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SR_WINDOW = 20 # 지지/저항선 계산 구간 (마지막 캔들 포함 N개)
+PROXIMITY = 0.005 # 지지/저항선 근처로 보는 오차 범위 (0.5%)
+
+# 매매 신호별 로그 문구
+SIGNAL_MESSAGES = {
+    "bullish_engulfing": "[신호] 지지선에서 '상승 장악형' 패턴 발생!",
+    "hammer": "[신호] 지지선에서 '망치형' 패턴 발생!",
+    "bearish_engulfing": "[신호] 저항선에서 '하락 장악형' 패턴 발생!",
+    "shooting_star": "[신호] 저항선에서 '유성형' 패턴 발생!",
+}
+
+def rolling_support_resistance(low: np.ndarray, high: np.ndarray, window: int = SR_WINDOW) -> (np.ndarray, np.ndarray):
+    """각 캔들 직전 (window-1)개 캔들의 최저가/최고가를 지지/저항선으로 계산합니다. (이전 캔들이 없으면 NaN)"""
+    n = len(low)
+    lookback = window - 1
+    if lookback <= 0 or n == 0:
+        return np.full(n, np.nan), np.full(n, np.nan)
+
+    # 앞쪽을 ±inf로 채워 i번째 창이 low[i-lookback : i]가 되도록 맞춤
+    padded_low = np.concatenate([np.full(lookback, np.inf), low])
+    padded_high = np.concatenate([np.full(lookback, -np.inf), high])
+    support = sliding_window_view(padded_low, lookback)[:n].min(axis=1)
+    resistance = sliding_window_view(padded_high, lookback)[:n].max(axis=1)
+    support[np.isinf(support)] = np.nan
+    resistance[np.isinf(resistance)] = np.nan
+    return support, resistance
+
+def evaluate_arrays(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = SR_WINDOW, proximity: float = PROXIMITY) -> dict:
+    """
+    모든 캔들에 대해 패턴, 지지/저항선, 최종 매매 판단을 열 단위 연산으로 한 번에 계산합니다.
+    결과는 {컬럼명: 배열} 형태이며 decision은 0(hold), 1(buy), -1(sell)입니다.
+    """
+    open_, high, low, close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+    prev_open = np.concatenate([[np.nan], open_[:-1]])
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+
+    # --- 캔들 패턴 ---
+    # 상승 장악형: 이전 음봉, 현재 양봉이며 현재 캔들이 이전 캔들을 감쌈
+    bullish_engulfing = (prev_open >= prev_close) & (open_ <= close) & (close > prev_open) & (open_ < prev_close)
+    # 하락 장악형: 이전 양봉, 현재 음봉
+    bearish_engulfing = (prev_open <= prev_close) & (open_ >= close) & (open_ > prev_close) & (close < prev_open)
+
+    body_size = np.abs(close - open_)
+    # 망치형: 아래 꼬리가 몸통의 2배보다 길고 윗 꼬리는 매우 짧음
+    hammer = ((open_ - low) > body_size * 2) & ((high - close) < body_size * 0.5)
+    # 유성형: 위 꼬리가 몸통의 2배보다 길고 아래 꼬리는 매우 짧음
+    shooting_star = ((high - open_) > body_size * 2) & ((close - low) < body_size * 0.5)
+
+    # --- 지지/저항선 근접 여부 ---
+    support, resistance = rolling_support_resistance(low, high, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        is_near_support = np.abs(close - support) / support < proximity
+        is_near_resistance = np.abs(close - resistance) / resistance < proximity
+
+    buy = is_near_support & (bullish_engulfing | hammer)
+    sell = ~buy & is_near_resistance & (bearish_engulfing | shooting_star)
+    decision = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+    return {
+        "support": support,
+        "resistance": resistance,
+        "is_near_support": is_near_support,
+        "is_near_resistance": is_near_resistance,
+        "bullish_engulfing": bullish_engulfing,
+        "bearish_engulfing": bearish_engulfing,
+        "hammer": hammer,
+        "shooting_star": shooting_star,
+        "decision": decision,
+    }
+
+def evaluate_latest(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = SR_WINDOW, proximity: float = PROXIMITY) -> dict:
+    """
+    여러 종목의 마지막 캔들만 한 번에 판단합니다. 입력은 (종목 수, 캔들 수) 2차원 배열이며,
+    캔들이 모자란 종목은 앞쪽을 NaN으로 채웁니다. 결과는 evaluate_arrays의 마지막 행과 같은 값을 종목별 1차원 배열로 돌려줍니다.
+    """
+    open_, high, low, close = (np.atleast_2d(np.asarray(a, dtype=float)) for a in (open_, high, low, close))
+    prev_open, prev_close = open_[:, -2], close[:, -2]
+    o, h, l, c = open_[:, -1], high[:, -1], low[:, -1], close[:, -1]
+
+    bullish_engulfing = (prev_open >= prev_close) & (o <= c) & (c > prev_open) & (o < prev_close)
+    bearish_engulfing = (prev_open <= prev_close) & (o >= c) & (o > prev_close) & (c < prev_open)
+    body_size = np.abs(c - o)
+    hammer = ((o - l) > body_size * 2) & ((h - c) < body_size * 0.5)
+    shooting_star = ((h - o) > body_size * 2) & ((c - l) < body_size * 0.5)
+
+    # 마지막 캔들 직전 (window-1)개 캔들의 최저가/최고가 (NaN으로 채운 칸은 제외)
+    lookback = slice(max(0, low.shape[1] - window), -1)
+    support = np.where(np.isnan(low[:, lookback]), np.inf, low[:, lookback]).min(axis=1, initial=np.inf)
+    resistance = np.where(np.isnan(high[:, lookback]), -np.inf, high[:, lookback]).max(axis=1, initial=-np.inf)
+    support[np.isinf(support)] = np.nan
+    resistance[np.isinf(resistance)] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        is_near_support = np.abs(c - support) / support < proximity
+        is_near_resistance = np.abs(c - resistance) / resistance < proximity
+
+    buy = is_near_support & (bullish_engulfing | hammer)
+    sell = ~buy & is_near_resistance & (bearish_engulfing | shooting_star)
+    return {
+        "support": support,
+        "resistance": resistance,
+        "is_near_support": is_near_support,
+        "is_near_resistance": is_near_resistance,
+        "bullish_engulfing": bullish_engulfing,
+        "bearish_engulfing": bearish_engulfing,
+        "hammer": hammer,
+        "shooting_star": shooting_star,
+        "decision": np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8),
+    }
+
+def evaluate_candles(candles_df: pd.DataFrame, window: int = SR_WINDOW, proximity: float = PROXIMITY) -> pd.DataFrame:
+    """캔들 DataFrame 전체에 대한 신호표를 반환합니다. decision 컬럼은 'buy'/'sell'/'hold' 문자열입니다."""
+    result = evaluate_arrays(
+        candles_df['open'].to_numpy(), candles_df['high'].to_numpy(),
+        candles_df['low'].to_numpy(), candles_df['close'].to_numpy(),
+        window=window, proximity=proximity,
+    )
+    signals = pd.DataFrame(result, index=candles_df.index)
+    signals['decision'] = np.select([result['decision'] == 1, result['decision'] == -1], ["buy", "sell"], default="hold")
+    return signals
 
 class CandlestickTrader:
-    def __init__(self, candles_df):
+    def __init__(self, candles_df, window: int = SR_WINDOW, proximity: float = PROXIMITY):
         """캔들스틱 데이터프레임으로 초기화"""
         if candles_df is None or candles_df.empty:
             raise ValueError("캔들 데이터가 비어있습니다.")
         self.df = candles_df
+        self.window = window
+        self.proximity = proximity
         self.prev_candle = self.df.iloc[-2] # 이전 캔들
         self.last_candle = self.df.iloc[-1] # 마지막(현재) 캔들
+        self._signals = None
+
+    @property
+    def signals(self) -> pd.DataFrame:
+        """모든 캔들에 대한 신호표 (처음 접근할 때 한 번만 계산)"""
+        if self._signals is None:
+            self._signals = evaluate_candles(self.df, self.window, self.proximity)
+        return self._signals
 
-    def find_support_resistance(self, window=20):
-        """최근 N개 캔들에서 간단한 지지/저항선을 찾습니다."""
-        recent_candles = self.df.iloc[-window:-1] # 최근 N개 (마지막 캔들 제외)
-        support = recent_candles['low'].min()
-        resistance = recent_candles['high'].max()
-        return support, resistance
+    def find_support_resistance(self, window=None):
+        """최근 N개 캔들에서 간단한 지지/저항선을 찾습니다. (마지막 캔들 제외)"""
+        if window is None or window == self.window:
+            last = self.signals.iloc[-1]
+            return last['support'], last['resistance']
+        support, resistance = rolling_support_resistance(self.df['low'].to_numpy(dtype=float), self.df['high'].to_numpy(dtype=float), window)
+        return support[-1], resistance[-1]
 
-    # --- 캔들 패턴 감지 함수들 ---
+    # --- 캔들 패턴 감지 함수들 (마지막 캔들 기준) ---
     def is_bullish_engulfing(self):
         """상승 장악형 패턴인지 확인"""
-        # 이전: 음봉, 현재: 양봉
-        if self.prev_candle['open'] < self.prev_candle['close'] or self.last_candle['open'] > self.last_candle['close']:
-            return False
-        # 현재 캔들이 이전 캔들을 완전히 감싸는지 확인
-        return self.last_candle['close'] > self.prev_candle['open'] and self.last_candle['open'] < self.prev_candle['close']
+        return bool(self.signals['bullish_engulfing'].iat[-1])
 
     def is_bearish_engulfing(self):
         """하락 장악형 패턴인지 확인"""
-        # 이전: 양봉, 현재: 음봉
-        if self.prev_candle['open'] > self.prev_candle['close'] or self.last_candle['open'] < self.last_candle['close']:
-            return False
-        return self.last_candle['open'] > self.prev_candle['close'] and self.last_candle['close'] < self.prev_candle['open']
+        return bool(self.signals['bearish_engulfing'].iat[-1])
 
     def is_hammer(self):
         """망치형 패턴인지 확인 (상승 반전)"""
-        body_size = abs(self.last_candle['close'] - self.last_candle['open'])
-        lower_wick = self.last_candle['open'] - self.last_candle['low']
-        upper_wick = self.last_candle['high'] - self.last_candle['close']
-        # 조건: 몸통이 아래 꼬리의 절반보다 작고, 윗 꼬리는 매우 짧음
-        return lower_wick > body_size * 2 and upper_wick < body_size * 0.5
+        return bool(self.signals['hammer'].iat[-1])
 
     def is_shooting_star(self):
         """유성형 패턴인지 확인 (하락 반전)"""
-        body_size = abs(self.last_candle['close'] - self.last_candle['open'])
-        upper_wick = self.last_candle['high'] - self.last_candle['open']
-        lower_wick = self.last_candle['close'] - self.last_candle['low']
-        # 조건: 몸통이 위 꼬리의 절반보다 작고, 아래 꼬리는 매우 짧음
-        return upper_wick > body_size * 2 and lower_wick < body_size * 0.5
+        return bool(self.signals['shooting_star'].iat[-1])
 
     def get_decision(self):
         """종합적인 매매 결정을 반환"""
-        support, resistance = self.find_support_resistance()
-        current_price = self.last_candle['close']
-
-        # 가격이 지지선 근처에 있는지 확인 (오차 범위 0.5%)
-        is_near_support = abs(current_price - support) / support < 0.005
-        # 가격이 저항선 근처에 있는지 확인
-        is_near_resistance = abs(current_price - resistance) / resistance < 0.005
-
-        # --- 매수 결정 로직 ---
-        if is_near_support:
-            if self.is_bullish_engulfing():
-                print("[신호] 지지선에서 '상승 장악형' 패턴 발생!")
-                return "buy"
-            if self.is_hammer():
-                print("[신호] 지지선에서 '망치형' 패턴 발생!")
-                return "buy"
-
-        # --- 매도 결정 로직 ---
-        if is_near_resistance:
-            if self.is_bearish_engulfing():
-                print("[신호] 저항선에서 '하락 장악형' 패턴 발생!")
-                return "sell"
-            if self.is_shooting_star():
-                print("[신호] 저항선에서 '유성형' 패턴 발생!")
-                return "sell"
-
-        return "hold"
\ No newline at end of file
+        last = self.signals.iloc[-1]
+        decision = last['decision']
+
+        if decision == "buy":
+            pattern = "bullish_engulfing" if last['bullish_engulfing'] else "hammer"
+            print(SIGNAL_MESSAGES[pattern])
+        elif decision == "sell":
+            pattern = "bearish_engulfing" if last['bearish_engulfing'] else "shooting_star"
+            print(SIGNAL_MESSAGES[pattern])
+
+        return decision
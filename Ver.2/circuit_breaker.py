@@ -0,0 +1,141 @@
+# circuit_breaker.py
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class CircuitOpenError(RuntimeError):
+    """차단기가 열려 있어 요청을 보내지 않고 바로 실패한 경우"""
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} 차단기가 열려 있어 요청을 보내지 않았습니다. ({retry_in:.0f}초 후 다시 시도)")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        외부 의존성(빗썸, Gemini, 슬랙) 하나를 감싸는 차단기
+        - 연속 failure_threshold번 실패하면 열림(open): reset_timeout초 동안은 요청을 보내지 않고 바로 CircuitOpenError
+        - 시간이 지나면 반열림(half_open): 시험 요청 하나만 보내 성공하면 닫힘, 실패하면 다시 열림
+        느려지거나 죽은 의존성 때문에 매매 사이클 전체가 멈추지 않게 하는 용도입니다.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0 # 연속 실패 수
+        self.opened_at = None
+        self.probing = False # 반열림 상태에서 시험 요청이 나가 있는지
+        self.trips = 0 # 열린 횟수
+        self.rejected = 0 # 열려 있어서 바로 실패시킨 요청 수
+        self.on_state_change = None # (이름, 이전 상태, 새 상태)
+
+    def allow(self) -> bool:
+        """지금 요청을 보내도 되는지 (반열림이면 시험 요청 하나만 허용)"""
+        changed = None
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                changed = self._set_state(HALF_OPEN)
+            allowed = self.state == CLOSED or (self.state == HALF_OPEN and not self.probing)
+            if allowed:
+                self.probing = self.state == HALF_OPEN
+            else:
+                self.rejected += 1
+        self._notify(changed)
+        return allowed
+
+    def record_success(self):
+        changed = None
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                changed = self._set_state(CLOSED)
+        self._notify(changed)
+
+    def record_failure(self):
+        changed = None
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.trips += 1
+                self.opened_at = time.monotonic()
+                changed = self._set_state(OPEN)
+        self._notify(changed)
+
+    def call(self, fn, *args, **kwargs):
+        """차단기를 거쳐 fn을 호출합니다. 열려 있으면 fn을 부르지 않고 CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def retry_in(self) -> float:
+        """열려 있으면 시험 요청까지 남은 초 (아니면 0)"""
+        with self.lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"state": self.state, "trips": self.trips, "failures": self.failures, "rejected": self.rejected}
+
+    def _set_state(self, state: str) -> tuple:
+        """상태를 바꾸고 (이전 상태, 새 상태)를 반환합니다. (lock 안에서 호출, 알림은 lock 밖에서 _notify로)"""
+        old, self.state = self.state, state
+        return old, state
+
+    def _notify(self, changed: tuple):
+        if changed is None:
+            return
+        old, state = changed
+        print(f"[차단기] {self.name}: {old} → {state}")
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(self.name, old, state)
+            except Exception as e:
+                print(f"[차단기 오류] {self.name} 상태 변경 알림 실패: {e}")
+
+class Deadline:
+    def __init__(self, seconds: float):
+        """사이클 하나에 주어진 시간 예산 (각 단계는 remaining()/timeout()만큼만 기다림)"""
+        self.seconds = seconds
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.seconds - self.elapsed())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, limit: float) -> float:
+        """단계별 최대 대기 시간 limit와 남은 예산 중 짧은 쪽"""
+        return min(limit, self.remaining())
+
+# 의존성별 공용 차단기
+breakers = {
+    "bithumb_public": CircuitBreaker("bithumb_public", failure_threshold=5, reset_timeout=15.0),
+    "bithumb_private": CircuitBreaker("bithumb_private", failure_threshold=3, reset_timeout=15.0),
+    "gemini": CircuitBreaker("gemini", failure_threshold=3, reset_timeout=120.0),
+    "slack": CircuitBreaker("slack", failure_threshold=3, reset_timeout=60.0),
+}
+
+def breaker_stats() -> dict:
+    """{의존성: {"state", "trips", "failures", "rejected"}}"""
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
+def watch(on_state_change):
+    """모든 차단기의 상태 변경을 on_state_change(이름, 이전 상태, 새 상태)로 받습니다."""
+    for breaker in breakers.values():
+        breaker.on_state_change = on_state_change
@@ -2,6 +2,8 @@
 import os
 from dotenv import load_dotenv
 import python_bithumb
+import bithumb_transport
+bithumb_transport.install() # 빗썸 요청은 모두 공용 연결 풀/요청 한도를 거침
 import json # 보기 편하게 출력하기 위한 라이브러리
 
 load_dotenv()
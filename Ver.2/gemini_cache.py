@@ -0,0 +1,145 @@
+# gemini_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class _InFlight:
+    def __init__(self):
+        """진행 중인 요청 하나 (같은 키로 들어온 요청들이 결과를 함께 기다림)"""
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class GeminiResponseCache:
+    def __init__(self, cache_dir: str = os.path.join("cache", "gemini"), max_memory_entries: int = 256):
+        """
+        Gemini 응답 캐시 (메모리 + 디스크 2단계)
+        키는 모델 이름과 정규화한 프롬프트 입력의 해시이고, 만료 시각은 호출하는 쪽이 캔들 경계로 정합니다.
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict() # key -> (응답, 만료 시각)
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, inputs: dict) -> str:
+        """모델 이름 + 정규화한 입력(문자열 공백 정리, 키 정렬)의 SHA-256 해시"""
+        def normalize(value):
+            if isinstance(value, str):
+                return " ".join(value.split())
+            if isinstance(value, dict):
+                return {str(k): normalize(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [normalize(v) for v in value]
+            return value
+        payload = json.dumps({"model": model_name, "inputs": normalize(inputs)}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str or None:
+        """만료되지 않은 응답을 메모리 → 디스크 순으로 찾습니다."""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self.memory.move_to_end(key)
+                    return entry[0]
+                del self.memory[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and entry[1] > now:
+            self._remember(key, *entry)
+            return entry[0]
+        return None
+
+    def put(self, key: str, value: str, expires_at: float):
+        """응답을 메모리와 디스크에 저장합니다."""
+        self._remember(key, value, expires_at)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"value": value, "expires_at": expires_at}, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"[캐시 경고] Gemini 응답을 디스크에 저장하지 못했습니다: {e}")
+
+    def get_or_call(self, model_name: str, inputs: dict, call_fn, expires_at: float) -> str:
+        """
+        캐시에 응답이 있으면 바로 반환하고, 없으면 call_fn()을 한 번만 호출해 저장합니다.
+        같은 키로 동시에 들어온 요청은 진행 중인 호출 하나의 결과를 함께 받습니다.
+        """
+        key = self.make_key(model_name, inputs)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        with self.lock:
+            flight = self.inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _InFlight()
+                self.inflight[key] = flight
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.hits += 1
+            return flight.value
+
+        self.misses += 1
+        try:
+            flight.value = call_fn()
+            self.put(key, flight.value, expires_at)
+            return flight.value
+        except Exception as e:
+            flight.error = e # 실패한 응답은 캐시하지 않음
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            flight.done.set()
+
+    def prune(self):
+        """만료된 디스크 캐시 파일을 정리합니다."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            entry = self._read_disk(name[:-5])
+            if entry is None or entry[1] <= now:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        with self.lock:
+            self.memory[key] = (value, expires_at)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_memory_entries:
+                self.memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> (str, float) or None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                stored = json.load(f)
+            return stored["value"], float(stored["expires_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+# MarketAnalyzer, GeminiTrader가 함께 쓰는 기본 캐시
+shared_cache = GeminiResponseCache()
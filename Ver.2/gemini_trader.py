@@ -3,52 +3,90 @@ import os
 import google.generativeai as genai
 from dotenv import load_dotenv
 import pandas as pd
-import python_bithumb # 사용자가 제공한 public_api 모듈
+from candle_store import shared_store, candle_start, next_candle_boundary
+from gemini_cache import shared_cache
+from indicators import IndicatorEngine
+from circuit_breaker import breakers, CircuitOpenError
 
 load_dotenv()
 
+GEMINI_TIMEOUT = 20.0 # Gemini 요청 하나당 최대 대기 시간(초)
+
+class MarketDataUnavailable(Exception):
+    """프롬프트에 넣을 시장 데이터를 가져오지 못했을 때 (캐시하지 않음)"""
+
 class GeminiTrader:
-    def __init__(self, ticker="KRW-BTC"):
+    def __init__(self, ticker="KRW-BTC", candle_store=None, response_cache=None):
         """Gemini AI를 이용한 트레이딩 결정 봇"""
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         
         genai.configure(api_key=self.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model_name = 'gemini-1.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
         self.ticker = ticker
+        self.candle_store = candle_store or shared_store
+        self.response_cache = response_cache or shared_cache
+        self.indicators = IndicatorEngine({"SMA_20": ("sma", 20), "RSI_14": ("rsi", 14)})
         
     def get_market_data_for_prompt(self, interval="minute15", count=50):
         """AI 프롬프트에 사용할 시장 데이터(OHLCV, 기술 지표)를 가져옵니다."""
         try:
             # 1. 빗썸에서 캔들 데이터(OHLCV) 가져오기
-            df = python_bithumb.get_ohlcv(self.ticker, interval=interval, count=count)
+            df = self.candle_store.get_ohlcv(self.ticker, interval=interval, count=count)
             if df is None or df.empty:
                 print("[WARNING] 빗썸에서 시장 데이터를 가져오지 못했습니다.")
                 return None
             
-            # 2. 간단한 기술 지표 추가 (이동평균, RSI) - pandas_ta 라이브러리 필요
-            try:
-                import pandas_ta as ta
-                df.ta.sma(length=20, append=True) # 20 이평선
-                df.ta.rsi(length=14, append=True) # 14 RSI
-                # 불필요한 컬럼 제거
-                df = df[['open', 'high', 'low', 'close', 'volume', 'SMA_20', 'RSI_14']]
-            except ImportError:
-                print("[WARNING] 'pandas_ta' 라이브러리가 없어 기술 지표를 추가하지 못했습니다.")
-                df = df[['open', 'high', 'low', 'close', 'volume']]
-                
+            # 2. 간단한 기술 지표 추가 (이동평균, RSI) - 마감된 캔들만 누적 반영
+            df = self.indicators.frame(self.ticker, interval, df, rows=10)
+            # 불필요한 컬럼 제거
+            df = df[['open', 'high', 'low', 'close', 'volume', 'SMA_20', 'RSI_14']]
+
             # AI에게 텍스트로 쉽게 이해시키기 위해 최신 10개 데이터만 문자열로 변환
-            return df.tail(10).to_string()
+            return df.to_string()
         except Exception as e:
             print(f"[ERROR] 시장 데이터 준비 중 오류: {e}")
             return None
 
-    def get_decision(self) -> str:
-        """시장 데이터를 기반으로 Gemini AI에게 매매 결정을 요청합니다."""
-        market_data_str = self.get_market_data_for_prompt()
-        if not market_data_str:
+    def get_decision(self, interval="minute15") -> str:
+        """
+        시장 데이터를 기반으로 Gemini AI에게 매매 결정을 요청합니다.
+        같은 캔들 안에서 반복 호출하면 데이터 조회 없이 캐시된 결정을 반환합니다.
+        """
+        cache_inputs = {
+            "task": "trade_decision",
+            "ticker": self.ticker,
+            "interval": interval,
+            "candle": candle_start(interval).isoformat(),
+        }
+        expires_at = next_candle_boundary(interval).timestamp()
+
+        try:
+            text = self.response_cache.get_or_call(self.model_name, cache_inputs, lambda: self._request_decision(interval), expires_at)
+            decision = text.strip().lower()
+            
+            if decision not in ["buy", "sell", "hold"]:
+                print(f"[WARNING] AI가 유효하지 않은 답변을 했습니다: {decision}. 안전을 위해 'hold'로 처리합니다.")
+                return "hold"
+                
+            print(f"🧠 [AI 결정] {decision.upper()}")
+            return decision
+
+        except MarketDataUnavailable:
             return "hold" # 데이터가 없으면 관망
+        except Exception as e:
+            print(f"[ERROR] Gemini AI 요청 중 오류 발생: {e}")
+            return "hold" # 오류 발생 시 안전하게 관망
+
+    def _request_decision(self, interval: str) -> str:
+        """시장 데이터로 프롬프트를 만들어 Gemini에 매매 결정을 묻습니다. (캐시 미스일 때만 호출)"""
+        if breakers["gemini"].retry_in() > 0:
+            raise CircuitOpenError("gemini", breakers["gemini"].retry_in()) # 시장 데이터 준비도 건너뜀
+        market_data_str = self.get_market_data_for_prompt(interval=interval)
+        if not market_data_str:
+            raise MarketDataUnavailable(self.ticker)
 
         # --- AI에게 전달할 프롬프트 ---
         prompt = f"""
@@ -70,24 +108,15 @@ class GeminiTrader:
         [결정]
         """
         
-        try:
-            print("[INFO] Gemini AI에게 매매 결정을 요청합니다...")
-            response = self.model.generate_content(prompt)
-            decision = response.text.strip().lower()
-            
-            if decision not in ["buy", "sell", "hold"]:
-                print(f"[WARNING] AI가 유효하지 않은 답변을 했습니다: {decision}. 안전을 위해 'hold'로 처리합니다.")
-                return "hold"
-                
-            print(f"🧠 [AI 결정] {decision.upper()}")
-            return decision
-            
-        except Exception as e:
-            print(f"[ERROR] Gemini AI 요청 중 오류 발생: {e}")
-            return "hold" # 오류 발생 시 안전하게 관망
+        print("[INFO] Gemini AI에게 매매 결정을 요청합니다...")
+        # 응답이 늦으면 GEMINI_TIMEOUT초에서 끊고, 계속 실패하면 차단기가 열려 한동안 바로 기본값(중립/관망)으로 처리
+        response = breakers["gemini"].call(self.model.generate_content, prompt, request_options={"timeout": GEMINI_TIMEOUT})
+        return response.text
 
 
 if __name__ == "__main__":
+    import bithumb_transport
+    bithumb_transport.install()
     trader = GeminiTrader(ticker="KRW-BTC")
     
     # AI 매매 결정 테스트
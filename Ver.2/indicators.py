@@ -0,0 +1,186 @@
+# indicators.py
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from candle_store import INTERVAL_SECONDS
+
+class IncrementalSMA:
+    def __init__(self, length: int):
+        """링 버퍼 합계로 유지하는 단순 이동평균 (pandas_ta sma와 동일)"""
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value: float) -> float:
+        if len(self.window) == self.length:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % (self.length * 1000) == 0:
+            self.total = float(sum(self.window)) # 누적 오차 정리
+        return self.value
+
+    def preview(self, value: float) -> float:
+        """value가 다음 캔들 종가라면 나올 값을 상태 변경 없이 계산합니다."""
+        if len(self.window) + 1 < self.length:
+            return np.nan
+        dropped = self.window[0] if len(self.window) == self.length else 0.0
+        return (self.total - dropped + value) / self.length
+
+    @property
+    def value(self) -> float:
+        return self.total / self.length if len(self.window) == self.length else np.nan
+
+class IncrementalEMA:
+    def __init__(self, length: int):
+        """처음 length개의 평균으로 시작하는 지수 이동평균 (pandas_ta ema 기본 설정과 동일)"""
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.ema = np.nan
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_total += value
+        elif self.count == self.length:
+            self.ema = (self.seed_total + value) / self.length
+        else:
+            self.ema = self.alpha * value + (1 - self.alpha) * self.ema
+        return self.ema
+
+    def preview(self, value: float) -> float:
+        if self.count + 1 < self.length:
+            return np.nan
+        if self.count + 1 == self.length:
+            return (self.seed_total + value) / self.length
+        return self.alpha * value + (1 - self.alpha) * self.ema
+
+    @property
+    def value(self) -> float:
+        return self.ema
+
+class IncrementalRSI:
+    def __init__(self, length: int = 14):
+        """
+        Wilder 방식(alpha=1/length) RSI. pandas_ta rsi와 같은 가중 평균(ewm adjust=True)을
+        분자/분모 누적값으로 유지해 캔들 하나당 상수 시간에 갱신합니다.
+        """
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.prev_close = None
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.weight_total = 0.0
+        self.observations = 0
+
+    def update(self, close: float) -> float:
+        if self.prev_close is not None:
+            self.gain_total, self.loss_total, self.weight_total = self._next(close)
+            self.observations += 1
+        self.prev_close = close
+        return self.value
+
+    def preview(self, close: float) -> float:
+        if self.prev_close is None or self.observations + 1 < self.length:
+            return np.nan
+        return self._rsi(*self._next(close))
+
+    def _next(self, close: float) -> (float, float, float):
+        change = close - self.prev_close
+        return (
+            self.decay * self.gain_total + max(change, 0.0),
+            self.decay * self.loss_total + max(-change, 0.0),
+            self.decay * self.weight_total + 1.0,
+        )
+
+    @staticmethod
+    def _rsi(gain_total: float, loss_total: float, weight_total: float) -> float:
+        average_gain = gain_total / weight_total
+        average_loss = loss_total / weight_total
+        if average_gain + average_loss == 0:
+            return np.nan
+        return 100 * average_gain / (average_gain + average_loss)
+
+    @property
+    def value(self) -> float:
+        if self.observations < self.length:
+            return np.nan
+        return self._rsi(self.gain_total, self.loss_total, self.weight_total)
+
+INDICATOR_TYPES = {"sma": IncrementalSMA, "ema": IncrementalEMA, "rsi": IncrementalRSI}
+DEFAULT_SPECS = {"SMA_20": ("sma", 20), "SMA_60": ("sma", 60), "RSI_14": ("rsi", 14)}
+
+class IndicatorState:
+    def __init__(self, specs: dict, history: int):
+        """한 (종목, 캔들 간격)의 지표 상태와 최근 계산값 기록"""
+        self.indicators = {name: INDICATOR_TYPES[kind](length) for name, (kind, length) in specs.items()}
+        self.last_ts = None
+        self.history = deque(maxlen=history) # (캔들 시각, {지표: 값})
+
+    def update(self, ts: int, close: float):
+        values = {name: indicator.update(close) for name, indicator in self.indicators.items()}
+        self.last_ts = ts
+        self.history.append((ts, values))
+
+    def preview(self, close: float) -> dict:
+        return {name: indicator.preview(close) for name, indicator in self.indicators.items()}
+
+class IndicatorEngine:
+    def __init__(self, specs: dict = None, history: int = 10):
+        """
+        (종목, 캔들 간격)별 지표를 마감된 캔들 단위로 누적 갱신하는 엔진
+        specs: {컬럼명: (종류, 기간)} 예) {"SMA_20": ("sma", 20), "RSI_14": ("rsi", 14)}
+        """
+        self.specs = specs or DEFAULT_SPECS
+        self.history = history
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def sync(self, ticker: str, interval: str, df: pd.DataFrame) -> dict:
+        """
+        캔들 DataFrame에서 아직 반영하지 않은 마감 캔들(마지막 행 제외)만 상태에 반영하고,
+        마지막(진행 중) 캔들 종가를 넣었을 때의 지표 값을 반환합니다.
+        """
+        with self.lock:
+            state = self._feed(ticker, interval, df)
+            return state.preview(float(df['close'].iloc[-1]))
+
+    def frame(self, ticker: str, interval: str, df: pd.DataFrame, rows: int = 10) -> pd.DataFrame:
+        """최근 rows개 캔들에 지표 컬럼을 붙인 DataFrame을 반환합니다. (pandas_ta append=True 결과와 같은 모양)"""
+        with self.lock:
+            state = self._feed(ticker, interval, df)
+            by_ts = dict(state.history)
+            by_ts[_timestamps(df.index[-1:])[0]] = state.preview(float(df['close'].iloc[-1]))
+
+        tail = df.tail(rows).copy()
+        for name in self.specs:
+            tail[name] = [by_ts.get(ts, {}).get(name, np.nan) for ts in _timestamps(tail.index)]
+        return tail
+
+    def _feed(self, ticker: str, interval: str, df: pd.DataFrame) -> IndicatorState:
+        key = (ticker, interval)
+        closed_ts = _timestamps(df.index[:-1])
+        closes = df['close'].to_numpy(dtype=float)[:-1]
+
+        state = self.states.get(key)
+        seconds = INTERVAL_SECONDS.get(interval)
+        if state is not None and state.last_ts is not None and len(closed_ts) and seconds:
+            # 마지막으로 반영한 캔들과 새 데이터 사이에 빈 구간이 있으면 처음부터 다시 계산
+            if closed_ts[0] - state.last_ts > seconds * 1_000_000_000:
+                state = None
+        if state is None:
+            state = IndicatorState(self.specs, self.history)
+            self.states[key] = state
+
+        start = 0 if state.last_ts is None else int(np.searchsorted(closed_ts, state.last_ts, side="right"))
+        for ts, close in zip(closed_ts[start:], closes[start:]):
+            state.update(int(ts), float(close))
+        return state
+
+def _timestamps(index) -> np.ndarray:
+    return pd.DatetimeIndex(index).values.astype("datetime64[ns]").astype("i8")
@@ -0,0 +1,117 @@
+# live_metrics.py
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from trade_log_store import TIME_FORMAT
+
+PNL_DAY_START_HOUR = 8 # 실현 손익 집계 기준 시각 (오전 8시)
+
+class LiveMetrics:
+    def __init__(self, store, balance_fn=None, last_n: int = 5, poll_seconds: float = 2.0, balance_refresh_seconds: float = 60.0):
+        """
+        /report용 실시간 지표 집계기
+        거래 로그에 새로 쌓인 매수/매도만 읽어 오늘(오전 8시 기준) 실현 손익과 최근 N건 거래를 누적 갱신하고,
+        잔고는 balance_fn()으로 일정 주기마다만 조회해 캐시합니다. snapshot()은 이 상태를 그대로 반환합니다.
+        """
+        self.store = store
+        self.balance_fn = balance_fn
+        self.poll_seconds = poll_seconds
+        self.balance_refresh_seconds = balance_refresh_seconds
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.last_trades = deque(maxlen=last_n)
+        self.last_id = 0
+        self.day_start = None
+        self.today_pnl = 0.0
+        self.balance = None
+        self.balance_updated = None
+        self._load()
+
+    def on_trade(self, trade: tuple):
+        """거래 하나를 반영합니다. trade: (시간, 종목, 판단, 가격, 수량, 실현손익, 수익률)"""
+        with self.lock:
+            self._roll_day()
+            self.last_trades.append(trade)
+            if trade[2] == "sell" and trade[0] >= self.day_start.strftime(TIME_FORMAT):
+                self.today_pnl += float(trade[5] or 0.0)
+
+    def poll(self):
+        """거래 로그에서 마지막으로 읽은 뒤 새로 쌓인 매수/매도만 읽어 반영합니다."""
+        for row in self.store.fills_after(self.last_id):
+            self.last_id = row[0]
+            self.on_trade(row[1:])
+        with self.lock:
+            self._roll_day()
+
+    def refresh_balance(self):
+        if self.balance_fn is None:
+            return
+        try:
+            balance = self.balance_fn()
+        except Exception as e:
+            print(f"[지표 경고] 잔고 조회 실패, 이전 값을 유지합니다: {e}")
+            return
+        with self.lock:
+            self.balance = balance
+            self.balance_updated = datetime.now()
+
+    def snapshot(self) -> dict:
+        """현재 집계 상태 (네트워크/디스크 접근 없음)"""
+        with self.lock:
+            return {
+                "day_start": self.day_start,
+                "today_pnl": self.today_pnl,
+                "last_trades": list(self.last_trades),
+                "balance": dict(self.balance) if self.balance is not None else None,
+                "balance_updated": self.balance_updated,
+            }
+
+    def start(self):
+        """거래 로그 확인과 잔고 갱신을 백그라운드에서 주기적으로 실행합니다."""
+        self.stop_event.clear()
+        self.refresh_balance()
+        self.thread = threading.Thread(target=self._run, name="live-metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        next_balance = time.time() + self.balance_refresh_seconds
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[지표 경고] 거래 로그 확인 실패: {e}")
+            if time.time() >= next_balance:
+                self.refresh_balance()
+                next_balance = time.time() + self.balance_refresh_seconds
+
+    def _load(self):
+        """시작할 때 한 번만 저장소에서 현재 상태를 읽어옵니다."""
+        with self.lock:
+            self.last_id = self.store.last_id()
+            self.last_trades.extend(self.store.last_fills(self.last_trades.maxlen))
+            self.day_start = current_day_start()
+            self.today_pnl = self.store.realized_pnl_since(self.day_start)
+
+    def _roll_day(self):
+        """
+        오전 8시가 지나면 새 집계 구간으로 넘어갑니다.
+        거래는 기록 시각 이후에 반영되므로, 새 구간의 거래는 모두 이 전환 뒤에 더해집니다.
+        """
+        day_start = current_day_start()
+        if day_start != self.day_start:
+            self.day_start = day_start
+            self.today_pnl = 0.0
+
+def current_day_start(now: datetime = None) -> datetime:
+    """가장 최근의 오전 8시 (8시 이전이면 전날 8시)"""
+    now = now or datetime.now()
+    start = now.replace(hour=PNL_DAY_START_HOUR, minute=0, second=0, microsecond=0)
+    return start if now >= start else start - timedelta(days=1)
@@ -0,0 +1,92 @@
+# log_writer.py
+import atexit
+import queue
+import threading
+import time
+
+FSYNC_POLICIES = ("never", "batch", "trades") # trades: 실제 매수/매도가 포함된 배치만 fsync
+
+class BatchWriter:
+    def __init__(self, sink, batch_size: int = 200, flush_interval: float = 1.0, fsync: str = "trades", is_trade=None):
+        """
+        기록을 메모리 큐에 쌓아두고 백그라운드 스레드가 batch_size개 또는 flush_interval초마다 한 번에 쓰는 기록기
+        호출하는 쪽의 비용은 큐에 넣는 것뿐이며, 프로그램이 끝날 때 남은 기록을 모두 씁니다.
+        fsync: "never"(OS에 맡김), "batch"(배치마다), "trades"(is_trade(row)가 참인 기록이 있는 배치만)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync 정책은 {FSYNC_POLICIES} 중 하나여야 합니다: {fsync}")
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.is_trade = is_trade or (lambda row: False)
+        self.queue = queue.Queue()
+        self.sink_lock = threading.Lock()
+        self.closed = False
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, row):
+        """기록 하나를 큐에 넣습니다."""
+        if self.closed:
+            raise RuntimeError("이미 종료된 기록기입니다.")
+        self.queue.put(row)
+
+    def flush(self):
+        """지금까지 넣은 기록이 모두 쓰일 때까지 기다립니다."""
+        if self.closed:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        """남은 기록을 모두 쓰고 스레드를 멈춥니다."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        batch, markers = [], []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if stopping or markers or len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+                for marker in markers:
+                    marker.set()
+                markers = []
+
+        with self.sink_lock:
+            self.sink.close() # 기록기 스레드에서 열린 연결은 같은 스레드에서 닫음
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        try:
+            with self.sink_lock:
+                self.sink.write(batch)
+                if self.fsync == "batch" or (self.fsync == "trades" and any(self.is_trade(row) for row in batch)):
+                    self.sink.sync()
+            self.written += len(batch)
+        except Exception as e:
+            print(f"[ERROR] 로그 배치 기록 중 오류 발생 ({len(batch)}건 유실): {e}")
@@ -1,12 +1,24 @@
 # main.py
 import time
 import os
+import threading
+import pandas as pd
 from dotenv import load_dotenv
 import python_bithumb
+import bithumb_transport
+bithumb_transport.install() # 빗썸 요청은 모두 공용 연결 풀/요청 한도를 거침
 from slack_bot import SlackNotifier
+from slack_dispatcher import PRIORITY_ALERT
 from trade_manager import TradeManager
-from candlestick_trader import CandlestickTrader
 from market_scanner import MarketScanner
+from candle_store import shared_store as candle_store
+from candle_scheduler import CandleScheduler
+from market_stream import MarketStream, candle_array
+from stop_loss_watcher import StopLossWatcher, stream_first_prices
+from portfolio import Portfolio, PortfolioEngine
+from order_executor import OrderExecutor
+from account_state import AccountState
+from circuit_breaker import breakers, breaker_stats, watch, Deadline, OPEN
 from datetime import datetime, time as dt_time
 
 load_dotenv()
@@ -14,7 +26,11 @@ load_dotenv()
 # --- 봇 설정 ---
 TIMEFRAME = "minute15"
 STOP_LOSS_PERCENT = 1.5
-TIME_INTERVAL_SECONDS = 900 # 15분
+SETTLE_SECONDS = 3 # 캔들 마감 후 거래소 집계를 기다리는 시간
+STOP_LOSS_CHECK_SECONDS = 1 # 손절 감시 주기
+PORTFOLIO_WEIGHTS = [0.7, 0.3] # 슬롯별 자금 비중 (주종목 70%, 부종목 30%). 종목 수를 늘리려면 비중을 더 적으면 됨
+CYCLE_BUDGET_SECONDS = 20 # 캔들 마감 후 사이클 하나(잔고 → 캔들 → 판단 → 주문 접수)에 쓰는 최대 시간
+LOAD_TIMEOUT_SECONDS = 10 # 그중 캔들 준비에 쓰는 최대 시간
 
 def main():
     # 1. 모듈 초기화
@@ -22,6 +38,7 @@ def main():
         notifier = SlackNotifier()
         manager = TradeManager()
         scanner = MarketScanner()
+        scanner.asset_cache.start_background_refresh() # 출금 수수료 캐시 주기적 갱신
         bithumb_api = python_bithumb.Bithumb(
             access_key=os.getenv("BITHUMB_API_KEY"),
             secret_key=os.getenv("BITHUMB_SECRET_KEY")
@@ -30,103 +47,217 @@ def main():
         print(f"모듈 초기화 실패: {e}")
         return
 
-    # --- 두 종목의 상태를 독립적으로 관리 ---
-    positions = {
-        "primary": {"ticker": None, "in_position": False, "purchase_price": 0, "capital_alloc": 0.7}, # 주종목 자금 70%
-        "secondary": {"ticker": None, "in_position": False, "purchase_price": 0, "capital_alloc": 0.3} # 부종목 자금 30%
-    }
+    # --- 외부 의존성 차단기: 열리거나 다시 닫히면 알림 (빗썸/Gemini/슬랙) ---
+    def on_breaker_change(name: str, old: str, new: str):
+        if new == OPEN:
+            notifier.send_message(f"⚡ `{name}` 요청이 계속 실패해 차단했습니다. (누적 {breakers[name].trips}회) 손절 감시는 계속 동작합니다.", priority=PRIORITY_ALERT)
+        elif old != OPEN:
+            notifier.send_message(f"✅ `{name}` 연결이 회복되었습니다.", priority=PRIORITY_ALERT)
+
+    watch(on_breaker_change)
+
+    # --- N종목 포지션 상태표 (슬롯별 자금 비중) ---
+    portfolio = Portfolio(PORTFOLIO_WEIGHTS)
     last_scan_date = None
-    
+    order_lock = threading.Lock()
+    scheduler = CandleScheduler(TIMEFRAME, settle_seconds=SETTLE_SECONDS, max_workers=8)
+    engine = PortfolioEngine(portfolio, candle_store, TIMEFRAME, count=30)
+
+    # --- 실시간 체결 스트림: 마감된 캔들을 저장소에 합치고 스케줄러를 깨움 ---
+    def on_candle_closed(ticker: str, interval: str, candle: dict):
+        if interval != TIMEFRAME or not candle["complete"]:
+            return # 스트림 중간에 시작된 캔들은 REST 데이터로 처리
+        if candle_store.ingest(ticker, interval, candle_array(candle)):
+            end = pd.Timestamp(candle["end"])
+            engine.mark_streamed(ticker, end)
+            scheduler.notify_closed(ticker, end.to_pydatetime())
+
+    stream = MarketStream(intervals=(TIMEFRAME,), on_candle_closed=on_candle_closed)
+    try:
+        stream.start()
+    except ImportError as e:
+        print(f"[경고] 실시간 스트림 없이 REST 조회로만 동작합니다: {e}")
+        stream = None
+    engine.stream = stream
+
+    # --- 주문 실행기: 주문은 백그라운드로 내고, 실제 체결가/수량이 확인되면 포지션에 반영 ---
+    # 계좌 잔고는 사이클마다 한 번 전체를 받아오고, 그 사이 우리 주문은 접수/체결 시점에 바로 반영
+    account = AccountState(bithumb_api)
+    executor = OrderExecutor(bithumb_api, on_submit=account.on_submit, on_done=account.on_done)
+
+    def on_buy_done(slot: int, ticket, signal_price: float):
+        with portfolio.locks[slot]:
+            same_slot = portfolio.tickers[slot] == ticket.ticker
+            if same_slot:
+                portfolio.pending[slot] = False
+            if ticket.state != "filled":
+                return
+            price = ticket.avg_price or signal_price
+            if same_slot:
+                portfolio.open_position(slot, price, ticket.filled_volume, entry_id=ticket.client_id)
+        print(f"[체결] {ticket.ticker} 매수 신호가 {signal_price:,.0f} → 체결가 {price:,.2f} (슬리피지 {(price / signal_price - 1) * 100:+.3f}%)")
+        notifier.report_trade(ticket.ticker, "buy", price, ticket.filled_volume)
+        manager.log_trade(ticket.ticker, "buy", price, ticket.filled_volume)
+
+    def on_sell_done(slot: int, ticket, signal_price: float, purchase_price: float):
+        with portfolio.locks[slot]:
+            same_slot = portfolio.tickers[slot] == ticket.ticker
+            if same_slot:
+                portfolio.pending[slot] = False
+            if ticket.state != "filled":
+                return # 매도가 안 됐으면 포지션 유지 (손절 감시가 다시 시도)
+            if same_slot:
+                portfolio.close_position(slot)
+        price = ticket.avg_price or signal_price
+        pnl = (price - purchase_price) * ticket.filled_volume
+        pnl_percent = ((price - purchase_price) / purchase_price) * 100
+        notifier.report_trade(ticket.ticker, "sell", price, ticket.filled_volume, pnl, pnl_percent)
+        manager.log_trade(ticket.ticker, "sell", price, ticket.filled_volume, pnl, pnl_percent)
+
+    def sell_position(slot: int, current_price: float, coin_total: float):
+        """보유 수량 전량 시장가 매도 주문을 내고 바로 돌아옵니다. (체결되면 on_sell_done에서 알림/기록 후 포지션을 닫음)"""
+        ticker = portfolio.tickers[slot]
+        purchase_price = portfolio.purchase_price[slot]
+        entry_id = portfolio.entry_ids[slot]
+        portfolio.pending[slot] = True
+        # 포지션 하나에 청산 주문은 한 번만 (손절 감시와 매매 사이클이 겹쳐도 중복 매도 안 함)
+        ticket = executor.sell_market(ticker, coin_total, client_id=f"{entry_id}-exit" if entry_id else None,
+                                      on_done=lambda ticket: on_sell_done(slot, ticket, current_price, purchase_price))
+        settle_returned_ticket(slot, ticket)
+
+    def settle_returned_ticket(slot: int, ticket):
+        """
+        같은 client_id로 이미 끝난 주문이 돌아오면 완료 콜백이 다시 오지 않으므로 여기서 pending을 풀어 줌
+        (슬롯 잠금을 잡은 채 호출: 새 주문의 콜백은 이 잠금을 기다리므로 done이 설정돼 있으면 항상 예전 주문)
+        """
+        if not ticket.done.is_set():
+            return
+        portfolio.pending[slot] = False
+        if ticket.state == "filled" and ticket.side == "sell":
+            portfolio.close_position(slot) # 청산은 이미 체결돼 있었음
+        elif ticket.state == "unknown":
+            print(f"[주문 경고] {ticket.client_id} 접수 여부를 아직 확인하지 못했습니다. 다음 점검 때 다시 확인합니다.")
+
+    def on_stop_loss(slot: int, ticker: str, price: float):
+        """손절 감시 스레드가 기준 초과를 감지하면 매매 사이클을 기다리지 않고 바로 매도"""
+        with portfolio.locks[slot]:
+            if portfolio.tickers[slot] != ticker or not portfolio.in_position[slot] or portfolio.pending[slot]:
+                return # 그 사이 매매 사이클에서 이미 매도했거나, 매도 주문이 나갔거나, 종목이 바뀜
+            coin_total = account.available(ticker.split('-')[1])
+            if coin_total > 0:
+                sell_position(slot, price, coin_total)
+            else:
+                portfolio.close_position(slot) # 팔 수량이 없으면 감시 대상에서 제외
+
+    # --- 손절 감시: 1초마다 현재가(스트림 체결가 우선, 없으면 현재가 일괄 조회)로 보유 포지션 점검 ---
+    watcher = StopLossWatcher(portfolio, on_stop_loss, STOP_LOSS_PERCENT,
+                              price_fn=stream_first_prices(stream), interval_seconds=STOP_LOSS_CHECK_SECONDS)
+    watcher.start()
+
+    def process_slot(slot: int, ticker: str, decision: str, current_price: float, boundary: datetime, allow_entry: bool = True):
+        """
+        엔진이 내린 판단으로 한 슬롯의 매수/매도/손절 주문을 냄 (스케줄러가 슬롯별로 동시에 실행, 체결은 기다리지 않음)
+        allow_entry=False면 새 매수만 건너뜀 (빗썸 주문/잔고 쪽이 불안정할 때, 청산은 그대로)
+        """
+        # 손절 감시 스레드와 같은 포지션을 동시에 건드리지 않도록 잠금
+        with portfolio.locks[slot]:
+            if portfolio.tickers[slot] != ticker or portfolio.pending[slot]:
+                return # 판단하는 사이 종목이 다시 선정됐거나, 이전 주문이 아직 체결을 기다리는 중
+            if portfolio.in_position[slot]:
+                # --- 포지션 보유 시: 손절 또는 이익실현 매도 확인 ---
+                # 1. 손절매 로직
+                if manager.check_stop_loss(current_price, portfolio.purchase_price[slot], STOP_LOSS_PERCENT):
+                    coin_total = account.available(ticker.split('-')[1])
+                    if coin_total > 0:
+                        sell_position(slot, current_price, coin_total)
+                    return
+
+                # 2. 이익실현 매도 로직
+                manager.log_trade(ticker, decision, current_price) # 판단 기록
+                if decision == "sell":
+                    coin_total = account.available(ticker.split('-')[1])
+                    if coin_total > 0:
+                        sell_position(slot, current_price, coin_total)
+
+            else:
+                # --- 포지션 미보유 시: 매수 확인 ---
+                manager.log_trade(ticker, decision, current_price) # 판단 기록
+
+                if decision == "buy" and not allow_entry:
+                    print(f"[매매] {ticker} 매수 신호지만 빗썸 주문/잔고 조회가 불안정해 이번에는 진입하지 않습니다.")
+                elif decision == "buy":
+                    # 여러 종목이 동시에 매수해도 잔고 조회~주문 접수는 하나씩 처리 (같은 잔고로 중복 배분 방지)
+                    with order_lock:
+                        total_krw = account.available("KRW") # 먼저 나간 매수 금액은 접수 시점에 이미 빠져 있음
+                        investment_amount = portfolio.buy_amount(slot, total_krw) # 슬롯 비중만큼만 투자
+
+                        if investment_amount > 5000:
+                            # 같은 캔들에 대한 매수는 한 번만 (재시도/재처리돼도 중복 매수 안 함)
+                            portfolio.pending[slot] = True
+                            ticket = executor.buy_market(ticker, investment_amount, client_id=f"{ticker}-buy-{boundary:%Y%m%d%H%M}",
+                                                         on_done=lambda ticket: on_buy_done(slot, ticket, current_price))
+                            settle_returned_ticket(slot, ticket)
+
     notifier.send_message(f"📈 최종 결합 전략 자동매매 봇을 시작합니다. (TIMEFRAME: {TIMEFRAME})")
 
     while True:
         try:
+            # 캔들 마감 + 정산 대기 시각까지 대기 (스트림이 모든 종목의 마감을 알리면 바로 깨어남)
+            boundary = scheduler.wait_for_next_close(expected=stream.tickers if stream else ())
             now = datetime.now()
             
-            # --- 매일 오전 9시 5분, 오늘의 주/부종목 선정 ---
-            if last_scan_date != now.date() and now.time() >= dt_time(9, 5):
-                primary, secondary = scanner.select_daily_tickers()
-                
-                positions["primary"].update({"ticker": primary, "in_position": False, "purchase_price": 0})
-                positions["secondary"].update({"ticker": secondary, "in_position": False, "purchase_price": 0})
+            # --- 매일 오전 9시 5분, 오늘의 거래 종목 선정 (슬롯 수만큼) ---
+            # 빗썸 시세 차단기가 열려 있으면 빈 결과로 포지션을 초기화하지 않도록 다음 사이클로 미룸
+            if last_scan_date != now.date() and now.time() >= dt_time(9, 5) and breakers["bithumb_public"].retry_in() > 0:
+                print("[스캐너] 빗썸 시세 조회가 차단 중이라 종목 선정을 다음 사이클로 미룹니다.")
+            elif last_scan_date != now.date() and now.time() >= dt_time(9, 5):
+                selected = [ticker for ticker in scanner.select_daily_tickers(n=len(portfolio)) if ticker]
+                portfolio.assign(selected)
                 last_scan_date = now.date()
+                if stream:
+                    stream.set_tickers(selected)
 
-                if primary:
-                    notifier.send_message(f"🎯 *금일 공략 종목 선정*\n∙ *주종목:* `{primary}`\n∙ *부종목:* `{secondary if secondary else '없음'}`")
+                if selected:
+                    lines = [f"∙ `{row['ticker']}` (자금 {row['weight']:.0%})" for row in portfolio.rows() if row["ticker"]]
+                    notifier.send_message("🎯 *금일 공략 종목 선정*\n" + "\n".join(lines))
                 else:
                     notifier.send_message(f"🐻 시장 상황이 좋지 않아 금일 거래 종목을 선정하지 않았습니다.")
-            
-            # --- 각 포지션을 개별적으로 순회하며 매매 판단 ---
-            for key, pos in positions.items():
-                if not pos["ticker"]: # 선정된 종목이 없으면 건너뛰기
-                    continue
-
-                # 1. 데이터 가져오기
-                df = python_bithumb.get_ohlcv(pos["ticker"], TIMEFRAME, count=30)
-                if df is None or len(df) < 3:
-                    continue
-                
-                current_price = df.iloc[-1]['close']
-
-                # 2. 매수/매도/손절 로직
-                if pos["in_position"]:
-                    # --- 포지션 보유 시: 손절 또는 이익실현 매도 확인 ---
-                    coin_total, _, _ = bithumb_api.get_balance(pos["ticker"].split('-')[1])
-
-                    # 2-A. 손절매 로직
-                    if manager.check_stop_loss(current_price, pos["purchase_price"], STOP_LOSS_PERCENT):
-                        if coin_total > 0:
-                            bithumb_api.sell_market_order(pos["ticker"], coin_total)
-                            pnl = (current_price - pos["purchase_price"]) * coin_total
-                            pnl_percent = ((current_price - pos["purchase_price"]) / pos["purchase_price"]) * 100
-                            
-                            notifier.report_trade(pos["ticker"], "sell", current_price, coin_total, pnl, pnl_percent)
-                            manager.log_trade(pos["ticker"], "sell", current_price, coin_total, pnl, pnl_percent)
-                            
-                            pos["in_position"] = False
-                        continue 
-
-                    # 2-B. 이익실현 매도 로직
-                    trader = CandlestickTrader(df)
-                    decision = trader.get_decision()
-                    manager.log_trade(pos["ticker"], decision, current_price) # 판단 기록
-
-                    if decision == "sell":
-                        if coin_total > 0:
-                            bithumb_api.sell_market_order(pos["ticker"], coin_total)
-                            pnl = (current_price - pos["purchase_price"]) * coin_total
-                            pnl_percent = ((current_price - pos["purchase_price"]) / pos["purchase_price"]) * 100
-
-                            notifier.report_trade(pos["ticker"], "sell", current_price, coin_total, pnl, pnl_percent)
-                            manager.log_trade(pos["ticker"], "sell", current_price, coin_total, pnl, pnl_percent)
-
-                            pos["in_position"] = False
-
-                else: 
-                    # --- 포지션 미보유 시: 매수 확인 ---
-                    trader = CandlestickTrader(df)
-                    decision = trader.get_decision()
-                    manager.log_trade(pos["ticker"], decision, current_price) # 판단 기록
-
-                    if decision == "buy":
-                        total_krw = bithumb_api.get_balance("KRW")
-                        investment_amount = total_krw * pos["capital_alloc"] # 할당된 자금 비율만큼만 투자
-                        
-                        if investment_amount > 5000:
-                            bithumb_api.buy_market_order(pos["ticker"], investment_amount)
-                            
-                            pos["in_position"] = True
-                            pos["purchase_price"] = current_price
-                            volume = investment_amount / current_price
-                            notifier.report_trade(pos["ticker"], "buy", current_price, volume)
-                            manager.log_trade(pos["ticker"], "buy", current_price, volume)
 
-            print(f"--- [{now.strftime('%H:%M:%S')}] 사이클 완료. 다음 캔들을 기다립니다. ---")
-            time.sleep(TIME_INTERVAL_SECONDS)
+            # --- 이번 캔들의 사이클 시간 예산 (종목 선정 이후부터) ---
+            deadline = Deadline(CYCLE_BUDGET_SECONDS)
+
+            # --- 계좌 잔고는 사이클당 한 번만 조회 (슬롯별 판단은 모두 이 스냅샷을 사용) ---
+            try:
+                account.refresh()
+            except Exception as e:
+                print(f"[계좌 경고] 잔고 조회 실패, 마지막 스냅샷을 사용합니다: {e}")
+
+            # --- 모든 종목의 캔들을 동시에 준비하고 한 번에 판단한 뒤, 슬롯별 주문을 동시에 처리 ---
+            # 시간 예산 안에 받은 종목만 판단하고, 주문 접수도 남은 예산까지만 기다림 (손절 감시는 별도 스레드라 영향 없음)
+            frames, prices = engine.load(boundary, timeout=deadline.timeout(LOAD_TIMEOUT_SECONDS))
+            decisions = engine.evaluate(frames)
+            allow_entry = breakers["bithumb_private"].retry_in() == 0
+            jobs = {}
+            for slot in portfolio.active():
+                ticker = portfolio.tickers[slot]
+                if ticker in decisions: # 캔들을 받지 못한 종목은 이번 사이클 건너뛰기
+                    jobs[ticker] = (lambda slot=slot, ticker=ticker: process_slot(slot, ticker, decisions[ticker], prices[ticker], boundary, allow_entry))
+            scheduler.run_concurrently(jobs, boundary, timeout=deadline.remaining())
+
+            lag = scheduler.lag_stats()
+            if lag["count"]:
+                print(f"[스케줄러] 캔들 마감 → 판단 지연: 최근 {lag['last']:.1f}초 | 평균 {lag['mean']:.1f}초 | 최대 {lag['max']:.1f}초")
+            fill = executor.latency_stats()["submit_to_fill"]
+            if fill["count"]:
+                print(f"[주문] 주문 → 체결 지연: 평균 {fill['mean']:.2f}초 | p95 {fill['p95']:.2f}초 | 최대 {fill['max']:.2f}초 ({fill['count']}건)")
+            tripped = {name: st for name, st in breaker_stats().items() if st["state"] != "closed" or st["trips"]}
+            if tripped:
+                print("[차단기] " + " | ".join(f"{name}: {st['state']} (차단 {st['trips']}회, 거부 {st['rejected']}건)" for name, st in tripped.items()))
+            print(f"--- [{now.strftime('%H:%M:%S')}] 사이클 완료 ({deadline.elapsed():.1f}초 / 예산 {CYCLE_BUDGET_SECONDS}초). 다음 캔들 마감을 기다립니다. ---")
 
         except Exception as e:
             print(f"[CRITICAL ERROR] 메인 루프 오류: {e}")
-            notifier.send_message(f"🚨 봇 실행 중 심각한 오류가 발생했습니다: {e}")
+            notifier.send_message(f"🚨 봇 실행 중 심각한 오류가 발생했습니다: {e}", priority=PRIORITY_ALERT)
             time.sleep(60)
 
 if __name__ == "__main__":
@@ -1,12 +1,17 @@
 # main.py
 import time
 import os
+import threading
 from dotenv import load_dotenv
 import python_bithumb
+import bithumb_transport
+bithumb_transport.install() # 빗썸 요청은 모두 공용 연결 풀/요청 한도를 거침
 from slack_bot import SlackNotifier
 from trade_manager import TradeManager
 from candlestick_trader import CandlestickTrader
 from market_scanner import MarketScanner
+from candle_store import shared_store as candle_store
+from candle_scheduler import CandleScheduler, closed_candles
 from datetime import datetime, time as dt_time
 
 load_dotenv()
@@ -14,7 +19,7 @@ load_dotenv()
 # --- 봇 설정 ---
 TIMEFRAME = "minute15"
 STOP_LOSS_PERCENT = 1.5
-TIME_INTERVAL_SECONDS = 900 # 15분
+SETTLE_SECONDS = 3 # 캔들 마감 후 거래소 집계를 기다리는 시간
 
 def main():
     # 1. 모듈 초기화
@@ -22,6 +27,7 @@ def main():
         notifier = SlackNotifier()
         manager = TradeManager()
         scanner = MarketScanner()
+        scanner.asset_cache.start_background_refresh() # 출금 수수료 캐시 주기적 갱신
         bithumb_api = python_bithumb.Bithumb(
             access_key=os.getenv("BITHUMB_API_KEY"),
             secret_key=os.getenv("BITHUMB_SECRET_KEY")
@@ -36,11 +42,61 @@ def main():
         "secondary": {"ticker": None, "in_position": False, "purchase_price": 0, "capital_alloc": 0.3} # 부종목 자금 30%
     }
     last_scan_date = None
+    order_lock = threading.Lock()
+    scheduler = CandleScheduler(TIMEFRAME, settle_seconds=SETTLE_SECONDS)
     
+    def process_position(pos: dict, boundary: datetime):
+        """한 포지션의 매수/매도/손절 판단 (스케줄러가 포지션별로 동시에 실행)"""
+        # 1. 데이터 가져오기 (판단은 마감된 캔들로, 가격은 최신 체결가로)
+        latest_df = candle_store.get_ohlcv(pos["ticker"], TIMEFRAME, count=31)
+        df = closed_candles(latest_df, boundary)
+        if df is None or len(df) < 3:
+            return
+
+        current_price = latest_df.iloc[-1]['close']
+
+        # 2. 손절매 로직 (포지션 보유 시)
+        if pos["in_position"]:
+            if manager.check_stop_loss(current_price, pos["purchase_price"], STOP_LOSS_PERCENT):
+                coin_balance = bithumb_api.get_balance(pos["ticker"].split('-')[1])
+                if coin_balance > 0:
+                    # ... (손절매도 로직: 알림, 로그 기록 등) ...
+                    pos["in_position"] = False
+                    return # 손절했으면 이번 턴은 종료
+
+        # 3. 캔들 분석기를 통한 매매 결정
+        trader = CandlestickTrader(df)
+        decision = trader.get_decision()
+
+        manager.log_trade(pos["ticker"], decision, current_price) # 모든 판단 기록
+
+        # 4. 주문 실행 (각 종목별로 독립적)
+        if decision == "buy" and not pos["in_position"]:
+            # 두 종목이 동시에 매수해도 잔고 조회~주문은 하나씩 처리 (같은 잔고로 중복 배분 방지)
+            with order_lock:
+                total_krw = bithumb_api.get_balance("KRW")
+                investment_amount = total_krw * pos["capital_alloc"] # 할당된 자금 비율만큼만 투자
+
+                if investment_amount > 5000:
+                    bithumb_api.buy_market_order(pos["ticker"], investment_amount)
+
+                    pos["in_position"] = True
+                    pos["purchase_price"] = current_price
+                    volume = investment_amount / current_price
+                    notifier.report_trade(pos["ticker"], "buy", current_price, volume)
+                    manager.log_trade(pos["ticker"], "buy", current_price, volume)
+
+        elif decision == "sell" and pos["in_position"]:
+            coin_balance = bithumb_api.get_balance(pos["ticker"].split('-')[1])
+            if coin_balance > 0:
+                # ... (이익실현 매도 로직: 알림, 로그 기록 등) ...
+                pos["in_position"] = False
+
     notifier.send_message(f"📈 최종 결합 전략 자동매매 봇을 시작합니다. (TIMEFRAME: {TIMEFRAME})")
 
     while True:
         try:
+            boundary = scheduler.wait_for_next_close() # 캔들 마감 + 정산 대기 시각까지 대기
             now = datetime.now()
             
             # --- 매일 오전 9시 5분, 오늘의 주/부종목 선정 ---
@@ -56,55 +112,14 @@ def main():
                 else:
                     notifier.send_message(f"🐻 시장 상황이 좋지 않아 금일 거래 종목을 선정하지 않았습니다.")
             
-            # --- ✨ 각 포지션을 개별적으로 순회하며 매매 판단 ---
-            for key, pos in positions.items():
-                if not pos["ticker"]: # 선정된 종목이 없으면 건너뛰기
-                    continue
-
-                # 1. 데이터 가져오기
-                df = python_bithumb.get_ohlcv(pos["ticker"], TIMEFRAME, count=30)
-                if df is None or len(df) < 3:
-                    continue
-                
-                current_price = df.iloc[-1]['close']
-
-                # 2. 손절매 로직 (포지션 보유 시)
-                if pos["in_position"]:
-                    if manager.check_stop_loss(current_price, pos["purchase_price"], STOP_LOSS_PERCENT):
-                        coin_balance = bithumb_api.get_balance(pos["ticker"].split('-')[1])
-                        if coin_balance > 0:
-                            # ... (손절매도 로직: 알림, 로그 기록 등) ...
-                            pos["in_position"] = False
-                            continue # 손절했으면 이번 턴은 종료
-
-                # 3. 캔들 분석기를 통한 매매 결정
-                trader = CandlestickTrader(df)
-                decision = trader.get_decision()
-
-                manager.log_trade(pos["ticker"], decision, current_price) # 모든 판단 기록
-
-                # 4. 주문 실행 (각 종목별로 독립적)
-                if decision == "buy" and not pos["in_position"]:
-                    total_krw = bithumb_api.get_balance("KRW")
-                    investment_amount = total_krw * pos["capital_alloc"] # 할당된 자금 비율만큼만 투자
-                    
-                    if investment_amount > 5000:
-                        bithumb_api.buy_market_order(pos["ticker"], investment_amount)
-                        
-                        pos["in_position"] = True
-                        pos["purchase_price"] = current_price
-                        volume = investment_amount / current_price
-                        notifier.report_trade(pos["ticker"], "buy", current_price, volume)
-                        manager.log_trade(pos["ticker"], "buy", current_price, volume)
-
-                elif decision == "sell" and pos["in_position"]:
-                    coin_balance = bithumb_api.get_balance(pos["ticker"].split('-')[1])
-                    if coin_balance > 0:
-                        # ... (이익실현 매도 로직: 알림, 로그 기록 등) ...
-                        pos["in_position"] = False
-
-            print(f"--- [{now.strftime('%H:%M:%S')}] 사이클 완료. 다음 캔들을 기다립니다. ---")
-            time.sleep(TIME_INTERVAL_SECONDS)
+            # --- ✨ 각 포지션을 동시에 처리하며 매매 판단 ---
+            active = {key: pos for key, pos in positions.items() if pos["ticker"]} # 선정된 종목이 없으면 건너뛰기
+            scheduler.run_concurrently({key: (lambda pos=pos: process_position(pos, boundary)) for key, pos in active.items()}, boundary)
+
+            lag = scheduler.lag_stats()
+            if lag["count"]:
+                print(f"[스케줄러] 캔들 마감 → 판단 지연: 최근 {lag['last']:.1f}초 | 평균 {lag['mean']:.1f}초 | 최대 {lag['max']:.1f}초")
+            print(f"--- [{now.strftime('%H:%M:%S')}] 사이클 완료. 다음 캔들 마감을 기다립니다. ---")
 
         except Exception as e:
             print(f"[CRITICAL ERROR] 메인 루프 오류: {e}")
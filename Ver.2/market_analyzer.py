@@ -1,38 +1,65 @@
 # market_analyzer.py
 import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import pandas_ta as ta
-import python_bithumb
+from candle_store import shared_store, candle_start, next_candle_boundary
+from gemini_cache import shared_cache
+from indicators import IndicatorEngine
+from circuit_breaker import breakers, CircuitOpenError
 import google.generativeai as genai
 from dotenv import load_dotenv
 
 load_dotenv()
 
+REGIME_INTERVALS = ("minute5", "minute15", "hour") # 시장 국면 판단에 쓰는 시간대
+GEMINI_TIMEOUT = 20.0 # Gemini 요청 하나당 최대 대기 시간(초)
+
 class MarketAnalyzer:
-    def __init__(self):
+    def __init__(self, candle_store=None, response_cache=None):
         """Gemini AI를 이용한 시장 분석기"""
+        self.candle_store = candle_store or shared_store
+        self.response_cache = response_cache or shared_cache
+        self.indicators = IndicatorEngine({"SMA_20": ("sma", 20), "SMA_60": ("sma", 60), "RSI_14": ("rsi", 14)})
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY가 .env 파일에 설정되지 않았습니다.")
 
         genai.configure(api_key=self.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model_name = 'gemini-1.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def _get_chart_frames(self, ticker: str, count: int = 100) -> dict:
+        """
+        분석에 쓸 5분/15분/1시간봉을 준비합니다. {간격: DataFrame}
+        5분봉 한 번만 받아와 15분/1시간봉은 로컬에서 묶고, 이력이 부족한 간격만 동시에 직접 요청합니다.
+        """
+        try:
+            frames = self.candle_store.get_resampled(ticker, REGIME_INTERVALS, count=count, source="minute5")
+        except Exception as e:
+            print(f"[분석가 경고] 5분봉 재구성 실패, 시간대별로 직접 요청합니다: {e}")
+            frames = {}
 
-    def _get_chart_summary(self, ticker: str, interval: str) -> str:
-        """차트 데이터를 가져와 요약 텍스트를 생성합니다."""
+        missing = [interval for interval in REGIME_INTERVALS if interval not in frames]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                futures = {interval: executor.submit(self.candle_store.get_ohlcv, ticker, interval, count) for interval in missing}
+                for interval, future in futures.items():
+                    try:
+                        frames[interval] = future.result()
+                    except Exception:
+                        frames[interval] = None
+        return frames
+
+    def _get_chart_summary(self, ticker: str, interval: str, df: pd.DataFrame) -> str:
+        """차트 데이터로 요약 텍스트를 생성합니다."""
         try:
-            df = python_bithumb.get_ohlcv(ticker, interval, count=100)
             if df is None or df.empty:
                 return "데이터 없음"
 
-            # 주요 지표 계산
-            df.ta.sma(length=20, append=True) # 20 이평선
-            df.ta.sma(length=60, append=True) # 60 이평선
-            df.ta.rsi(length=14, append=True) # 14 RSI
-
-            latest = df.iloc[-1]
+            # 주요 지표 (새로 마감된 캔들만 반영해 누적 갱신)
+            latest = self.indicators.sync(ticker, interval, df)
             summary = (
-                f"현재가: {latest['close']:,.0f}, "
+                f"현재가: {df['close'].iloc[-1]:,.0f}, "
                 f"20-MA: {latest['SMA_20']:,.0f}, "
                 f"60-MA: {latest['SMA_60']:,.0f}, "
                 f"RSI: {latest['RSI_14']:.2f}"
@@ -45,11 +72,39 @@ class MarketAnalyzer:
         """
         여러 시간대 차트를 분석하여 현재 시장 국면을 판단합니다.
         'bullish', 'bearish', 'neutral' 중 하나를 반환합니다.
+        같은 5분봉 안에서는 캐시된 판단을 재사용합니다.
         """
+        # 프롬프트에는 진행 중인 캔들 값이 들어가므로, 각 시간대의 현재 캔들 시각으로 입력을 식별
+        cache_inputs = {
+            "task": "market_regime",
+            "ticker": ticker,
+            "candles": {interval: candle_start(interval).isoformat() for interval in REGIME_INTERVALS},
+        }
+        expires_at = next_candle_boundary("minute5").timestamp()
+
+        try:
+            text = self.response_cache.get_or_call(self.model_name, cache_inputs, lambda: self._request_market_regime(ticker), expires_at)
+            decision = text.strip().lower()
+
+            if decision in ["bullish", "bearish", "neutral"]:
+                print(f"🧠 [분석가 판단] 현재 시장 국면: {decision.upper()}")
+                return decision
+            else:
+                print(f"[분석가 경고] AI가 유효하지 않은 답변을 했습니다: {decision}")
+                return "neutral" # 오류 시 안전하게 중립으로 처리
+        except Exception as e:
+            print(f"[분석가 오류] Gemini AI 요청 중 오류 발생: {e}")
+            return "neutral"
+
+    def _request_market_regime(self, ticker: str) -> str:
+        """차트 요약으로 프롬프트를 만들어 Gemini에 시장 국면을 묻습니다. (캐시 미스일 때만 호출)"""
+        if breakers["gemini"].retry_in() > 0:
+            raise CircuitOpenError("gemini", breakers["gemini"].retry_in()) # 차트 준비도 건너뜀
         print("[분석가] 5분, 15분, 1시간봉 데이터 종합 분석 중...")
-        summary_5m = self._get_chart_summary(ticker, "minute5")
-        summary_15m = self._get_chart_summary(ticker, "minute15")
-        summary_1h = self._get_chart_summary(ticker, "hour") # 빗썸은 1시간봉을 'hour'로 요청
+        frames = self._get_chart_frames(ticker)
+        summary_5m = self._get_chart_summary(ticker, "minute5", frames.get("minute5"))
+        summary_15m = self._get_chart_summary(ticker, "minute15", frames.get("minute15"))
+        summary_1h = self._get_chart_summary(ticker, "hour", frames.get("hour")) # 빗썸은 1시간봉을 'hour'로 요청
 
         prompt = f"""
         당신은 최고의 암호화폐 시장 분석가입니다. 아래 제공된 여러 시간대의 차트 데이터를 종합하여, 현재 시장의 전반적인 국면이 'bullish'(상승 우세), 'bearish'(하락 우세), 'neutral'(중립/횡보) 중 무엇인지 판단해주세요. 오직 세 단어 중 하나로만 답변해야 합니다.
@@ -68,16 +123,6 @@ class MarketAnalyzer:
         [시장 국면 판단]
         """
 
-        try:
-            response = self.model.generate_content(prompt)
-            decision = response.text.strip().lower()
-
-            if decision in ["bullish", "bearish", "neutral"]:
-                print(f"🧠 [분석가 판단] 현재 시장 국면: {decision.upper()}")
-                return decision
-            else:
-                print(f"[분석가 경고] AI가 유효하지 않은 답변을 했습니다: {decision}")
-                return "neutral" # 오류 시 안전하게 중립으로 처리
-        except Exception as e:
-            print(f"[분석가 오류] Gemini AI 요청 중 오류 발생: {e}")
-            return "neutral"
\ No newline at end of file
+        # 응답이 늦으면 GEMINI_TIMEOUT초에서 끊고, 계속 실패하면 차단기가 열려 한동안 바로 기본값(중립/관망)으로 처리
+        response = breakers["gemini"].call(self.model.generate_content, prompt, request_options={"timeout": GEMINI_TIMEOUT})
+        return response.text
@@ -1,104 +1,174 @@
 # market_scanner.py
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import python_bithumb
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from asset_cache import AssetCache
+from candle_store import shared_store
+from indicators import IndicatorEngine
+from universe_snapshot import fetch_ticker_snapshot, build_daily_table, score_momentum, score_rebound, top_n_indices
 
 class MarketScanner:
-    def select_daily_tickers(self) -> (str or None, str or None):
+    # 수수료 필터링을 위한 기준값 설정
+    HYPOTHETICAL_TRADE_AMOUNT = 100000  # 10만원
+    BITHUMB_FEE_RATE = 0.0025  # 0.25%
+    FEE_THRESHOLD = HYPOTHETICAL_TRADE_AMOUNT * BITHUMB_FEE_RATE # 기준 거래 수수료 (250원)
+
+    def __init__(self, max_workers: int = 8, ticker_timeout: float = 5.0, scan_timeout: float = 60.0, candle_store=None):
+        """
+        유망 종목 스캐너 초기화
+        max_workers가 1 이하이면 기존처럼 한 종목씩 순차 스캔하고,
+        그보다 크면 여러 종목을 동시에 스캔합니다. (실행 파일에서 bithumb_transport.install()을 불러 두면 요청 간격이 빗썸 한도에 맞춰 조절됨)
+        """
+        self.max_workers = max_workers
+        self.ticker_timeout = ticker_timeout # 종목 하나당 최대 대기 시간(초)
+        self.scan_timeout = scan_timeout # 전체 스캔 최대 대기 시간(초)
+        self.candle_store = candle_store or shared_store
+        self.indicators = IndicatorEngine({"EMA_5": ("ema", 5), "EMA_20": ("ema", 20)})
+        self.asset_cache = AssetCache(fetch_fn=self._fetch_asset_status) # 출금 수수료/입출금 상태 캐시
+
+    def select_daily_tickers(self, n: int = 2) -> tuple:
         """
-        매일 아침 실행되어 그날 거래할 가장 유망한 2개 종목을 선정합니다.
+        매일 아침 실행되어 그날 거래할 가장 유망한 n개 종목을 선정합니다.
         시장 국면에 따라 다른 전략을 사용하며, 수수료가 과도한 종목은 제외합니다.
-        (주종목, 부종목) 형태의 튜플로 반환합니다.
+        점수 순서대로 n개짜리 튜플로 반환합니다. (n=2이면 (주종목, 부종목), 모자라면 None으로 채움)
         """
         try:
-            # 1. 비트코인 일봉으로 시장 국면 판단 (5일 이평선 > 20일 이평선)
-            df_btc = python_bithumb.get_ohlcv("KRW-BTC", "day", count=30)
-            df_btc.ta.ema(length=5, append=True)
-            df_btc.ta.ema(length=20, append=True)
-            latest_btc = df_btc.iloc[-1]
-
-            all_tickers = python_bithumb.get_market_all()
-            krw_tickers = [t['market'] for t in all_tickers if t['market'].startswith("KRW-")]
-            scored_tickers = []
-
-            # 수수료 필터링을 위한 기준값 설정
-            HYPOTHETICAL_TRADE_AMOUNT = 100000  # 10만원
-            BITHUMB_FEE_RATE = 0.0025  # 0.25%
-            FEE_THRESHOLD = HYPOTHETICAL_TRADE_AMOUNT * BITHUMB_FEE_RATE # 기준 거래 수수료 (250원)
-
-            # 2. 시장 국면에 따라 스캐닝 전략 변경
-            if latest_btc['EMA_5'] >= latest_btc['EMA_20']:
-                # 2-A. 상승장 전략: 전날의 상승 모멘텀이 가장 강한 종목 Top 2 선정
-                print("[스캐너] 상승장 감지. 모멘텀 스캐닝을 시작합니다.")
-                for ticker in krw_tickers:
-                    if ticker == "KRW-BTC": continue
-                    
-                    # --- 수수료 검증 로직 ---
-                    if self._is_fee_too_high(ticker, FEE_THRESHOLD):
-                        continue # 수수료가 비싸면 건너뛰기
-
-                    df_ticker = python_bithumb.get_ohlcv(ticker, "day", count=2)
-                    if df_ticker is None or len(df_ticker) < 2: continue
-                    
-                    yesterday = df_ticker.iloc[-2]
-                    price_change_ratio = (yesterday['close'] - yesterday['open']) / yesterday['open']
-                    if price_change_ratio > 0.03: # 최소 3% 이상 상승
-                        score = price_change_ratio * yesterday['value']
-                        scored_tickers.append((score, ticker))
-            else:
-                # 2-B. 하락장 전략: 하락 속에서도 반등 시도(양봉+아래꼬리)를 한 종목 Top 2 선정
-                print("[스캐너] 하락장 감지. 반등 시도 종목 스캐닝을 시작합니다.")
-                for ticker in krw_tickers:
-                    if ticker == "KRW-BTC": continue
-
-                    # --- 수수료 검증 로직 ---
-                    if self._is_fee_too_high(ticker, FEE_THRESHOLD):
-                        continue
-
-                    df_ticker = python_bithumb.get_ohlcv(ticker, "day", count=2)
-                    if df_ticker is None or len(df_ticker) < 2: continue
-
-                    yesterday = df_ticker.iloc[-2]
-                    is_positive_candle = yesterday['close'] > yesterday['open']
-                    is_enough_volume = yesterday['value'] > 1_000_000_000
-                    
-                    if is_positive_candle and is_enough_volume:
-                        lower_tail = min(yesterday['open'], yesterday['close']) - yesterday['low']
-                        score = lower_tail * yesterday['value']
-                        scored_tickers.append((score, ticker))
-
-            # 3. 점수 순으로 정렬하여 최종 2개 종목 선정
-            scored_tickers.sort(key=lambda x: x[0], reverse=True)
-            
-            primary_ticker = scored_tickers[0][1] if len(scored_tickers) > 0 else None
-            secondary_ticker = scored_tickers[1][1] if len(scored_tickers) > 1 else None
-            
-            return primary_ticker, secondary_ticker
+            is_bull_market = self._is_bull_market()
+            krw_tickers = self._get_krw_tickers()
+
+            # 전일 일봉을 모아 하나의 표로 만든 뒤 한 번에 점수 계산
+            frames = self._collect(krw_tickers, self._fetch_daily_candles)
+            table = build_daily_table(frames, row=-2)
+            return self._pick_top_tickers(table, is_bull_market, n)
 
         except Exception as e:
             print(f"[스캐너 오류] 유망 종목 선정 중 오류 발생: {e}")
-            return None, None
+            return (None,) * n
 
-    def _is_fee_too_high(self, ticker: str, threshold: float) -> bool:
+    def select_intraday_tickers(self, n: int = 2) -> tuple:
         """
-        출금 수수료의 원화 가치가 기준치(threshold)보다 높은지 확인하는 헬퍼 함수
+        당일 누적 시세 스냅샷(일괄 요청 몇 번)만으로 장중에 종목을 다시 선정합니다.
+        점수 기준은 select_daily_tickers와 같고, 전일 대신 당일 캔들을 사용합니다.
         """
         try:
-            coin_symbol = ticker.split('-')[1]
-            asset_info = python_bithumb.get_asset_status(coin_symbol)
-            time.sleep(0.1) # API 요청 간격
-
-            if asset_info:
-                withdrawal_fee = float(asset_info.get('withdrawal_fee', 0))
-                current_price = python_bithumb.get_current_price(ticker)
-                
-                if withdrawal_fee > 0 and current_price:
-                    withdrawal_fee_krw = withdrawal_fee * current_price
-                    if withdrawal_fee_krw > threshold:
-                        print(f"[필터링] {ticker}: 출금 수수료({withdrawal_fee_krw:,.0f}원)가 과도하여 제외합니다.")
-                        return True
-            return False
+            is_bull_market = self._is_bull_market()
+            krw_tickers = self._get_krw_tickers()
+            table = fetch_ticker_snapshot(krw_tickers)
+            return self._pick_top_tickers(table, is_bull_market, n)
         except Exception as e:
-            print(f"[수수료 조회 오류] {ticker}: {e}")
-            return False # 오류 발생 시 일단 통과
\ No newline at end of file
+            print(f"[스캐너 오류] 장중 종목 선정 중 오류 발생: {e}")
+            return (None,) * n
+
+    def _is_bull_market(self) -> bool:
+        """비트코인 일봉으로 시장 국면 판단 (5일 이평선 > 20일 이평선)"""
+        df_btc = self.candle_store.get_ohlcv("KRW-BTC", "day", count=30)
+        latest_btc = self.indicators.sync("KRW-BTC", "day", df_btc)
+        return latest_btc['EMA_5'] >= latest_btc['EMA_20']
+
+    def _get_krw_tickers(self) -> list:
+        """비트코인을 제외한 원화 마켓 종목 목록"""
+        all_tickers = python_bithumb.get_market_all()
+        return [t['market'] for t in all_tickers if t['market'].startswith("KRW-") and t['market'] != "KRW-BTC"]
+
+    def _fetch_daily_candles(self, ticker: str):
+        """종목의 최근 일봉 2개를 가져옵니다."""
+        return self.candle_store.get_ohlcv(ticker, "day", count=2)
+
+    def _pick_top_tickers(self, table, is_bull_market: bool, n: int = 2) -> tuple:
+        """
+        시장 국면에 맞는 점수를 열 단위로 계산하고, 수수료가 과도한 종목을 뺀 상위 n개를 고릅니다.
+        """
+        if is_bull_market:
+            # 상승장 전략: 상승 모멘텀이 가장 강한 종목 (최소 3% 이상 상승)
+            print("[스캐너] 상승장 감지. 모멘텀 스캐닝을 시작합니다.")
+            scores = score_momentum(table, min_change=0.03)
+        else:
+            # 하락장 전략: 하락 속에서도 반등 시도(양봉+아래꼬리)를 한 종목
+            print("[스캐너] 하락장 감지. 반등 시도 종목 스캐닝을 시작합니다.")
+            scores = score_rebound(table, min_value=1_000_000_000)
+
+        # 수수료 필터: 후보 종목의 자산 정보만 캐시에 채운 뒤 전체 표를 한 번에 판정
+        symbols = [ticker.split('-')[1] for ticker in table.index]
+        candidates = [symbols[i] for i in np.flatnonzero(~np.isnan(scores))]
+        self.asset_cache.ensure(candidates)
+
+        prices = table["close"].to_numpy(dtype=float)
+        self.asset_cache.update_prices(dict(zip(symbols, prices)))
+        fees_krw = self.asset_cache.withdrawal_fees_krw(symbols, prices)
+        with np.errstate(invalid="ignore"):
+            is_fee_too_high = fees_krw > self.FEE_THRESHOLD # 모르는 값(NaN)은 일단 통과
+        for idx in np.flatnonzero(is_fee_too_high & ~np.isnan(scores)):
+            print(f"[필터링] {table.index[idx]}: 출금 수수료({fees_krw[idx]:,.0f}원)가 과도하여 제외합니다.")
+        scores = np.where(is_fee_too_high, np.nan, scores)
+
+        selected = [table.index[idx] for idx in top_n_indices(scores, n)]
+        selected += [None] * (n - len(selected))
+        return tuple(selected)
+
+    def _collect(self, tickers: list, fetch_fn) -> dict:
+        """종목별 fetch_fn 결과를 {종목: 결과} 형태로 모읍니다."""
+        if self.max_workers > 1:
+            return self._collect_concurrent(tickers, fetch_fn)
+        return self._collect_sequential(tickers, fetch_fn)
+
+    def _collect_sequential(self, tickers: list, fetch_fn) -> dict:
+        """한 종목씩 순서대로 가져옵니다."""
+        results = {}
+        for ticker in tickers:
+            try:
+                results[ticker] = fetch_fn(ticker)
+            except Exception as e:
+                print(f"[스캐너 경고] {ticker} 스캔 실패: {e}")
+        return results
+
+    def _collect_concurrent(self, tickers: list, fetch_fn) -> dict:
+        """
+        스레드 풀로 여러 종목을 동시에 가져옵니다.
+        종목별 ticker_timeout, 전체 scan_timeout을 넘긴 종목은 버리고 받은 결과만 반환합니다.
+        """
+        started_at = {}
+
+        def run(ticker):
+            started_at[ticker] = time.monotonic()
+            return fetch_fn(ticker)
+
+        results = {}
+        failed, timed_out = 0, 0
+        scan_start = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(run, ticker): ticker for ticker in tickers}
+            pending = set(futures)
+            while pending:
+                if time.monotonic() - scan_start > self.scan_timeout:
+                    timed_out += len(pending)
+                    break
+
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker = futures[future]
+                    try:
+                        results[ticker] = future.result()
+                    except Exception as e:
+                        print(f"[스캐너 경고] {ticker} 스캔 실패: {e}")
+                        failed += 1
+
+                # 너무 오래 걸리는 종목은 결과를 기다리지 않음
+                now = time.monotonic()
+                for future in list(pending):
+                    start = started_at.get(futures[future])
+                    if start is not None and now - start > self.ticker_timeout:
+                        pending.discard(future)
+                        timed_out += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.monotonic() - scan_start
+        print(f"[스캐너] {len(tickers)}개 종목 동시 스캔 완료 ({elapsed:.1f}초, 실패 {failed}, 시간초과 {timed_out})")
+        return results
+
+    def _fetch_asset_status(self, coin_symbol: str):
+        """자산 캐시가 사용하는 입출금 상태 조회 함수"""
+        return python_bithumb.get_asset_status(coin_symbol)
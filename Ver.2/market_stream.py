@@ -0,0 +1,281 @@
+# market_stream.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+import numpy as np
+import pandas as pd
+from candle_store import INTERVAL_SECONDS, CANDLE_DTYPE, OHLCV_COLUMNS
+
+try:
+    import websocket # pip install websocket-client
+except ImportError:
+    websocket = None
+
+# 빗썸 공개 WebSocket (로컬 테스트 서버로 바꾸려면 BITHUMB_WS_URL 환경 변수 사용)
+BITHUMB_WS_URL = os.getenv("BITHUMB_WS_URL", "wss://ws-api.bithumb.com/websocket/v1")
+
+class CandleBuilder:
+    def __init__(self, interval: str, history: int = 200):
+        """
+        체결 데이터를 한 종목·한 간격의 OHLCV 캔들로 묶습니다.
+        스트림 도중에 시작된 첫 캔들은 앞부분 체결이 빠져 있으므로 complete=False로 표시합니다.
+        """
+        self.interval = interval
+        self.step = INTERVAL_SECONDS[interval] * 1_000_000_000
+        self.current = None
+        self.complete = False # 현재 캔들을 시작부터 봤는지
+        self.closed = deque(maxlen=history)
+        self.last_closed_ts = None
+
+    def on_trade(self, ts: int, price: float, volume: float) -> list:
+        """체결 하나를 반영하고, 이 체결로 마감된 캔들 목록을 반환합니다. (ts: 현지 시각 ns)"""
+        bucket = ts // self.step * self.step
+        finished = []
+        if self.last_closed_ts is not None and bucket <= self.last_closed_ts:
+            return finished # 이미 마감된 캔들의 늦은(또는 재연결 후 다시 받은) 체결은 무시
+        if self.current is not None and bucket > self.current["ts"]:
+            finished.append(self._close())
+            self.complete = True
+        if self.current is None:
+            self.current = {"ts": bucket, "open": price, "high": price, "low": price, "close": price, "volume": 0.0, "value": 0.0}
+        elif bucket < self.current["ts"]:
+            return finished
+
+        bar = self.current
+        bar["high"] = max(bar["high"], price)
+        bar["low"] = min(bar["low"], price)
+        bar["close"] = price
+        bar["volume"] += volume
+        bar["value"] += price * volume
+        return finished
+
+    def close_due(self, now_ts: int) -> list:
+        """체결이 없어도 끝난 캔들을 마감합니다. (now_ts: 현지 시각 ns)"""
+        if self.current is not None and now_ts >= self.current["ts"] + self.step:
+            candle = self._close()
+            self.complete = True
+            return [candle]
+        return []
+
+    def reset(self):
+        """연결이 끊겼을 때 호출: 진행 중인 캔들은 체결이 빠졌을 수 있어 버립니다."""
+        self.current = None
+        self.complete = False
+
+    def _close(self) -> dict:
+        candle = dict(self.current, complete=self.complete, end=self.current["ts"] + self.step)
+        self.closed.append(candle)
+        self.last_closed_ts = candle["ts"]
+        self.current = None
+        return candle
+
+class MarketStream:
+    def __init__(self, tickers=(), intervals=("minute15",), url: str = BITHUMB_WS_URL, on_candle_closed=None,
+                 grace_seconds: float = 1.0, reconnect_max_delay: float = 30.0):
+        """
+        빗썸 공개 WebSocket 체결 스트림을 받아 메모리에서 캔들을 만드는 수집기
+        캔들이 마감될 때마다 on_candle_closed(ticker, interval, candle)를 호출합니다.
+        candle: {"ts", "end"(현지 시각 ns), "open", "high", "low", "close", "volume", "value", "complete"}
+        """
+        self.url = url
+        self.intervals = tuple(intervals)
+        self.grace_ns = int(grace_seconds * 1_000_000_000)
+        self.reconnect_max_delay = reconnect_max_delay
+        self.listeners = [on_candle_closed] if on_candle_closed else []
+        self.tickers = set(tickers)
+        self.builders = defaultdict(dict) # ticker -> {interval: CandleBuilder}
+        self.prices = {} # ticker -> (현재가, 수신 시각)
+        self.lock = threading.Lock()
+        self.ws = None
+        self.connected = threading.Event()
+        self.stop_event = threading.Event()
+        self.reconnects = 0
+        self.threads = []
+
+    def subscribe(self, callback):
+        """캔들 마감 이벤트를 받을 함수를 추가합니다."""
+        self.listeners.append(callback)
+
+    def set_tickers(self, tickers):
+        """구독 종목을 바꿉니다. 달라졌으면 다시 연결해 새 종목으로 구독합니다."""
+        tickers = {t for t in tickers if t}
+        with self.lock:
+            if tickers == self.tickers:
+                return
+            self.tickers = tickers
+            for ticker in list(self.builders):
+                if ticker not in tickers:
+                    del self.builders[ticker]
+        self._drop_connection()
+
+    def start(self):
+        """수신/마감 처리 스레드를 시작합니다."""
+        if websocket is None:
+            raise ImportError("MarketStream을 쓰려면 websocket-client 패키지가 필요합니다.")
+        self.stop_event.clear()
+        self.threads = [
+            threading.Thread(target=self._run, name="market-stream", daemon=True),
+            threading.Thread(target=self._close_loop, name="market-stream-close", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        print(f"[스트림] {self.url} 수신 시작 (간격: {', '.join(self.intervals)})")
+
+    def stop(self):
+        self.stop_event.set()
+        self._drop_connection()
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+    def last_price(self, ticker: str, max_age: float = None) -> float or None:
+        """가장 최근 체결가 (max_age초보다 오래됐으면 None)"""
+        entry = self.prices.get(ticker)
+        if entry is None or (max_age is not None and time.time() - entry[1] > max_age):
+            return None
+        return entry[0]
+
+    def has_closed(self, ticker: str, interval: str, end: pd.Timestamp) -> bool:
+        """end 시각에 끝나는 캔들을 스트림에서 온전히 마감했는지"""
+        with self.lock:
+            builder = self.builders.get(ticker, {}).get(interval)
+            return builder is not None and any(c["end"] == end.value and c["complete"] for c in builder.closed)
+
+    def candles(self, ticker: str, interval: str) -> pd.DataFrame or None:
+        """스트림으로 만든 마감 캔들 (get_ohlcv와 같은 컬럼)"""
+        with self.lock:
+            builder = self.builders.get(ticker, {}).get(interval)
+            closed = list(builder.closed) if builder else []
+        if not closed:
+            return None
+        df = pd.DataFrame(closed).set_index("ts")
+        df.index = pd.DatetimeIndex(df.index.values.astype("datetime64[ns]"))
+        return df[["open", "high", "low", "close", "volume", "value"]]
+
+    def handle_message(self, raw):
+        """WebSocket 메시지 하나를 처리합니다. (체결 메시지만 사용)"""
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return
+        if msg.get("type") != "trade":
+            return
+        ticker = msg.get("code")
+        price = float(msg["trade_price"])
+        volume = float(msg["trade_volume"])
+        ts = _local_ns(int(msg.get("trade_timestamp") or msg.get("timestamp")))
+        self.prices[ticker] = (price, time.time())
+
+        events = []
+        with self.lock:
+            if ticker not in self.tickers:
+                return
+            for interval in self.intervals:
+                builder = self._builder(ticker, interval)
+                events += [(ticker, interval, candle) for candle in builder.on_trade(ts, price, volume)]
+        self._publish(events)
+
+    def _builder(self, ticker: str, interval: str) -> CandleBuilder:
+        builders = self.builders[ticker]
+        if interval not in builders:
+            builders[interval] = CandleBuilder(interval)
+        return builders[interval]
+
+    def _subscribe_message(self) -> str:
+        with self.lock:
+            codes = sorted(self.tickers)
+        return json.dumps([{"ticket": str(uuid.uuid4())}, {"type": "trade", "codes": codes}, {"format": "DEFAULT"}])
+
+    def _run(self):
+        """연결 → 구독 → 수신을 반복하고, 끊기면 점점 늘어나는 간격으로 다시 연결합니다."""
+        delay = 1.0
+        while not self.stop_event.is_set():
+            if not self.tickers:
+                self.stop_event.wait(1.0)
+                continue
+            try:
+                self.ws = websocket.create_connection(self.url, timeout=10)
+                self.ws.send(self._subscribe_message())
+                self.connected.set()
+                delay = 1.0
+                while not self.stop_event.is_set():
+                    try:
+                        raw = self.ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        continue
+                    if not raw:
+                        break # 서버가 연결을 닫음
+                    self.handle_message(raw)
+            except Exception as e:
+                if not self.stop_event.is_set():
+                    print(f"[스트림 경고] 연결 오류: {e}")
+            finally:
+                self.connected.clear()
+                self._drop_connection()
+                with self.lock:
+                    for builders in self.builders.values():
+                        for builder in builders.values():
+                            builder.reset()
+
+            if not self.stop_event.is_set():
+                self.reconnects += 1
+                print(f"[스트림] {delay:.0f}초 후 다시 연결합니다.")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+
+    def _close_loop(self):
+        """체결이 뜸한 종목도 캔들 마감 시각이 지나면 마감 이벤트를 보냅니다."""
+        while not self.stop_event.wait(0.5):
+            now_ts = _local_ns(int(time.time() * 1000)) - self.grace_ns
+            events = []
+            with self.lock:
+                for ticker, builders in self.builders.items():
+                    for interval, builder in builders.items():
+                        events += [(ticker, interval, candle) for candle in builder.close_due(now_ts)]
+            self._publish(events)
+
+    def _publish(self, events: list):
+        for ticker, interval, candle in events:
+            for callback in self.listeners:
+                try:
+                    callback(ticker, interval, candle)
+                except Exception as e:
+                    print(f"[스트림 오류] 캔들 마감 처리 중 오류: {e}")
+
+    def _drop_connection(self):
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+def candle_array(candle: dict) -> np.ndarray:
+    """스트림 캔들 하나를 캔들 저장소 형식(CANDLE_DTYPE) 배열로 변환합니다."""
+    arr = np.empty(1, dtype=CANDLE_DTYPE)
+    arr["ts"] = candle["ts"]
+    for col in OHLCV_COLUMNS:
+        arr[col] = candle[col]
+    return arr
+
+def _local_ns(epoch_ms: int) -> int:
+    """UTC 기준 ms 타임스탬프를 빗썸 캔들과 같은 현지 시각 기준 ns로 변환합니다."""
+    return (epoch_ms + time.localtime(epoch_ms // 1000).tm_gmtoff * 1000) * 1_000_000
+
+if __name__ == "__main__":
+    def print_candle(ticker, interval, candle):
+        print(f"[{ticker} {interval}] {pd.Timestamp(candle['ts'])} O:{candle['open']:,.0f} H:{candle['high']:,.0f} "
+              f"L:{candle['low']:,.0f} C:{candle['close']:,.0f} V:{candle['volume']:.4f} (완전: {candle['complete']})")
+
+    stream = MarketStream(["KRW-BTC", "KRW-ETH"], intervals=("minute1",), on_candle_closed=print_candle)
+    stream.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(f"BTC 현재가: {stream.last_price('KRW-BTC')}")
+    except KeyboardInterrupt:
+        stream.stop()
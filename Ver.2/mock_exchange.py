@@ -0,0 +1,173 @@
+# mock_exchange.py
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+class MockExchange:
+    def __init__(self, prices: dict = None, balances: dict = None, fee_rate: float = 0.0025, latency: float = 0.05,
+                 fill_delay: float = 0.2, slippage_bps: float = 5.0, lost_response_rate: float = 0.0, seed: int = None):
+        """
+        로컬 테스트용 가짜 빗썸 (python_bithumb.Bithumb과 같은 메서드/응답 형태)
+        - 시장가 주문은 fill_delay초 뒤에 현재가 ± slippage_bps(만분율) 범위에서 체결됩니다.
+        - 모든 요청은 latency초가 걸리고, lost_response_rate 확률로 주문은 접수됐는데 응답만 사라집니다.
+          (네트워크 오류 뒤 재시도가 중복 주문을 내지 않는지 확인하는 용도)
+        prices: {종목: 현재가}, set_price()로 바꿀 수 있음 / balances: {화폐: 잔고} (기본값: 100만원)
+        """
+        self.prices = dict(prices or {})
+        self.balances = dict(balances or {"KRW": 1_000_000.0})
+        self.locked = {}
+        self.fee_rate = fee_rate
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.slippage_bps = slippage_bps
+        self.lost_response_rate = lost_response_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.orders = {} # uuid -> 주문 (생성 순서 유지)
+        self.order_requests = 0
+
+    def set_price(self, ticker: str, price: float):
+        with self.lock:
+            self.prices[ticker] = price
+
+    # --- python_bithumb.Bithumb과 같은 메서드 ---
+    def get_balances(self) -> list:
+        self._delay()
+        with self.lock:
+            self._settle()
+            currencies = set(self.balances) | set(self.locked)
+            return [
+                {"currency": currency, "balance": str(self.balances.get(currency, 0.0)), "locked": str(self.locked.get(currency, 0.0)),
+                 "avg_buy_price": "0", "avg_buy_price_modified": False, "unit_currency": "KRW"}
+                for currency in sorted(currencies)
+            ]
+
+    def get_balance(self, currency: str) -> float:
+        for bal in self.get_balances():
+            if bal["currency"] == currency:
+                return float(bal["balance"])
+        return 0.0
+
+    def buy_market_order(self, ticker: str, krw_amount: float) -> dict:
+        return self._place(ticker, "bid", "price", price=float(krw_amount))
+
+    def sell_market_order(self, ticker: str, volume: float) -> dict:
+        return self._place(ticker, "ask", "market", volume=float(volume))
+
+    def get_order(self, uuid: str) -> dict:
+        self._delay()
+        with self.lock:
+            self._settle()
+            order = self.orders.get(uuid)
+            if order is None:
+                raise RuntimeError(f"주문을 찾을 수 없습니다: {uuid}")
+            return self._view(order, with_trades=True)
+
+    def get_orders(self, market=None, uuids=None, state=None, states=None, page=1, limit=100, order_by='desc') -> list:
+        self._delay()
+        wanted = set(states or ([state] if state else ["wait", "watch"]))
+        with self.lock:
+            self._settle()
+            orders = [o for o in self.orders.values()
+                      if (market is None or o["market"] == market) and (not uuids or o["uuid"] in uuids) and o["state"] in wanted]
+        if order_by == "desc":
+            orders = orders[::-1]
+        start = (page - 1) * limit
+        return [self._view(o) for o in orders[start:start + limit]]
+
+    def cancel_order(self, order_uuid: str) -> dict:
+        self._delay()
+        with self.lock:
+            self._settle()
+            order = self.orders[order_uuid]
+            if order["state"] == "wait":
+                order["state"] = "cancel"
+                self._release(order)
+            return self._view(order)
+
+    # --- 내부 동작 ---
+    def _place(self, ticker: str, side: str, ord_type: str, price: float = None, volume: float = None) -> dict:
+        self._delay()
+        with self.lock:
+            self._settle()
+            self.order_requests += 1
+            currency = ticker.split('-')[1]
+            if side == "bid":
+                if price is None or price <= 0 or self.balances.get("KRW", 0.0) < price:
+                    raise RuntimeError("Error insufficient_funds_bid: 주문가능한 금액(KRW)이 부족합니다.")
+                self._move("KRW", price)
+            else:
+                if volume is None or volume <= 0 or self.balances.get(currency, 0.0) < volume - 1e-12:
+                    raise RuntimeError(f"Error insufficient_funds_ask: 주문가능한 금액({currency})이 부족합니다.")
+                self._move(currency, volume)
+
+            order = {
+                "uuid": str(uuid.uuid4()), "side": side, "ord_type": ord_type, "market": ticker, "state": "wait",
+                "price": price, "volume": volume, "created": time.time(),
+                "created_at": datetime.now(KST).isoformat(timespec="seconds"), "trades": [],
+            }
+            self.orders[order["uuid"]] = order
+            view = self._view(order)
+        if self.random.random() < self.lost_response_rate:
+            raise ConnectionError("응답을 받지 못했습니다. (모의 네트워크 오류)")
+        return view
+
+    def _settle(self):
+        """fill_delay가 지난 대기 주문을 체결합니다. (lock 안에서 호출)"""
+        now = time.time()
+        for order in self.orders.values():
+            if order["state"] != "wait" or now - order["created"] < self.fill_delay:
+                continue
+            market_price = self.prices.get(order["market"])
+            if not market_price:
+                continue
+            slip = self.random.uniform(0, self.slippage_bps) / 10000
+            currency = order["market"].split('-')[1]
+            if order["side"] == "bid":
+                fill_price = market_price * (1 + slip)
+                funds = order["price"] / (1 + self.fee_rate)
+                volume = funds / fill_price
+                self.locked["KRW"] -= order["price"]
+                self.balances[currency] = self.balances.get(currency, 0.0) + volume
+            else:
+                fill_price = market_price * (1 - slip)
+                volume = order["volume"]
+                funds = volume * fill_price
+                self.locked[currency] -= volume
+                self.balances["KRW"] = self.balances.get("KRW", 0.0) + funds * (1 - self.fee_rate)
+            order["trades"].append({"market": order["market"], "price": str(fill_price), "volume": str(volume), "funds": str(funds),
+                                    "side": order["side"], "created_at": datetime.now(KST).isoformat(timespec="seconds")})
+            order["paid_fee"] = funds * self.fee_rate
+            order["state"] = "done" if order["side"] == "ask" else "cancel" # 시장가 매수는 남은 잔돈 때문에 cancel로 끝나는 경우가 많음
+
+    def _move(self, currency: str, amount: float):
+        self.balances[currency] = self.balances.get(currency, 0.0) - amount
+        self.locked[currency] = self.locked.get(currency, 0.0) + amount
+
+    def _release(self, order: dict):
+        currency = "KRW" if order["side"] == "bid" else order["market"].split('-')[1]
+        amount = order["price"] if order["side"] == "bid" else order["volume"]
+        self.locked[currency] -= amount
+        self.balances[currency] = self.balances.get(currency, 0.0) + amount
+
+    def _view(self, order: dict, with_trades: bool = False) -> dict:
+        executed = sum(float(t["volume"]) for t in order["trades"])
+        view = {
+            "uuid": order["uuid"], "side": order["side"], "ord_type": order["ord_type"], "market": order["market"],
+            "state": order["state"], "created_at": order["created_at"],
+            "price": None if order["price"] is None else str(order["price"]),
+            "volume": None if order["volume"] is None else str(order["volume"]),
+            "executed_volume": str(executed), "paid_fee": str(order.get("paid_fee", 0.0)),
+            "trades_count": len(order["trades"]),
+        }
+        if with_trades:
+            view["trades"] = [dict(t) for t in order["trades"]]
+        return view
+
+    def _delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
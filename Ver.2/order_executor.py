@@ -0,0 +1,319 @@
+# order_executor.py
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+# 주문 상태: pending(접수 전) → acked(거래소 접수, uuid 받음) → filled / cancelled / failed / unknown
+# (unknown은 같은 client_id로 다시 요청할 때 거래소 주문 목록으로 재확인해 acked 또는 failed로 바뀜)
+FINAL_STATES = ("filled", "cancelled", "failed", "unknown")
+RESUBMITTABLE_STATES = ("failed", "cancelled") # 거래소에 주문이 없거나 체결 없이 끝난 것이 확실한 상태
+RECONCILE_SKEW_SECONDS = 2.0 # 접수 여부를 확인할 때 거래소 시각과 로컬 시각 차이 허용 범위
+
+class OrderTicket:
+    def __init__(self, client_id: str, ticker: str, side: str, amount: float, on_done=None):
+        """
+        주문 한 건의 진행 상태와 체결 결과
+        side: "buy"(amount = 원화 금액) / "sell"(amount = 코인 수량)
+        체결 후 avg_price/filled_volume/funds/paid_fee에 거래소가 알려준 실제 값이 들어갑니다.
+        """
+        self.client_id = client_id
+        self.ticker = ticker
+        self.side = side
+        self.amount = amount
+        self.on_done = on_done
+        self.state = "pending"
+        self.uuid = None
+        self.error = None
+        self.attempts = 0
+        self.avg_price = None
+        self.filled_volume = 0.0
+        self.funds = 0.0
+        self.paid_fee = 0.0
+        self.created_at = time.time()
+        self.submitted_at = None # 첫 주문 요청을 보낸 시각
+        self.acked_at = None # 거래소가 주문을 접수한 시각 (응답 수신)
+        self.filled_at = None # 체결 완료를 확인한 시각
+        self.slow_warned = False
+        self.done = threading.Event()
+
+    def wait(self, timeout: float = None) -> "OrderTicket":
+        """주문이 끝날 때까지(체결/취소/실패) 기다립니다."""
+        self.done.wait(timeout)
+        return self
+
+    def latencies(self) -> dict:
+        """주문 요청 → 접수 → 체결 구간별 걸린 초 (아직 지나지 않은 구간은 None)"""
+        def span(start, end):
+            return end - start if start is not None and end is not None else None
+        return {
+            "submit_to_ack": span(self.submitted_at, self.acked_at),
+            "ack_to_fill": span(self.acked_at, self.filled_at),
+            "submit_to_fill": span(self.submitted_at, self.filled_at),
+        }
+
+    def __repr__(self):
+        return f"OrderTicket({self.client_id}, {self.ticker} {self.side} {self.amount}, {self.state}, avg={self.avg_price}, vol={self.filled_volume})"
+
+class OrderExecutor:
+    def __init__(self, api, poll_interval: float = 0.5, fill_timeout: float = 30.0, max_submit_retries: int = 3,
+                 retry_delay: float = 0.5, max_workers: int = 4, history: int = 200, on_submit=None, on_done=None):
+        """
+        주문을 백그라운드에서 내고 실제 체결을 확인하는 실행기
+        - buy_market/sell_market은 주문을 큐에 넣고 바로 OrderTicket을 반환합니다. (매매 루프를 막지 않음)
+        - 접수된 주문은 poll_interval초마다 get_order로 확인해 실제 평균 체결가/수량을 기록합니다.
+        - 같은 client_id로 다시 요청하면 기존 주문을 그대로 돌려주고(거절/미체결 취소로 끝난 주문만 새로 냄),
+          응답을 못 받은 주문은 재시도 전에 거래소 주문 목록에서 이미 접수됐는지 먼저 확인합니다. (재시도가 중복 매수로 이어지지 않음)
+        - fill_timeout초가 지나도 체결되지 않은 주문은 경고만 남기고 계속 확인합니다.
+        on_submit(ticket) / on_done(ticket): 모든 주문에 공통으로 불리는 훅 (계좌 잔고 반영 등, 주문별 on_done보다 먼저 호출)
+        api: python_bithumb.Bithumb 또는 같은 메서드를 가진 객체 (mock_exchange.MockExchange 등)
+        """
+        self.api = api
+        self.poll_interval = poll_interval
+        self.fill_timeout = fill_timeout
+        self.max_submit_retries = max_submit_retries
+        self.retry_delay = retry_delay
+        self.on_submit = on_submit
+        self.on_done = on_done
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-submit")
+        self.lock = threading.Lock()
+        self.reconcile_lock = threading.Lock()
+        self.tickets = {} # client_id -> OrderTicket
+        self.claimed_uuids = set() # 이미 어떤 주문에 연결된 거래소 주문 uuid
+        self.open_tickets = [] # 체결 확인 중인 주문
+        self.finished = deque(maxlen=history)
+        self.stop_event = threading.Event()
+        self.poller = threading.Thread(target=self._poll_loop, name="order-poller", daemon=True)
+        self.poller.start()
+
+    def buy_market(self, ticker: str, krw_amount: float, client_id: str = None, on_done=None) -> OrderTicket:
+        """원화 krw_amount만큼 시장가 매수 주문을 냅니다."""
+        return self.submit(ticker, "buy", krw_amount, client_id, on_done)
+
+    def sell_market(self, ticker: str, volume: float, client_id: str = None, on_done=None) -> OrderTicket:
+        """volume 수량을 시장가 매도 주문을 냅니다."""
+        return self.submit(ticker, "sell", volume, client_id, on_done)
+
+    def submit(self, ticker: str, side: str, amount: float, client_id: str = None, on_done=None) -> OrderTicket:
+        """
+        주문을 백그라운드로 보내고 OrderTicket을 반환합니다.
+        on_done(ticket): 주문이 끝나면(체결/취소/실패/확인 불가) 확인 스레드에서 호출됩니다.
+        이미 끝난 같은 client_id의 주문이 돌아오면(ticket.done이 설정됨) on_done은 다시 불리지 않습니다.
+        접수 여부를 몰랐던(unknown) 주문은 거래소 주문 목록으로 다시 확인해, 접수돼 있었으면 체결 확인을 이어가고
+        없었으면 새로 냅니다. (확인이 또 실패하면 unknown 주문을 그대로 돌려줌)
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError(f"주문 방향은 buy/sell 중 하나여야 합니다: {side}")
+        client_id = client_id or f"{ticker}-{side}-{uuid.uuid4().hex[:12]}"
+        with self.lock:
+            existing = self.tickets.get(client_id)
+        if existing is not None and existing.state == "unknown":
+            self._reconcile(existing)
+        with self.lock:
+            existing = self.tickets.get(client_id)
+            if existing is not None and existing.state not in RESUBMITTABLE_STATES:
+                print(f"[주문] 이미 처리한 주문 요청입니다. 다시 내지 않습니다: {client_id} ({existing.state})")
+                return existing
+            ticket = OrderTicket(client_id, ticker, side, amount, on_done)
+            self.tickets[client_id] = ticket
+        if self.on_submit is not None:
+            self.on_submit(ticket)
+        self.executor.submit(self._submit, ticket)
+        return ticket
+
+    def latency_stats(self) -> dict:
+        """최근 체결된 주문들의 구간별 지연(초) 통계 {구간: {"count", "mean", "p95", "max"}}"""
+        with self.lock:
+            spans = [t.latencies() for t in self.finished if t.state == "filled"]
+        stats = {}
+        for name in ("submit_to_ack", "ack_to_fill", "submit_to_fill"):
+            values = np.array([s[name] for s in spans if s[name] is not None])
+            stats[name] = {"count": 0, "mean": None, "p95": None, "max": None} if len(values) == 0 else {
+                "count": len(values),
+                "mean": float(values.mean()),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+            }
+        return stats
+
+    def close(self, timeout: float = 10.0):
+        """접수 중인 주문을 마저 보내고, 체결 확인 중인 주문을 timeout초까지 기다린 뒤 멈춥니다."""
+        self.executor.shutdown(wait=True)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                if not self.open_tickets:
+                    break
+            time.sleep(self.poll_interval)
+        self.stop_event.set()
+        self.poller.join(timeout=5)
+
+    # --- 주문 접수 ---
+    def _submit(self, ticket: OrderTicket):
+        ticket.submitted_at = time.time()
+        started = datetime.now().astimezone()
+        while True:
+            ticket.attempts += 1
+            try:
+                if ticket.side == "buy":
+                    response = self.api.buy_market_order(ticket.ticker, ticket.amount)
+                else:
+                    response = self.api.sell_market_order(ticket.ticker, ticket.amount)
+                self._ack(ticket, response["uuid"])
+                return
+            except Exception as e:
+                if _is_rejection(e):
+                    self._finish(ticket, "failed", error=str(e))
+                    return
+                print(f"[주문 경고] {ticket.client_id} 주문 응답을 받지 못했습니다 ({ticket.attempts}회): {e}")
+
+            # 응답만 잃어버렸을 수 있으므로, 다시 내기 전에 거래소에 이미 접수됐는지 확인
+            try:
+                found = self._find_submitted(ticket, started)
+            except Exception as e:
+                self._finish(ticket, "unknown", error=f"접수 여부 확인 실패, 중복 주문을 막기 위해 재시도하지 않습니다: {e}")
+                return
+            if found is not None:
+                print(f"[주문] {ticket.client_id} 주문은 이미 접수돼 있었습니다. (uuid: {found})")
+                self._ack(ticket, found)
+                return
+            if ticket.attempts > self.max_submit_retries:
+                self._finish(ticket, "failed", error=f"{ticket.attempts}회 시도했지만 주문이 접수되지 않았습니다.")
+                return
+            time.sleep(self.retry_delay * ticket.attempts)
+
+    def _reconcile(self, ticket: OrderTicket):
+        """unknown으로 끝난 주문이 실제로 거래소에 들어갔는지 다시 확인합니다."""
+        with self.reconcile_lock: # 같은 주문을 두 스레드가 동시에 확인해 한쪽이 '없음'으로 판단하는 것을 막음
+            if ticket.state != "unknown":
+                return # 다른 스레드가 먼저 확인함
+            started = datetime.fromtimestamp(ticket.submitted_at or ticket.created_at).astimezone()
+            try:
+                found = self._find_submitted(ticket, started)
+            except Exception as e:
+                print(f"[주문 경고] {ticket.client_id} 접수 여부를 다시 확인하지 못했습니다: {e}")
+                return
+            if found is None:
+                with self.lock:
+                    ticket.state = "failed" # 거래소에 없음이 확인됨 → 새로 내도 됨
+                    ticket.error = "접수되지 않은 것으로 확인되었습니다."
+                return
+            print(f"[주문] {ticket.client_id} 주문은 접수돼 있었습니다. 체결 확인을 이어갑니다. (uuid: {found})")
+            ticket.done.clear()
+            self._ack(ticket, found)
+
+    def _find_submitted(self, ticket: OrderTicket, started: datetime):
+        """started 이후 거래소에 들어간 같은 종목/방향/금액의 주문 중 아직 다른 주문에 연결되지 않은 것의 uuid"""
+        side = "bid" if ticket.side == "buy" else "ask"
+        orders = self.api.get_orders(market=ticket.ticker, states=["wait", "watch", "done", "cancel"], limit=20)
+        for order in orders:
+            amount = order.get("price") if side == "bid" else order.get("volume")
+            if order.get("side") != side or amount is None or not np.isclose(float(amount), ticket.amount):
+                continue
+            created = datetime.fromisoformat(order["created_at"])
+            if created.tzinfo is None:
+                created = created.astimezone()
+            if (created - started).total_seconds() < -RECONCILE_SKEW_SECONDS:
+                continue
+            with self.lock:
+                if order["uuid"] in self.claimed_uuids:
+                    continue
+                self.claimed_uuids.add(order["uuid"])
+            return order["uuid"]
+        return None
+
+    def _ack(self, ticket: OrderTicket, order_uuid: str):
+        with self.lock:
+            self.claimed_uuids.add(order_uuid)
+            ticket.uuid = order_uuid
+            ticket.acked_at = time.time()
+            ticket.state = "acked"
+            self.open_tickets.append(ticket)
+
+    # --- 체결 확인 ---
+    def _poll_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            with self.lock:
+                tickets = list(self.open_tickets)
+            for ticket in tickets:
+                try:
+                    self._check(ticket)
+                except Exception as e:
+                    print(f"[주문 경고] {ticket.client_id} 체결 확인 실패: {e}")
+
+    def _check(self, ticket: OrderTicket):
+        order = self.api.get_order(ticket.uuid)
+        state = order.get("state")
+        if state in ("done", "cancel"):
+            trades = order.get("trades") or []
+            volume = sum(float(t["volume"]) for t in trades) or float(order.get("executed_volume") or 0.0)
+            funds = sum(float(t["funds"]) for t in trades)
+            if volume > 0:
+                ticket.filled_volume = volume
+                ticket.funds = funds
+                ticket.avg_price = funds / volume if funds else None
+                ticket.paid_fee = float(order.get("paid_fee") or 0.0)
+                ticket.filled_at = time.time()
+                self._finish(ticket, "filled")
+            else:
+                self._finish(ticket, "cancelled", error="체결 없이 주문이 취소되었습니다.")
+        elif not ticket.slow_warned and time.time() - ticket.acked_at > self.fill_timeout:
+            ticket.slow_warned = True
+            print(f"[주문 경고] {ticket.client_id} {self.fill_timeout:.0f}초가 지나도 체결되지 않았습니다. 계속 확인합니다. (uuid: {ticket.uuid})")
+
+    def _finish(self, ticket: OrderTicket, state: str, error: str = None):
+        with self.lock:
+            ticket.state = state
+            ticket.error = error
+            if ticket in self.open_tickets:
+                self.open_tickets.remove(ticket)
+            self.finished.append(ticket)
+        try:
+            if state == "filled":
+                lat = ticket.latencies()
+                # trades 없이 executed_volume만 온 체결은 평균가를 모름
+                avg_text = "알 수 없음" if ticket.avg_price is None else f"{ticket.avg_price:,.2f}"
+                print(f"[주문] {ticket.ticker} {ticket.side} 체결: 평균가 {avg_text} | 수량 {ticket.filled_volume:.8f} | "
+                      f"접수 {_seconds(lat['submit_to_ack'])}, 체결 {_seconds(lat['ack_to_fill'])}")
+            else:
+                print(f"[주문 경고] {ticket.client_id} 주문 종료 ({state}): {error}")
+        finally:
+            # 기록 출력이 실패해도 완료 처리(포지션/잔고 반영)와 대기 해제는 반드시 실행
+            for callback in (self.on_done, ticket.on_done):
+                if callback is None:
+                    continue
+                try:
+                    callback(ticket)
+                except Exception as e:
+                    print(f"[주문 오류] {ticket.client_id} 완료 처리 중 오류: {e}")
+            ticket.done.set()
+
+def _seconds(value) -> str:
+    return "-" if value is None else f"{value:.2f}초"
+
+def _is_rejection(error: Exception) -> bool:
+    """거래소가 주문을 거절한 오류(잔고 부족, 잘못된 요청 등)인지 (이 경우 재시도하지 않음)"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return 400 <= status < 500 and status != 429
+    return "insufficient_funds" in str(error) or "invalid" in str(error).lower()
+
+if __name__ == "__main__":
+    # 모의 거래소로 동작 확인: 응답 유실 30% 상황에서도 주문은 한 번씩만 들어가야 함
+    from mock_exchange import MockExchange
+
+    exchange = MockExchange(prices={"KRW-BTC": 100_000_000.0, "KRW-ETH": 5_000_000.0}, lost_response_rate=0.3, seed=7)
+    executor = OrderExecutor(exchange, poll_interval=0.1)
+    tickets = [executor.buy_market("KRW-BTC", 100_000, client_id=f"demo-btc-{i}") for i in range(5)]
+    tickets += [executor.buy_market("KRW-ETH", 50_000, client_id=f"demo-eth-{i}") for i in range(5)]
+    tickets.append(executor.buy_market("KRW-BTC", 100_000, client_id="demo-btc-0")) # 같은 요청 다시 보내기
+    for ticket in tickets:
+        ticket.wait(10)
+    print(f"요청 {len(tickets)}건 → 거래소 주문 {len(exchange.orders)}건 (주문 API 호출 {exchange.order_requests}회)")
+    for name, stat in executor.latency_stats().items():
+        if stat["count"]:
+            print(f"{name}: 평균 {stat['mean']:.3f}초 | p95 {stat['p95']:.3f}초 | 최대 {stat['max']:.3f}초")
+    executor.close()
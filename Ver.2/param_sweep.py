@@ -0,0 +1,257 @@
+# param_sweep.py
+import itertools
+import os
+import random
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from candle_store import from_frame
+
+# 탐색할 파라미터 후보 (기본값은 main.py / CandlestickTrader / MarketScanner의 현재 값 포함)
+DEFAULT_PARAM_SPACE = {
+    "stop_loss_percent": [1.0, 1.5, 2.0, 3.0], # main.py STOP_LOSS_PERCENT
+    "timeframe": ["minute15"], # main.py TIMEFRAME
+    "window": [10, 20, 30], # 지지/저항선 구간
+    "proximity": [0.003, 0.005, 0.01], # 지지/저항선 근접 오차 범위
+    "min_change": [0.03], # 상승장 스캐너 최소 상승률 (3%)
+    "min_value": [1_000_000_000], # 하락장 스캐너 최소 거래대금 (10억원)
+}
+
+def grid_configs(space: dict) -> list:
+    """파라미터 후보의 모든 조합을 만듭니다."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def random_configs(space: dict, n: int, seed: int = None) -> list:
+    """파라미터 후보에서 무작위로 n개 조합을 뽑습니다. (중복 제거)"""
+    rng = random.Random(seed)
+    configs = {}
+    total = int(np.prod([len(v) for v in space.values()]))
+    while len(configs) < min(n, total):
+        config = {k: rng.choice(v) for k, v in space.items()}
+        configs[tuple(config.items())] = config
+    return list(configs.values())
+
+def _pandas_ta_ema(closes: np.ndarray, length: int) -> float:
+    """pandas_ta ema와 같은 방식(처음 length개 평균으로 시작)으로 마지막 EMA 값을 계산합니다."""
+    if len(closes) < length:
+        return np.nan
+    alpha = 2 / (length + 1)
+    ema = closes[:length].mean()
+    for price in closes[length:]:
+        ema = alpha * price + (1 - alpha) * ema
+    return ema
+
+def build_daily_panel(daily: dict, btc_daily) -> dict:
+    """
+    종목별 일봉을 (날짜 x 종목) 2차원 배열로 모으고, 날짜별 시장 국면(상승장 여부)을 계산합니다.
+    시장 국면은 MarketScanner처럼 비트코인 일봉 30개로 EMA_5 >= EMA_20을 판단하되,
+    종목은 그날 09:05(일봉 마감 전)에 고르므로 전날까지 마감된 일봉만 씁니다. (그날 종가를 미리 보지 않음)
+    """
+    daily = {t: a if isinstance(a, np.ndarray) else from_frame(a) for t, a in daily.items()}
+    btc = btc_daily if isinstance(btc_daily, np.ndarray) else from_frame(btc_daily)
+    tickers = sorted(daily)
+    days = np.unique(np.concatenate([a["ts"].astype("datetime64[ns]").astype("datetime64[D]") for a in daily.values()]))
+
+    panel = {col: np.full((len(days), len(tickers)), np.nan) for col in ("open", "close", "low", "value")}
+    for j, ticker in enumerate(tickers):
+        arr = daily[ticker]
+        rows = np.searchsorted(days, arr["ts"].astype("datetime64[ns]").astype("datetime64[D]"))
+        for col in panel:
+            panel[col][rows, j] = arr[col]
+
+    btc_days = btc["ts"].astype("datetime64[ns]").astype("datetime64[D]")
+    btc_close = np.asarray(btc["close"], dtype=float)
+    btc_bull = np.array([
+        _pandas_ta_ema(btc_close[max(0, d - 29):d + 1], 5) >= _pandas_ta_ema(btc_close[max(0, d - 29):d + 1], 20)
+        for d in range(len(btc_close))
+    ])
+    # 날짜별로 그 전날까지의 마지막 비트코인 일봉 판단을 사용 (이전 일봉이 없으면 상승장으로 간주)
+    prior = np.searchsorted(btc_days, days, side="left") - 1
+    panel["bull"] = np.where(prior >= 0, btc_bull[np.maximum(prior, 0)], True) if len(btc_bull) else np.ones(len(days), dtype=bool)
+    panel["days"] = days.astype("datetime64[ns]").astype("i8")
+    return {"tickers": tickers, **panel}
+
+def select_from_panel(panel: dict, min_change: float, min_value: float, slot_names=("primary", "secondary")) -> dict:
+    """
+    일봉 패널 전체에 대해 날짜별 주/부종목을 한 번에 계산합니다. (전일 캔들 기준, 수수료 필터 제외)
+    {날짜: {포지션 이름: 종목}} 형태로 반환합니다.
+    """
+    o, c, l, v = (panel[col][:-1] for col in ("open", "close", "low", "value"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (c - o) / o
+    momentum = np.where(change > min_change, change * v, np.nan)
+    rebound = np.where((c > o) & (v > min_value), (np.minimum(o, c) - l) * v, np.nan)
+    scores = np.where(panel["bull"][1:, None], momentum, rebound)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+
+    n = min(len(slot_names), scores.shape[1])
+    if n == 0 or len(scores) == 0:
+        return {}
+    top = np.argpartition(-scores, n - 1, axis=1)[:, :n] if n < scores.shape[1] else np.tile(np.arange(n), (len(scores), 1))
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+
+    tickers = panel["tickers"]
+    days = panel["days"][1:].astype("datetime64[ns]")
+    selections = {}
+    for d in range(len(days)):
+        chosen = {name: None for name in slot_names}
+        for rank in range(n):
+            if np.isfinite(top_scores[d, rank]):
+                chosen[slot_names[rank]] = tickers[top[d, rank]]
+        selections[pd.Timestamp(days[d])] = chosen
+    return selections
+
+class SharedArrays:
+    def __init__(self, arrays: dict):
+        """numpy 배열들을 공유 메모리에 올려 워커 프로세스가 복사 없이 읽을 수 있게 합니다."""
+        self.blocks = []
+        self.meta = {} # key -> (공유 메모리 이름, shape, dtype)
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            block = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+            self.blocks.append(block)
+            self.meta[key] = (block.name, arr.shape, arr.dtype.descr if arr.dtype.names else arr.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def attach_shared_arrays(meta: dict) -> (dict, list):
+    """SharedArrays.meta로 공유 메모리에 붙어 배열 뷰를 만듭니다. (블록 목록도 함께 반환해 살아있게 유지)"""
+    arrays, blocks = {}, []
+    for key, (name, shape, dtype) in meta.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+# --- 워커 프로세스 전역 상태 ---
+_worker = {}
+
+def _init_worker(meta: dict, panel_tickers: list, tickers: dict, base_kwargs: dict):
+    arrays, blocks = attach_shared_arrays(meta)
+    _worker.update({"arrays": arrays, "blocks": blocks, "panel_tickers": panel_tickers, "tickers": tickers, "base_kwargs": base_kwargs})
+
+def _slice_by_time(arr: np.ndarray, time_range) -> np.ndarray:
+    if time_range is None:
+        return arr
+    start, end = np.searchsorted(arr["ts"], time_range)
+    return arr[start:end]
+
+def _run_config(task) -> dict:
+    """워커에서 파라미터 조합 하나를 백테스트합니다."""
+    config, time_range = task
+    arrays = _worker["arrays"]
+    candles = {
+        key[2]: _slice_by_time(arr, time_range)
+        for key, arr in arrays.items()
+        if key[0] == "candles" and key[1] == config["timeframe"]
+    }
+
+    selections = None
+    if _worker["panel_tickers"] is not None:
+        panel = {key[1]: arr for key, arr in arrays.items() if key[0] == "panel"}
+        panel["tickers"] = _worker["panel_tickers"]
+        selections = select_from_panel(panel, config["min_change"], config["min_value"])
+
+    backtester = Backtester(
+        candles, tickers=_worker["tickers"], selections=selections,
+        stop_loss_percent=config["stop_loss_percent"], window=config["window"], proximity=config["proximity"],
+        **_worker["base_kwargs"],
+    )
+    return {**config, **backtester.run().summary()}
+
+class ParameterSweep:
+    def __init__(self, candles: dict, tickers: dict = None, daily: dict = None, btc_daily=None, max_workers: int = None, **backtest_kwargs):
+        """
+        저장된 캔들로 파라미터 조합을 병렬 백테스트하는 탐색기
+        candles: {캔들 간격: {종목: 캔들}}
+        tickers: 고정 종목 {포지션 이름: 종목}. 주지 않으면 daily/btc_daily로 매일 종목을 선정합니다.
+        """
+        self.candles = {
+            interval: {t: a if isinstance(a, np.ndarray) else from_frame(a) for t, a in frames.items()}
+            for interval, frames in candles.items()
+        }
+        self.tickers = tickers
+        self.panel = build_daily_panel(daily, btc_daily) if daily is not None and btc_daily is not None else None
+        if self.tickers is None and self.panel is None:
+            raise ValueError("고정 종목(tickers) 또는 일봉 데이터(daily, btc_daily) 중 하나가 필요합니다.")
+        self.max_workers = max_workers or os.cpu_count()
+        self.backtest_kwargs = backtest_kwargs
+
+    def run(self, configs: list, time_range=None, objective: str = "total_return_percent") -> pd.DataFrame:
+        """모든 조합을 백테스트하고 objective 기준 내림차순으로 정렬한 결과표를 반환합니다."""
+        with self._pool() as pool:
+            return self._evaluate(pool, configs, time_range, objective)
+
+    def walk_forward(self, configs: list, n_splits: int = 4, train_ratio: float = 0.7, objective: str = "total_return_percent") -> pd.DataFrame:
+        """
+        전체 기간을 n_splits 구간으로 나누고, 각 구간 앞부분(학습)에서 가장 좋은 조합을 골라
+        뒷부분(검증)에서 성과를 측정합니다.
+        """
+        all_ts = np.concatenate([a["ts"] for frames in self.candles.values() for a in frames.values()])
+        edges = np.linspace(all_ts.min(), all_ts.max() + 1, n_splits + 1).astype(np.int64)
+
+        folds = []
+        with self._pool() as pool:
+            for fold in range(n_splits):
+                start, end = edges[fold], edges[fold + 1]
+                split = start + int((end - start) * train_ratio)
+                train = self._evaluate(pool, configs, (start, split), objective)
+                if train.empty:
+                    continue
+                best = {k: train.iloc[0][k] for k in configs[0]}
+                test = self._evaluate(pool, [best], (split, end), objective)
+                folds.append({
+                    "fold": fold,
+                    "train_start": pd.Timestamp(int(start)), "test_start": pd.Timestamp(int(split)), "test_end": pd.Timestamp(int(end)),
+                    **best,
+                    f"train_{objective}": train.iloc[0][objective],
+                    f"test_{objective}": test.iloc[0][objective] if not test.empty else np.nan,
+                })
+        return pd.DataFrame(folds)
+
+    def _evaluate(self, pool, configs: list, time_range, objective: str) -> pd.DataFrame:
+        tasks = [(config, time_range) for config in configs]
+        chunksize = max(1, len(tasks) // (self.max_workers * 4))
+        results = list(pool.map(_run_config, tasks, chunksize=chunksize))
+        return pd.DataFrame(results).sort_values(objective, ascending=False, ignore_index=True) if results else pd.DataFrame()
+
+    @contextmanager
+    def _pool(self):
+        """캔들/패널 배열을 공유 메모리에 올리고 워커 풀을 엽니다."""
+        arrays = {("candles", interval, t): a for interval, frames in self.candles.items() for t, a in frames.items()}
+        panel_tickers = None
+        if self.panel is not None:
+            panel_tickers = self.panel["tickers"]
+            arrays.update({("panel", k): v for k, v in self.panel.items() if k != "tickers"})
+
+        shared = SharedArrays(arrays)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker,
+                initargs=(shared.meta, panel_tickers, self.tickers, self.backtest_kwargs),
+            ) as pool:
+                yield pool
+        finally:
+            shared.close()
+
+if __name__ == "__main__":
+    from candle_store import shared_store
+
+    # 저장소의 15분봉으로 기본 파라미터 공간을 격자 탐색
+    tickers = {"primary": "KRW-BTC", "secondary": "KRW-ETH"}
+    candles = {"minute15": {t: shared_store.read_array(t, "minute15") for t in tickers.values()}}
+    sweep = ParameterSweep(candles, tickers=tickers)
+    configs = grid_configs(DEFAULT_PARAM_SPACE)
+    print(sweep.run(configs).head(10).to_string())
+    print(sweep.walk_forward(configs, n_splits=3).to_string())
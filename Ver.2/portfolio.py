@@ -0,0 +1,182 @@
+# portfolio.py
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from candle_scheduler import closed_candles
+from candlestick_trader import evaluate_latest, SIGNAL_MESSAGES, SR_WINDOW, PROXIMITY
+
+DECISIONS = {1: "buy", -1: "sell", 0: "hold"}
+
+class Portfolio:
+    def __init__(self, weights):
+        """
+        N종목 포지션 상태표 (슬롯별 numpy 배열)
+        weights: 슬롯별 자금 배분 비중 (예: [0.7, 0.3] → 주종목 70%, 부종목 30%). 합이 1이 아니면 비율로 맞춥니다.
+        슬롯 하나를 고칠 때는 locks[슬롯]을 잡아 손절 감시 스레드와 겹치지 않게 합니다.
+        """
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim != 1 or len(weights) == 0 or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"자금 배분 비중이 올바르지 않습니다: {weights}")
+        n = len(weights)
+        self.weights = weights / weights.sum()
+        self.tickers = np.full(n, None, dtype=object)
+        self.in_position = np.zeros(n, dtype=bool)
+        self.purchase_price = np.zeros(n)
+        self.volume = np.zeros(n)
+        self.pending = np.zeros(n, dtype=bool) # 주문이 나가서 체결을 기다리는 중
+        self.entry_ids = np.full(n, None, dtype=object) # 포지션을 연 매수 주문의 client_id
+        self.locks = [threading.Lock() for _ in range(n)]
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def assign(self, tickers):
+        """새로 선정한 종목을 슬롯 순서대로 배정하고 포지션 상태를 초기화합니다. (모자란 슬롯은 비워둠)"""
+        tickers = list(tickers)[:len(self)]
+        with ExitStack() as stack:
+            for lock in self.locks:
+                stack.enter_context(lock)
+            self.tickers[:] = None
+            self.tickers[:len(tickers)] = tickers
+            self.in_position[:] = False
+            self.purchase_price[:] = 0.0
+            self.volume[:] = 0.0
+            self.pending[:] = False
+            self.entry_ids[:] = None
+
+    def active(self) -> np.ndarray:
+        """종목이 배정된 슬롯 번호"""
+        return np.flatnonzero(self.tickers != None)
+
+    def held(self) -> np.ndarray:
+        """포지션을 보유 중인 슬롯 번호 (매도 주문이 체결을 기다리는 슬롯은 제외)"""
+        return np.flatnonzero(self.in_position & ~self.pending & (self.tickers != None))
+
+    def open_position(self, slot: int, price: float, volume: float, entry_id: str = None):
+        self.in_position[slot] = True
+        self.purchase_price[slot] = price
+        self.volume[slot] = volume
+        self.entry_ids[slot] = entry_id
+
+    def close_position(self, slot: int):
+        self.in_position[slot] = False
+        self.volume[slot] = 0.0
+        self.entry_ids[slot] = None
+
+    def buy_amount(self, slot: int, available_krw: float) -> float:
+        """
+        남은 원화 중 이 슬롯에 넣을 금액
+        보유 중이거나 매수 주문이 나간 슬롯 몫은 이미 원화에서 빠져 있으므로, 나머지 슬롯들의 비중 합 대비 이 슬롯 비중만큼 씁니다.
+        (두 슬롯 70/30에서 둘 다 비어 있으면 원화의 70%, 30% 슬롯이 이미 보유 중이면 남은 원화 전부)
+        """
+        free_weight = self.weights[~(self.in_position | self.pending)].sum()
+        if free_weight <= 0:
+            return 0.0
+        return available_krw * self.weights[slot] / free_weight
+
+    def stop_loss_hits(self, slots: np.ndarray, prices: np.ndarray, stop_loss_percent: float) -> np.ndarray:
+        """slots 중 현재가(prices)가 손절 기준에 닿은 것을 표시한 bool 배열 (가격이 없거나 매수가가 0이면 False)"""
+        purchase = self.purchase_price[slots]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loss_percent = (prices - purchase) / purchase * 100
+        return (purchase > 0) & ~np.isnan(prices) & (loss_percent <= -abs(stop_loss_percent))
+
+    def rows(self) -> list:
+        """슬롯별 상태 (출력/알림용) [{"slot", "ticker", "weight", "in_position", "pending", "purchase_price", "volume"}, ...]"""
+        return [
+            {
+                "slot": slot,
+                "ticker": self.tickers[slot],
+                "weight": float(self.weights[slot]),
+                "in_position": bool(self.in_position[slot]),
+                "pending": bool(self.pending[slot]),
+                "purchase_price": float(self.purchase_price[slot]),
+                "volume": float(self.volume[slot]),
+            }
+            for slot in range(len(self))
+        ]
+
+class PortfolioEngine:
+    def __init__(self, portfolio: Portfolio, candle_store, interval: str = "minute15", count: int = 30,
+                 stream=None, max_workers: int = 16, window: int = SR_WINDOW, proximity: float = PROXIMITY):
+        """
+        포트폴리오 전체 종목을 한 사이클에 함께 처리하는 엔진
+        - 종목별 캔들은 스레드 풀로 동시에 준비합니다. (스트림이 방금 마감한 캔들이 저장돼 있으면 네트워크 요청 없음)
+        - 매매 판단은 모든 종목의 캔들을 (종목 수, 캔들 수) 배열로 쌓아 한 번에 계산합니다.
+        종목이 2개에서 30개로 늘어도 사이클 시간은 가장 느린 캔들 요청 하나 정도만 걸립니다.
+        """
+        self.portfolio = portfolio
+        self.candle_store = candle_store
+        self.interval = interval
+        self.count = count
+        self.stream = stream
+        self.window = window
+        self.proximity = proximity
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.streamed = {} # 종목 -> 스트림으로 받아 저장소에 합친 마지막 캔들의 마감 시각
+
+    def mark_streamed(self, ticker: str, end: pd.Timestamp):
+        self.streamed[ticker] = end
+
+    def load(self, boundary: datetime, timeout: float = None) -> (dict, dict):
+        """
+        배정된 모든 종목의 마감 캔들과 현재가를 동시에 준비합니다. ({종목: DataFrame}, {종목: 현재가})
+        timeout초 안에 준비되지 않은 종목은 이번 사이클에서 빼고 반환합니다. (요청은 뒤에서 마저 끝남)
+        """
+        tickers = sorted(set(self.portfolio.tickers[self.portfolio.active()]))
+        futures = {self.executor.submit(self._load_one, ticker, boundary): ticker for ticker in tickers}
+        done, late = wait(futures, timeout=timeout)
+        if late:
+            print(f"[포트폴리오 경고] {timeout:.1f}초 안에 캔들을 받지 못한 종목은 이번 사이클을 건너뜁니다: {sorted(futures[f] for f in late)}")
+        frames, prices = {}, {}
+        for future in done:
+            df, price = future.result()
+            if df is not None and len(df) >= 3 and price is not None:
+                frames[futures[future]], prices[futures[future]] = df, price
+        return frames, prices
+
+    def evaluate(self, frames: dict) -> dict:
+        """모든 종목의 마지막 마감 캔들을 한 번에 판단합니다. {종목: "buy"/"sell"/"hold"}"""
+        if not frames:
+            return {}
+        tickers = list(frames)
+        width = max(len(df) for df in frames.values())
+        stacked = {col: np.full((len(tickers), width), np.nan) for col in ("open", "high", "low", "close")}
+        for row, ticker in enumerate(tickers):
+            df = frames[ticker]
+            for col, arr in stacked.items():
+                arr[row, width - len(df):] = df[col].to_numpy(dtype=float)
+
+        result = evaluate_latest(stacked["open"], stacked["high"], stacked["low"], stacked["close"], self.window, self.proximity)
+        decisions = {}
+        for row, ticker in enumerate(tickers):
+            decision = DECISIONS[int(result["decision"][row])]
+            if decision == "buy":
+                print(f"{ticker} " + SIGNAL_MESSAGES["bullish_engulfing" if result["bullish_engulfing"][row] else "hammer"])
+            elif decision == "sell":
+                print(f"{ticker} " + SIGNAL_MESSAGES["bearish_engulfing" if result["bearish_engulfing"][row] else "shooting_star"])
+            decisions[ticker] = decision
+        return decisions
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _load_one(self, ticker: str, boundary: datetime):
+        try:
+            return self._fetch_one(ticker, boundary)
+        except Exception as e:
+            print(f"[포트폴리오 경고] {ticker} 캔들 준비 실패, 이번 사이클은 건너뜁니다: {e}")
+            return None, None
+
+    def _fetch_one(self, ticker: str, boundary: datetime):
+        # 판단은 마감된 캔들로, 가격은 최신 체결가로
+        current_price = self.stream.last_price(ticker, max_age=60) if self.stream else None
+        if self.streamed.get(ticker) == pd.Timestamp(boundary) and current_price is not None:
+            return closed_candles(self.candle_store.read(ticker, self.interval, count=self.count), boundary), current_price
+        latest_df = self.candle_store.get_ohlcv(ticker, self.interval, count=self.count + 1)
+        if latest_df is None or len(latest_df) == 0:
+            return None, None
+        return closed_candles(latest_df, boundary), float(latest_df.iloc[-1]['close'])
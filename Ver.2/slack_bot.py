@@ -1,24 +1,42 @@
 # slack_bot.py
 import os
+from datetime import datetime
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
+from circuit_breaker import breakers
+from slack_dispatcher import SlackDispatcher, PRIORITY_TRADE, PRIORITY_ALERT, PRIORITY_INFO
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
+SLACK_TIMEOUT = 10 # 슬랙 요청 하나당 최대 대기 시간(초)
+
 class SlackNotifier:
-    def __init__(self):
-        """슬랙 알림 봇 초기화"""
+    def __init__(self, client=None, use_queue: bool = True, coalesce_windows: dict = None):
+        """
+        슬랙 알림 봇 초기화
+        use_queue=True면 메시지를 백그라운드 전송 큐에 넣고 바로 반환합니다. (매매 루프가 슬랙 응답을 기다리지 않음)
+        client: 테스트용 가짜 클라이언트 주입 (SLACK_API_URL 환경 변수로 로컬 스텁 서버를 쓸 수도 있음)
+        """
         self.slack_token = os.getenv("SLACK_BOT_TOKEN")
-        if not self.slack_token:
-            raise ValueError("SLACK_BOT_TOKEN이 .env 파일에 설정되지 않았습니다.")
-            
-        self.client = WebClient(token=self.slack_token)
+        if client is None:
+            if not self.slack_token:
+                raise ValueError("SLACK_BOT_TOKEN이 .env 파일에 설정되지 않았습니다.")
+            client = WebClient(token=self.slack_token, base_url=os.getenv("SLACK_API_URL", WebClient.BASE_URL), timeout=SLACK_TIMEOUT)
+
+        self.client = client
         self.channel = os.getenv("SLACK_CHANNEL_NAME", "#trading-bot") # 기본 채널명 설정
+        self.dispatcher = SlackDispatcher(self.client, self.channel, coalesce_windows) if use_queue else None
 
-    def send_message(self, message: str, file_path: str = None):
-        """기본 메시지 및 파일 전송"""
+    def send_message(self, message: str, file_path: str = None, priority: int = PRIORITY_INFO):
+        """기본 메시지 및 파일 전송 (큐 사용 시 우선순위 대기열에 넣기만 함)"""
+        if self.dispatcher is not None:
+            self.dispatcher.enqueue(message, priority, file_path)
+            return
+        if not breakers["slack"].allow():
+            print(f"[슬랙 경고] 슬랙 차단기가 열려 있어 메시지를 보내지 않습니다: {message[:30]}")
+            return
         try:
             # 파일이 있는 경우 파일 업로드
             if file_path:
@@ -32,8 +50,13 @@ class SlackNotifier:
             else:
                 self.client.chat_postMessage(channel=self.channel, text=message)
                 print(f"✅ 슬랙으로 메시지 전송 성공.")
+            breakers["slack"].record_success()
         except SlackApiError as e:
+            breakers["slack"].record_success() # 슬랙이 응답은 했음 (연결 문제가 아님)
             print(f"❌ 슬랙 API 오류 발생: {e.response['error']}")
+        except Exception as e:
+            breakers["slack"].record_failure()
+            print(f"❌ 슬랙 전송 실패: {e}")
 
     def report_trade(self, ticker: str, side: str, price: float, volume: float, pnl: float = 0.0, pnl_percent: float = 0.0):
         """거래 체결 내역 보고"""
@@ -51,7 +74,7 @@ class SlackNotifier:
             pnl_icon = "📈" if pnl >= 0 else "📉"
             message += f"∙ *실현 손익:* `{pnl:,.2f}` KRW ({pnl_icon} `{pnl_percent:.2f}` %)\n"
             
-        self.send_message(message)
+        self.send_message(message, priority=PRIORITY_TRADE) # 체결 보고는 일반 안내보다 먼저 전송
 
     def report_daily_summary(self, total_pnl: float, total_trades: int, win_rate: float, daily_goal: float):
         """일일 거래 마감 보고"""
@@ -70,17 +93,19 @@ class SlackNotifier:
         )
         self.send_message(message)
 
+    def close(self):
+        """전송 큐에 남은 메시지를 모두 보냅니다. (프로그램 종료 시 자동으로도 호출됨)"""
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+
 # 테스트용 코드
 if __name__ == "__main__":
-    from datetime import datetime
-    
     notifier = SlackNotifier()
     # 기본 메시지 테스트
     notifier.send_message("🤖 자동매매 봇이 시작되었습니다.")
     
     # 매수/매도 보고 테스트
     notifier.report_trade(ticker="KRW-BTC", side="buy", price=90000000, volume=0.0001)
-    time.sleep(1) # 슬랙 메시지 순서 보장을 위한 딜레이
     notifier.report_trade(ticker="KRW-BTC", side="sell", price=90500000, volume=0.0001, pnl=4500, pnl_percent=5.0)
     
     # 일일 마감 보고 테스트
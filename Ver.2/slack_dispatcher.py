@@ -0,0 +1,135 @@
+# slack_dispatcher.py
+import atexit
+import itertools
+import os
+import queue
+import threading
+import time
+from slack_sdk.errors import SlackApiError
+from circuit_breaker import breakers
+
+# 우선순위 (숫자가 작을수록 먼저 전송)
+PRIORITY_TRADE = 0 # 체결 보고
+PRIORITY_ALERT = 1 # 오류/경고
+PRIORITY_INFO = 2 # 일반 안내
+_STOP = 99 # 종료 신호 (남은 메시지를 모두 보낸 뒤 처리됨)
+
+DEFAULT_COALESCE_WINDOWS = {PRIORITY_TRADE: 0.2, PRIORITY_ALERT: 1.0, PRIORITY_INFO: 2.0}
+MAX_MESSAGE_LENGTH = 3500 # 한 메시지로 묶을 최대 글자 수
+
+class SlackDispatcher:
+    def __init__(self, client, channel: str, coalesce_windows: dict = None, max_retries: int = 5, max_backoff: float = 60.0):
+        """
+        슬랙 전송을 백그라운드 스레드에서 처리하는 큐
+        - 우선순위별 대기열: 체결 보고가 일반 안내보다 먼저 나감
+        - 같은 우선순위 메시지가 짧은 시간(coalesce_windows[우선순위]초) 안에 몰리면 한 메시지로 묶어 전송
+        - 429 응답은 Retry-After만큼 기다렸다가, 그 밖의 일시 오류는 점점 길게 기다렸다가 다시 시도
+        - 연결 오류/시간 초과가 이어져 slack 차단기가 열리면, 매번 요청을 보내 보지 않고 차단기가 반열림될 때까지 기다림
+        - 프로그램 종료 시 남은 메시지를 모두 보내고 끝남
+        client: slack_sdk WebClient (테스트에서는 같은 메서드를 가진 가짜 객체)
+        """
+        self.client = client
+        self.channel = channel
+        self.coalesce_windows = dict(DEFAULT_COALESCE_WINDOWS, **(coalesce_windows or {}))
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.queue = queue.PriorityQueue()
+        self.seq = itertools.count()
+        self.closed = False
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.thread = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, text: str, priority: int = PRIORITY_INFO, file_path: str = None):
+        """메시지를 큐에 넣고 바로 반환합니다. (전송을 기다리지 않음)"""
+        if self.closed:
+            print(f"[슬랙 경고] 전송 큐가 이미 종료되어 메시지를 보내지 않습니다: {text[:30]}")
+            return
+        self.queue.put((priority, next(self.seq), text, file_path))
+
+    def close(self, timeout: float = 30.0):
+        """남은 메시지를 모두 보낸 뒤 스레드를 멈춥니다."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put((_STOP, next(self.seq), None, None))
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            priority, _, text, file_path = self.queue.get()
+            if priority == _STOP:
+                return
+            if file_path:
+                self._send(text, file_path)
+                continue
+            self._send(self._coalesce(priority, text), None)
+
+    def _coalesce(self, priority: int, text: str) -> str:
+        """같은 우선순위의 메시지를 묶음 시간 동안 모아 하나로 합칩니다."""
+        texts = [text]
+        length = len(text)
+        deadline = time.monotonic() + self.coalesce_windows.get(priority, 0.0)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item[0] != priority or item[3] or length + len(item[2]) > MAX_MESSAGE_LENGTH:
+                self.queue.put(item) # 더 급한 메시지, 파일, 종료 신호 등은 되돌려 놓고 지금까지 모은 것부터 전송
+                break
+            texts.append(item[2])
+            length += len(item[2])
+        self.coalesced += len(texts) - 1
+        return "\n\n".join(texts)
+
+    def _send(self, text: str, file_path: str = None):
+        delay = 1.0
+        breaker = breakers["slack"]
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                wait = max(1.0, breaker.retry_in())
+                print(f"[슬랙 경고] 슬랙 연결이 계속 실패해 차단 중입니다. {min(wait, self.max_backoff):.0f}초 후 다시 시도합니다.")
+                if attempt < self.max_retries:
+                    time.sleep(min(wait, self.max_backoff))
+                continue
+            try:
+                if file_path:
+                    self.client.files_upload_v2(
+                        channel=self.channel,
+                        file=file_path,
+                        initial_comment=text,
+                        title=os.path.basename(file_path)
+                    )
+                    print(f"✅ 슬랙으로 메시지 및 파일 전송 성공: {os.path.basename(file_path)}")
+                else:
+                    self.client.chat_postMessage(channel=self.channel, text=text)
+                    print(f"✅ 슬랙으로 메시지 전송 성공.")
+                self.sent += 1
+                breaker.record_success()
+                return
+            except SlackApiError as e:
+                breaker.record_success() # 슬랙이 응답은 했음 (연결 문제가 아님)
+                if e.response.status_code != 429:
+                    print(f"❌ 슬랙 API 오류 발생: {e.response['error']}")
+                    self.dropped += 1
+                    return
+                self.rate_limited += 1
+                wait = float(e.response.headers.get("Retry-After", delay))
+                print(f"[슬랙 경고] 전송 한도 초과, {wait:.0f}초 후 다시 보냅니다.")
+            except Exception as e:
+                breaker.record_failure()
+                wait = delay
+                print(f"[슬랙 경고] 전송 실패({e}), {wait:.0f}초 후 다시 보냅니다.")
+            if attempt < self.max_retries:
+                time.sleep(min(wait, self.max_backoff))
+                delay = min(delay * 2, self.max_backoff)
+        print(f"❌ 슬랙 메시지 전송을 {self.max_retries}번 재시도했지만 실패했습니다.")
+        self.dropped += 1
@@ -0,0 +1,110 @@
+# stop_loss_watcher.py
+import threading
+import time
+import numpy as np
+import python_bithumb
+
+class StopLossWatcher:
+    def __init__(self, portfolio, on_trigger, stop_loss_percent: float, price_fn=None, interval_seconds: float = 1.0):
+        """
+        보유 포지션을 1~2초마다 현재가와 비교해 손절 기준을 넘으면 바로 매도 함수를 부르는 감시 스레드
+        portfolio: 포지션 상태표 (portfolio.Portfolio)
+        on_trigger(slot, ticker, price): 손절 매도를 실행하는 함수 (매매 사이클을 기다리지 않음)
+        price_fn(tickers) -> {종목: 현재가}: 가장 싼 가격 소스 (기본값: 빗썸 현재가 일괄 조회)
+        """
+        self.portfolio = portfolio
+        self.on_trigger = on_trigger
+        self.stop_loss_percent = stop_loss_percent
+        self.price_fn = price_fn or fetch_current_prices
+        self.interval_seconds = interval_seconds
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.checks = 0
+        self.triggers = 0
+        self.exit_latencies = [] # 손절 감지 → 매도 완료까지 걸린 초
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="stop-loss-watcher", daemon=True)
+        self.thread.start()
+        print(f"[손절 감시] {self.interval_seconds}초 간격으로 손절 감시를 시작합니다. (기준: -{self.stop_loss_percent}%)")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def check_once(self) -> list:
+        """보유 포지션을 한 번 점검하고 손절을 실행한 슬롯 번호 목록을 반환합니다."""
+        held = self.portfolio.held()
+        if len(held) == 0:
+            return []
+        tickers = self.portfolio.tickers[held]
+        prices = self.price_fn(sorted(set(tickers)))
+        self.checks += 1
+
+        # 보유 종목 전체를 한 번에 판정
+        price_arr = np.array([prices.get(ticker, np.nan) for ticker in tickers], dtype=float)
+        hit = self.portfolio.stop_loss_hits(held, price_arr, self.stop_loss_percent)
+
+        triggered = []
+        for slot, ticker, price in zip(held[hit], tickers[hit], price_arr[hit]):
+            detected_at = time.time()
+            purchase_price = self.portfolio.purchase_price[slot]
+            loss_percent = (price - purchase_price) / purchase_price * 100
+            print(f"🚨 [손절 감시] {ticker} 현재가: {price:,.0f} | 매수가: {purchase_price:,.0f} | 손실률: {loss_percent:.2f}%")
+            try:
+                self.on_trigger(int(slot), ticker, float(price))
+                self.triggers += 1
+                self.exit_latencies.append(time.time() - detected_at)
+                triggered.append(int(slot))
+            except Exception as e:
+                print(f"[손절 감시 오류] {ticker} 손절 매도 실패, 다음 점검 때 다시 시도합니다: {e}")
+        return triggered
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            started = time.time()
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"[손절 감시 오류] 현재가 점검 실패: {e}")
+            self.stop_event.wait(max(0.0, self.interval_seconds - (time.time() - started)))
+
+def fetch_current_prices(tickers: list) -> dict:
+    """여러 종목의 현재가를 한 번의 요청으로 조회합니다."""
+    if not tickers:
+        return {}
+    prices = python_bithumb.get_current_price(tickers if len(tickers) > 1 else tickers[0])
+    if isinstance(prices, dict):
+        return {ticker: float(price) for ticker, price in prices.items() if price is not None}
+    if prices is None:
+        return {}
+    if len(tickers) > 1:
+        # 여러 종목을 물었는데 한 행만 오면(상장 폐지 등) 값만 오고 어느 종목인지 알 수 없음
+        print(f"[손절 감시 경고] {len(tickers)}개 종목 현재가 조회에 한 종목 값만 와서 이번 조회는 버립니다: {tickers}")
+        return {}
+    return {tickers[0]: float(prices)}
+
+def stream_first_prices(stream, max_age: float = 5.0, fallback=fetch_current_prices):
+    """
+    실시간 스트림의 최근 체결가를 먼저 쓰고, 없거나 오래된 종목만 REST로 조회하는 price_fn을 만듭니다.
+    REST 조회가 실패해도(빗썸 차단기 열림 등) 스트림에서 받은 종목은 그대로 점검합니다.
+    """
+    def price_fn(tickers: list) -> dict:
+        prices = {}
+        if stream is not None:
+            for ticker in tickers:
+                price = stream.last_price(ticker, max_age=max_age)
+                if price is not None:
+                    prices[ticker] = price
+        missing = [ticker for ticker in tickers if ticker not in prices]
+        if missing:
+            try:
+                prices.update(fallback(missing))
+            except Exception as e:
+                if not prices:
+                    raise
+                print(f"[손절 감시 경고] REST 현재가 조회 실패, 스트림 가격으로만 점검합니다: {e}")
+        return prices
+    return price_fn
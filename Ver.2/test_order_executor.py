@@ -0,0 +1,128 @@
+# test_order_executor.py
+# 응답 유실/재요청 상황에서도 주문이 한 번씩만 들어가고 실제 체결값이 기록되는지 (MockExchange 사용)
+import pytest
+from mock_exchange import MockExchange
+from order_executor import OrderExecutor
+
+PRICES = {"KRW-BTC": 100_000_000.0, "KRW-ETH": 5_000_000.0}
+
+class FlakyLookup:
+    """MockExchange 앞에서 주문 목록 조회(get_orders)를 원하는 동안 실패시키는 어댑터"""
+    def __init__(self, exchange: MockExchange):
+        self.exchange = exchange
+        self.lookup_down = True
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+    def get_orders(self, **kwargs):
+        if self.lookup_down:
+            raise ConnectionError("주문 목록 조회 실패 (테스트)")
+        return self.exchange.get_orders(**kwargs)
+
+class LostBeforePlace(FlakyLookup):
+    """주문 요청이 거래소에 닿기 전에 끊기는 어댑터 (거래소에 주문이 없음)"""
+    def buy_market_order(self, ticker, krw_amount):
+        if self.lookup_down:
+            raise ConnectionError("연결 끊김 (테스트)")
+        return self.exchange.buy_market_order(ticker, krw_amount)
+
+class NoTrades:
+    """get_order 응답에 trades 목록 없이 executed_volume만 주는 어댑터"""
+    def __init__(self, exchange: MockExchange):
+        self.exchange = exchange
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+    def get_order(self, uuid):
+        order = self.exchange.get_order(uuid)
+        order.pop("trades", None)
+        return order
+
+def _exchange(**kwargs) -> MockExchange:
+    kwargs.setdefault("latency", 0.0)
+    kwargs.setdefault("fill_delay", 0.02)
+    return MockExchange(prices=PRICES, balances={"KRW": 10_000_000.0, "BTC": 1.0}, seed=3, **kwargs)
+
+@pytest.fixture
+def make_executor():
+    executors = []
+    def make(api):
+        executor = OrderExecutor(api, poll_interval=0.02, retry_delay=0.01)
+        executors.append(executor)
+        return executor
+    yield make
+    for executor in executors:
+        executor.close(timeout=1)
+
+def test_lost_responses_place_each_client_id_once(make_executor):
+    exchange = _exchange(lost_response_rate=1.0) # 모든 주문 응답이 사라짐 → 전부 접수 확인으로 찾아야 함
+    executor = make_executor(exchange)
+    tickets = [executor.buy_market("KRW-BTC", 100_000, client_id=f"btc-{i}") for i in range(4)]
+    tickets += [executor.buy_market("KRW-ETH", 50_000, client_id=f"eth-{i}") for i in range(3)]
+    again = executor.buy_market("KRW-BTC", 100_000, client_id="btc-0")
+    assert again is tickets[0]
+    for ticket in tickets:
+        assert ticket.wait(5).state == "filled"
+
+    assert exchange.order_requests == len(tickets)
+    assert len(exchange.orders) == len(tickets)
+    assert len({ticket.uuid for ticket in tickets}) == len(tickets)
+    assert executor.buy_market("KRW-BTC", 100_000, client_id="btc-1") is tickets[1] # 체결 후 다시 요청해도 같은 주문
+    assert exchange.order_requests == len(tickets)
+
+def test_fill_values_come_from_trades(make_executor):
+    exchange = _exchange()
+    executor = make_executor(exchange)
+    ticket = executor.sell_market("KRW-BTC", 0.25, client_id="sell-1").wait(5)
+    assert ticket.state == "filled"
+
+    trades = exchange.orders[ticket.uuid]["trades"]
+    volume = sum(float(t["volume"]) for t in trades)
+    funds = sum(float(t["funds"]) for t in trades)
+    assert ticket.filled_volume == pytest.approx(volume)
+    assert ticket.funds == pytest.approx(funds)
+    assert ticket.avg_price == pytest.approx(funds / volume)
+    assert ticket.paid_fee == pytest.approx(exchange.orders[ticket.uuid]["paid_fee"])
+
+    lat = ticket.latencies()
+    assert all(value is not None and value >= 0 for value in lat.values())
+    assert executor.latency_stats()["submit_to_fill"]["count"] == 1
+
+def test_unknown_order_that_was_placed_resumes_on_resubmit(make_executor):
+    api = FlakyLookup(_exchange(lost_response_rate=1.0))
+    executor = make_executor(api)
+    ticket = executor.buy_market("KRW-BTC", 100_000, client_id="entry-1").wait(5)
+    assert ticket.state == "unknown" # 응답도 없고 접수 확인도 실패
+
+    api.lookup_down = False
+    again = executor.buy_market("KRW-BTC", 100_000, client_id="entry-1")
+    assert again is ticket
+    assert again.wait(5).state == "filled"
+    assert api.exchange.order_requests == 1 # 다시 내지 않고 이미 들어간 주문을 이어서 확인
+
+def test_unknown_order_that_was_not_placed_is_sent_again(make_executor):
+    api = LostBeforePlace(_exchange())
+    executor = make_executor(api)
+    ticket = executor.buy_market("KRW-BTC", 100_000, client_id="entry-2").wait(5)
+    assert ticket.state == "unknown"
+    assert api.exchange.order_requests == 0
+
+    api.lookup_down = False
+    again = executor.buy_market("KRW-BTC", 100_000, client_id="entry-2")
+    assert again is not ticket
+    assert ticket.state == "failed" # 거래소에 없음이 확인됨
+    assert again.wait(5).state == "filled"
+    assert api.exchange.order_requests == 1
+
+def test_fill_without_trades_still_finishes(make_executor):
+    exchange = _exchange()
+    executor = make_executor(NoTrades(exchange))
+    done = []
+    ticket = executor.sell_market("KRW-BTC", 0.1, client_id="sell-2", on_done=done.append).wait(5)
+    assert ticket.done.is_set()
+    assert ticket.state == "filled"
+    assert ticket.filled_volume == pytest.approx(0.1) # executed_volume으로 대신 기록
+    assert ticket.avg_price is None
+    assert done == [ticket]
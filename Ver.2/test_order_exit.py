@@ -0,0 +1,84 @@
+# test_order_exit.py
+# 빗썸 Private 차단기가 열린 상태에서도 청산 주문이 접수 확인/체결 확인까지 끝나는지 (MockExchange 사용)
+import pytest
+import requests
+from bithumb_transport import BithumbTransport
+from circuit_breaker import CircuitBreaker, CircuitOpenError, breakers, OPEN
+from mock_exchange import MockExchange
+from order_executor import OrderExecutor
+
+BASE_URL = "https://api.bithumb.com"
+
+class _Response:
+    status_code = 200
+    headers = {}
+
+class _DegradedSession:
+    """주문 접수(POST) 응답은 시간 초과로 잃어버리고, 나머지 요청은 정상 응답하는 가짜 세션"""
+    def __init__(self):
+        self.sent = []
+
+    def request(self, method, url, **kwargs):
+        self.sent.append((method, url))
+        if method == "POST":
+            raise requests.Timeout("주문 응답 시간 초과 (테스트)")
+        return _Response()
+
+class GatedExchange:
+    """MockExchange 앞에 전송 계층을 두어, 차단기가 막는 요청은 거래소까지 가지 않게 하는 어댑터"""
+    def __init__(self, exchange: MockExchange, transport: BithumbTransport):
+        self.exchange = exchange
+        self.transport = transport
+
+    def _send(self, method: str, path: str):
+        self.transport.request(method, BASE_URL + path, headers={"Authorization": "Bearer test"})
+
+    def sell_market_order(self, ticker, volume):
+        view = self.exchange.sell_market_order(ticker, volume) # 거래소는 주문을 받았지만
+        self._send("POST", "/v1/orders") # 응답은 시간 초과
+        return view
+
+    def buy_market_order(self, ticker, krw_amount):
+        view = self.exchange.buy_market_order(ticker, krw_amount)
+        self._send("POST", "/v1/orders")
+        return view
+
+    def get_orders(self, **kwargs):
+        self._send("GET", "/v1/orders")
+        return self.exchange.get_orders(**kwargs)
+
+    def get_order(self, uuid):
+        self._send("GET", "/v1/order")
+        return self.exchange.get_order(uuid)
+
+    def get_balances(self):
+        self._send("GET", "/v1/accounts")
+        return self.exchange.get_balances()
+
+@pytest.fixture
+def private_breaker(monkeypatch):
+    breaker = CircuitBreaker("bithumb_private", failure_threshold=3, reset_timeout=600.0)
+    monkeypatch.setitem(breakers, "bithumb_private", breaker)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    return breaker
+
+def test_exit_fills_while_private_breaker_is_open(private_breaker):
+    exchange = MockExchange(prices={"KRW-BTC": 100_000_000.0}, balances={"KRW": 0.0, "BTC": 0.5}, latency=0.0, fill_delay=0.05, seed=1)
+    transport = BithumbTransport()
+    transport.session = _DegradedSession()
+    api = GatedExchange(exchange, transport)
+    executor = OrderExecutor(api, poll_interval=0.02, retry_delay=0.01)
+    try:
+        # 일반 Private 조회는 차단기가 막음
+        with pytest.raises(CircuitOpenError):
+            api.get_balances()
+
+        ticket = executor.sell_market("KRW-BTC", 0.5, client_id="entry-1-exit").wait(5)
+        assert ticket.state == "filled"
+        assert ticket.filled_volume == pytest.approx(0.5)
+        assert exchange.order_requests == 1 # 응답을 잃어도 중복 매도 없음
+        assert ("GET", BASE_URL + "/v1/orders") in transport.session.sent # 접수 확인은 차단기를 통과
+    finally:
+        executor.close(timeout=1)
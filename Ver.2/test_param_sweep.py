@@ -0,0 +1,41 @@
+# test_param_sweep.py
+# 날짜별 종목 선정이 그날(선정 시각 이후) 비트코인 종가를 미리 보지 않는지
+import numpy as np
+import pandas as pd
+from param_sweep import build_daily_panel, select_from_panel
+
+DAYS = pd.date_range("2024-01-01", periods=35, freq="D")
+
+def _daily(open_, close, low, value) -> pd.DataFrame:
+    n = len(DAYS)
+    return pd.DataFrame({
+        "open": np.full(n, open_), "high": np.full(n, max(open_, close)), "low": np.full(n, low),
+        "close": np.full(n, close), "volume": np.ones(n), "value": np.full(n, value),
+    }, index=DAYS)
+
+def _btc(closes) -> pd.DataFrame:
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes,
+                         "volume": np.ones(len(closes)), "value": np.ones(len(closes))}, index=DAYS)
+
+def test_same_day_btc_reversal_does_not_change_that_days_selection():
+    daily = {
+        "KRW-A": _daily(100.0, 105.0, 99.0, 1e9), # 상승장이면 선택 (5% 상승 모멘텀)
+        "KRW-B": _daily(100.0, 101.0, 80.0, 2e9), # 하락장이면 선택 (긴 아래꼬리 반등)
+    }
+    rising = np.linspace(100.0, 134.0, len(DAYS))
+    crashed = rising.copy()
+    crashed[-1] = 1.0 # 마지막 날 장중(선정 이후) 비트코인 폭락 → 그날 종가 기준으로는 하락장
+
+    base = build_daily_panel(daily, _btc(rising))
+    reversed_ = build_daily_panel(daily, _btc(crashed))
+    last_day = pd.Timestamp(DAYS[-1])
+
+    # 국면 판단이 실제로 선정을 바꾸는 데이터인지 확인
+    assert select_from_panel(base, 0.03, 1e9)[last_day]["primary"] == "KRW-A"
+    flipped = dict(base, bull=~base["bull"])
+    assert select_from_panel(flipped, 0.03, 1e9)[last_day]["primary"] == "KRW-B"
+
+    # 그날 종가가 뒤집혀도 그날 선정은 그대로
+    assert select_from_panel(reversed_, 0.03, 1e9)[last_day] == select_from_panel(base, 0.03, 1e9)[last_day]
+    assert bool(reversed_["bull"][-1]) == bool(base["bull"][-1])
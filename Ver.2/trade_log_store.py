@@ -0,0 +1,180 @@
+# trade_log_store.py
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+LOG_COLUMNS = ["시간", "종목", "판단", "가격", "수량", "실현손익", "수익률(%)"]
+DB_COLUMNS = ["ts", "ticker", "side", "price", "volume", "pnl", "pnl_percent"]
+TRADE_SIDES = ("buy", "sell")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    ticker TEXT,
+    side TEXT NOT NULL,
+    price REAL,
+    volume REAL,
+    pnl REAL,
+    pnl_percent REAL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts);
+CREATE INDEX IF NOT EXISTS idx_trades_side_ts ON trades (side, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+LEGACY_IMPORT_KEY = "legacy_csv_imported"
+
+def connect(path: str) -> sqlite3.Connection:
+    """WAL 모드로 연결합니다. (기록 중에도 다른 스레드/프로세스가 읽을 수 있음)"""
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class SqliteSink:
+    def __init__(self, path: str):
+        """BatchWriter가 쓰는 SQLite 저장 대상 (기록기 스레드 전용 연결)"""
+        self.path = path
+        self.conn = None
+
+    def write(self, rows: list):
+        if self.conn is None:
+            self.conn = connect(self.path) # 기록기 스레드에서 연결을 만들어야 함
+        with self.conn:
+            self.conn.executemany(f"INSERT INTO trades ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def sync(self):
+        """WAL 내용을 DB 파일로 옮기며 디스크에 확실히 기록합니다."""
+        self.conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class TradeLogStore:
+    def __init__(self, path: str = os.path.join("logs", "trade_log.db"), legacy_csv: str = None):
+        """
+        거래 기록 저장소 (SQLite, 시간·매매구분 인덱스)
+        최근 N건 체결, 특정 시각 이후 실현 손익 같은 조회가 인덱스 범위만 읽어 기록이 쌓여도 빠르게 유지됩니다.
+        legacy_csv: DB가 비어 있으면 예전 trade_log_all.csv 내용을 한 번 옮겨옵니다.
+                    (봇과 슬랙 앱이 동시에 시작해도 한 번만 옮기도록 쓰기 잠금 안에서 확인)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.local = threading.local()
+        if legacy_csv and os.path.exists(legacy_csv):
+            self.import_legacy_csv(legacy_csv)
+
+    def sink(self) -> SqliteSink:
+        return SqliteSink(self.path)
+
+    def has_records(self) -> bool:
+        return self._conn().execute("SELECT 1 FROM trades LIMIT 1").fetchone() is not None
+
+    def last_fills(self, n: int = 5) -> list:
+        """최근 n건의 실제 매수/매도 기록 (오래된 순) [(시간, 종목, 판단, 가격, 수량, 실현손익, 수익률), ...]"""
+        rows = self._last_fills(n)
+        return rows[::-1]
+
+    def last_id(self) -> int:
+        row = self._conn().execute("SELECT MAX(id) FROM trades").fetchone()
+        return row[0] or 0
+
+    def fills_after(self, last_id: int) -> list:
+        """id가 last_id보다 큰 매수/매도 기록 [(id, 시간, 종목, 판단, 가격, 수량, 실현손익, 수익률), ...] (새로 쌓인 구간만 읽음)"""
+        return self._conn().execute(
+            f"SELECT id, {', '.join(DB_COLUMNS)} FROM trades WHERE id > ? AND side IN ('buy', 'sell') ORDER BY id", (last_id,)
+        ).fetchall()
+
+    def realized_pnl_since(self, since: datetime, until: datetime = None) -> float:
+        """since 이후 (until 전까지) 매도로 실현한 손익 합계"""
+        until = until.strftime(TIME_FORMAT) if until else "9999"
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(pnl), 0) FROM trades WHERE side = 'sell' AND ts >= ? AND ts < ?",
+            (since.strftime(TIME_FORMAT), until),
+        ).fetchone()
+        return float(row[0])
+
+    def rows_between(self, start: datetime, end: datetime) -> list:
+        """[start, end) 구간의 모든 기록 (시간순)"""
+        return self._conn().execute(
+            f"SELECT {', '.join(DB_COLUMNS)} FROM trades WHERE ts >= ? AND ts < ? ORDER BY ts, id",
+            (start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)),
+        ).fetchall()
+
+    def export_csv(self, path: str, start: datetime, end: datetime) -> int:
+        """[start, end) 구간을 예전과 같은 한글 헤더 CSV로 내보냅니다. (슬랙 파일 공유용)"""
+        rows = self.rows_between(start, end)
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(LOG_COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+
+    def import_csv(self, path: str) -> int:
+        """예전 CSV 로그(한글 헤더)를 DB로 옮깁니다."""
+        conn = self._conn()
+        with conn:
+            count = _insert_csv(conn, path)
+        print(f"[INFO] 기존 CSV 로그 {count}건을 {self.path}로 옮겼습니다.")
+        return count
+
+    def import_legacy_csv(self, path: str) -> int:
+        """
+        DB가 비어 있고 아직 옮긴 적이 없을 때만 예전 CSV를 옮깁니다. (옮긴 건수, 건너뛰면 0)
+        BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡은 뒤 확인하므로, 여러 프로세스가 동시에 시작해도 한 곳만 옮깁니다.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT 1 FROM meta WHERE key = ?", (LEGACY_IMPORT_KEY,)).fetchone()
+            has_records = conn.execute("SELECT 1 FROM trades LIMIT 1").fetchone()
+            count = 0 if done or has_records else _insert_csv(conn, path)
+            if not done:
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (LEGACY_IMPORT_KEY, path))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if count:
+            print(f"[INFO] 기존 CSV 로그 {count}건을 {self.path}로 옮겼습니다.")
+        return count
+
+    def _last_fills(self, n: int) -> list:
+        # 매매구분별로 (side, ts) 인덱스를 역순으로 n건씩만 읽은 뒤 합쳐서 최근 n건을 고름
+        query = f"SELECT {', '.join(DB_COLUMNS)}, id FROM trades WHERE side = ? ORDER BY ts DESC, id DESC LIMIT ?"
+        conn = self._conn()
+        rows = [row for side in TRADE_SIDES for row in conn.execute(query, (side, n)).fetchall()]
+        rows.sort(key=lambda row: (row[0], row[-1]), reverse=True)
+        return [row[:-1] for row in rows[:n]]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            self.local.conn = conn
+        return conn
+
+def _insert_csv(conn: sqlite3.Connection, path: str) -> int:
+    """예전 CSV 로그(한글 헤더)의 기록을 trades에 넣습니다. (트랜잭션은 호출하는 쪽에서)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        rows = [row[:7] for row in reader if len(row) >= 7]
+    conn.executemany(f"INSERT INTO trades ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(r[0], r[1], r[2], *(_to_float(v) for v in r[3:7])) for r in rows])
+    return len(rows)
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
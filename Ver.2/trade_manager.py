@@ -1,10 +1,18 @@
 # trade_manager.py
-import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import schedule
 import time
 from slack_bot import SlackNotifier # 위에서 작성한 슬랙 봇 임포트
+from log_writer import BatchWriter
+from trade_log_store import TradeLogStore
+
+def is_stop_loss_hit(current_price: float, purchase_price: float, stop_loss_percent: float) -> bool:
+    """손절 기준 손실률에 도달했는지 확인 (출력 없이 판정만 수행)"""
+    if purchase_price <= 0:
+        return False
+    loss_percent = ((current_price - purchase_price) / purchase_price) * 100
+    return loss_percent <= -abs(stop_loss_percent)
 
 class TradeManager:
     # def __init__(self, log_dir="logs"):
@@ -15,90 +23,74 @@ class TradeManager:
     #     self.notifier = SlackNotifier()
     #     self.initialize_log_file()
 
-    def __init__(self, log_dir="logs"):
-        """거래 관리자 초기화 (로깅 및 손절)"""
+    def __init__(self, log_dir="logs", batch_size=200, flush_interval=1.0, fsync="trades"):
+        """
+        거래 관리자 초기화 (로깅 및 손절)
+        기록은 큐에 넣기만 하고, 백그라운드 기록기가 batch_size개 또는 flush_interval초마다 모아서 씁니다.
+        """
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
-        # 단일 로그 파일을 사용하도록 경로 고정
-        self.log_file_path = os.path.join(self.log_dir, "trade_log_all.csv")
+        # 시간·매매구분 인덱스가 있는 SQLite 저장소 (예전 단일 CSV 기록은 처음 한 번 옮겨옴)
+        self.store = TradeLogStore(os.path.join(self.log_dir, "trade_log.db"),
+                                   legacy_csv=os.path.join(self.log_dir, "trade_log_all.csv"))
         self.notifier = SlackNotifier()
-        self.initialize_log_file()
+        self.writer = BatchWriter(self.store.sink(), batch_size=batch_size,
+                                  flush_interval=flush_interval, fsync=fsync, is_trade=lambda row: row[2] in ("buy", "sell"))
         
-    def get_log_path(self):
-        """오늘 날짜에 맞는 로그 파일 경로 생성"""
-        return os.path.join(self.log_dir, f"trade_log_{datetime.now().strftime('%Y-%m-%d')}.csv")
-
-    def initialize_log_file(self):
-        """로그 파일이 없으면 새로 생성하고 한글 헤더를 추가"""
-        if not os.path.exists(self.log_file_path):
-            # --- ✨ 헤더를 한글로 변경 ---
-            df = pd.DataFrame(columns=[
-                "시간", "종목", "판단", 
-                "가격", "수량", "실현손익", "수익률(%)"
-            ])
-            # --------------------------
-            df.to_csv(self.log_file_path, index=False, encoding='utf-8-sig')
-            print(f"[INFO] 새로운 통합 로그 파일 생성: {self.log_file_path}")
+    def get_log_path(self, day: datetime = None):
+        """해당 날짜(기본: 오늘)의 로그 파일 경로 생성"""
+        return os.path.join(self.log_dir, f"trade_log_{(day or datetime.now()).strftime('%Y-%m-%d')}.csv")
 
     def log_trade(self, ticker: str, side: str, price: float, volume: float = 0.0, pnl: float = 0.0, pnl_percent: float = 0.0):
-        """거래 내역 및 AI 판단을 CSV 파일에 기록"""
+        """거래 내역 및 AI 판단을 기록 큐에 넣습니다. (DB 쓰기는 백그라운드 기록기가 모아서 처리)"""
         try:
-            # --- ✨ 데이터의 키(Key)를 한글 헤더에 맞춤 ---
-            new_log = pd.DataFrame([{
-                "시간": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "종목": ticker,
-                "판단": side,
-                "가격": price,
-                "수량": volume,
-                "실현손익": pnl,
-                "수익률(%)": pnl_percent
-            }])
-            # ----------------------------------------
-            new_log.to_csv(self.log_file_path, mode='a', header=False, index=False, encoding='utf-8-sig')
-            
+            self.writer.put([datetime.now().strftime('%Y-%m-%d %H:%M:%S'), ticker, side, price, volume, pnl, pnl_percent])
+
             if side in ["buy", "sell"]:
                 print(f"[LOG] 거래 기록 완료: {side} {ticker} @ {price}")
             else:
                 print(f"[LOG] AI 판단 기록 완료: {side}")
         except Exception as e:
             print(f"[ERROR] 로그 기록 중 오류 발생: {e}")
+
+    def flush(self):
+        """큐에 남은 기록을 모두 DB에 씁니다."""
+        self.writer.flush()
+
+    def close(self):
+        """남은 기록을 쓰고 백그라운드 기록기를 종료합니다."""
+        self.writer.close()
             
     def check_stop_loss(self, current_price: float, purchase_price: float, stop_loss_percent: float) -> bool:
         """손절매 조건을 확인"""
-        if purchase_price <= 0:
-            return False
-        loss_percent = ((current_price - purchase_price) / purchase_price) * 100
-        if loss_percent <= -abs(stop_loss_percent):
+        if is_stop_loss_hit(current_price, purchase_price, stop_loss_percent):
+            loss_percent = ((current_price - purchase_price) / purchase_price) * 100
             print(f"🚨 [손절매 발동] 현재가: {current_price:,.0f} | 매수가: {purchase_price:,.0f} | 손실률: {loss_percent:.2f}%")
             return True
         return False
         
     def reset_log_daily(self):
-        """매일 자정에 로그 파일을 백업하고 새로 시작"""
+        """매일 자정에 어제 거래 기록을 CSV로 내보내 슬랙으로 공유"""
         print("[INFO] 일일 로그 리셋 작업을 시작합니다.")
-        
-        # 1. 어제 로그 파일 경로 확인
-        yesterday_log_path = self.log_file_path
-        if not os.path.exists(yesterday_log_path):
+
+        # 1. 어제 구간 기록 확인 (큐에 남은 기록부터 DB에 반영)
+        self.flush()
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        yesterday = today - timedelta(days=1)
+        yesterday_log_path = self.get_log_path(yesterday)
+        if self.store.export_csv(yesterday_log_path, yesterday, today) == 0:
             print("[INFO] 어제 거래 로그가 없어 리셋을 건너뜁니다.")
-            # 새 로그 파일 초기화만 진행
-            self.log_file_path = self.get_log_path()
-            self.initialize_log_file()
+            os.remove(yesterday_log_path)
             return
 
         # 2. 어제 로그 파일 슬랙으로 전송
         try:
-            df = pd.read_csv(yesterday_log_path)
-            total_pnl = df['pnl'].sum()
+            total_pnl = self.store.realized_pnl_since(yesterday, today)
             message = f"*{datetime.now().strftime('%Y-%m-%d')}* 어제자 거래 로그 파일입니다.\n총 실현 손익: `{total_pnl:,.2f}` KRW"
             self.notifier.send_message(message, file_path=yesterday_log_path)
         except Exception as e:
             self.notifier.send_message(f"어제자 로그 파일 공유에 실패했습니다: {e}")
-
-        # 3. 새 로그 파일 경로 설정 및 초기화
-        self.log_file_path = self.get_log_path()
-        self.initialize_log_file()
-        print("[INFO] 새로운 오늘자 로그 파일을 준비했습니다.")
+        print("[INFO] 어제자 로그 파일을 공유했습니다.")
         
 # --- 스케줄링 및 테스트 ---
 def run_daily_reset_job():
@@ -121,6 +113,7 @@ if __name__ == "__main__":
     manager.log_trade("KRW-ETH", "buy", 4500000, 0.01)
     time.sleep(1)
     manager.log_trade("KRW-ETH", "sell", 4550000, 0.01, pnl=4500, pnl_percent=1.0)
+    manager.flush()
     
     # 손절매 로직 테스트
     is_stop_loss_triggered = manager.check_stop_loss(
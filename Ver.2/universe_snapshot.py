@@ -0,0 +1,67 @@
+# universe_snapshot.py
+import numpy as np
+import pandas as pd
+from bithumb_transport import shared_transport
+
+TICKER_URL = "https://api.bithumb.com/v1/ticker"
+SNAPSHOT_COLUMNS = ["open", "high", "low", "close", "value"]
+
+def fetch_ticker_snapshot(markets: list, chunk_size: int = 100, timeout: float = 5.0) -> pd.DataFrame:
+    """
+    여러 종목의 당일 시세(시가/고가/저가/현재가/누적 거래대금)를 몇 번의 일괄 요청으로 가져옵니다.
+    종목 코드를 인덱스로 하는 DataFrame을 반환합니다.
+    """
+    rows = []
+    for i in range(0, len(markets), chunk_size):
+        chunk = markets[i:i + chunk_size]
+        response = shared_transport.get(TICKER_URL, params={"markets": ",".join(chunk)}, timeout=timeout)
+        response.raise_for_status()
+        for item in response.json():
+            rows.append({
+                "market": item["market"],
+                "open": float(item["opening_price"]),
+                "high": float(item["high_price"]),
+                "low": float(item["low_price"]),
+                "close": float(item["trade_price"]),
+                "value": float(item["acc_trade_price"]),
+            })
+    return pd.DataFrame(rows, columns=["market"] + SNAPSHOT_COLUMNS).set_index("market")
+
+def build_daily_table(frames: dict, row: int = -2) -> pd.DataFrame:
+    """종목별 일봉 DataFrame에서 한 행(기본: 전일)씩 모아 하나의 표로 만듭니다."""
+    records = {
+        ticker: df.iloc[row][SNAPSHOT_COLUMNS]
+        for ticker, df in frames.items()
+        if df is not None and len(df) >= abs(row)
+    }
+    if not records:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    return pd.DataFrame.from_dict(records, orient="index")[SNAPSHOT_COLUMNS].astype(float)
+
+def score_momentum(table: pd.DataFrame, min_change: float = 0.03) -> np.ndarray:
+    """상승장 점수: (종가-시가)/시가 * 거래대금. 최소 상승률 미만이면 NaN"""
+    open_ = table["open"].to_numpy(dtype=float)
+    close = table["close"].to_numpy(dtype=float)
+    value = table["value"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (close - open_) / open_
+    return np.where(change > min_change, change * value, np.nan)
+
+def score_rebound(table: pd.DataFrame, min_value: float = 1_000_000_000) -> np.ndarray:
+    """하락장 점수: 아래꼬리 * 거래대금. 양봉이 아니거나 거래대금이 부족하면 NaN"""
+    open_ = table["open"].to_numpy(dtype=float)
+    close = table["close"].to_numpy(dtype=float)
+    low = table["low"].to_numpy(dtype=float)
+    value = table["value"].to_numpy(dtype=float)
+    lower_tail = np.minimum(open_, close) - low
+    is_candidate = (close > open_) & (value > min_value)
+    return np.where(is_candidate, lower_tail * value, np.nan)
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """유효한(NaN이 아닌) 점수 중 상위 n개의 위치를 높은 순으로 반환합니다."""
+    valid = np.flatnonzero(~np.isnan(scores))
+    if n <= 0 or valid.size == 0:
+        return np.empty(0, dtype=int)
+    if valid.size > n:
+        valid = valid[np.argpartition(-scores[valid], n - 1)[:n]]
+    return valid[np.argsort(-scores[valid], kind="stable")]